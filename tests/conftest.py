@@ -0,0 +1,162 @@
+"""Utilidades compartidas por las pruebas: entidades de ejemplo y backend sobre SQLite en memoria"""
+
+import asyncio
+import copy
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Dict
+
+import pytest
+
+import yaml_to_backend.config as config
+
+USUARIO_YAML = """
+entidad: Usuario
+tabla: usuarios
+descripcion: Usuarios del sistema
+campos:
+  id:
+    tipo: integer
+    pk: true
+  nombre:
+    tipo: string
+    max: 100
+    required: true
+  email:
+    tipo: string
+    max: 255
+    required: true
+    unique: true
+  password:
+    tipo: string
+    max: 255
+    required: true
+  rol:
+    tipo: string
+    max: 50
+    required: true
+  habilitado:
+    tipo: boolean
+    required: true
+permisos:
+  admin: [r, w, d]
+  usuario:
+    yo:
+      campo_usuario: id
+"""
+
+TAREA_YAML = """
+entidad: Tarea
+tabla: tareas
+descripcion: Tareas de los usuarios
+campos:
+  id:
+    tipo: integer
+    pk: true
+  titulo:
+    tipo: string
+    max: 100
+    required: true
+  prioridad:
+    tipo: integer
+    required: false
+    index: true
+  usuario_id:
+    tipo: integer
+    fk: usuarios.id
+    required: true
+permisos:
+  admin: [r, w, d]
+  usuario:
+    yo:
+      campo_usuario: usuario_id
+"""
+
+INITIAL_USERS = [
+    {'nombre': 'admin', 'password': 'admin123', 'rol': 'admin', 'habilitado': True, 'email': 'admin@ejemplo.com'},
+    {'nombre': 'ana', 'password': 'ana123', 'rol': 'usuario', 'habilitado': True, 'email': 'ana@ejemplo.com'},
+    {'nombre': 'beto', 'password': 'beto123', 'rol': 'usuario', 'habilitado': True, 'email': 'beto@ejemplo.com'},
+]
+
+
+@pytest.fixture(autouse=True)
+def isolated_config(tmp_path, monkeypatch):
+    """
+    Restaura la configuración global tras cada prueba y ejecuta cada prueba en
+    un directorio temporal (el generador escribe los modelos relativos al cwd).
+    """
+    saved = {name: copy.deepcopy(value) for name, value in vars(config).items() if name.isupper()}
+    monkeypatch.chdir(tmp_path)
+    yield
+    for name, value in saved.items():
+        setattr(config, name, value)
+
+
+@pytest.fixture
+def entities_path(tmp_path):
+    """Directorio con las entidades de ejemplo (usuarios y tareas)"""
+    path = tmp_path / 'entidades'
+    path.mkdir()
+    (path / 'usuario.yaml').write_text(USUARIO_YAML, encoding='utf-8')
+    (path / 'tarea.yaml').write_text(TAREA_YAML, encoding='utf-8')
+    return path
+
+
+@pytest.fixture
+def backend_client(entities_path):
+    """
+    Fábrica de clientes HTTP sobre un backend recién generado en SQLite en
+    memoria. Uso: `async with backend_client(**config) as (client, backend): ...`
+    """
+    import httpx
+    from yaml_to_backend.app import BackendGenerator
+
+    @asynccontextmanager
+    async def factory(**overrides: Any):
+        settings: Dict[str, Any] = dict(
+            ENTITIES_PATH=str(entities_path),
+            DATABASE_URL='sqlite+aiosqlite:///:memory:',
+            INSTALL=True,
+            LOG=False,
+            INITIAL_USERS=INITIAL_USERS,
+        )
+        settings.update(overrides)
+        config.update_config(**settings)
+
+        backend = BackendGenerator()
+        await backend.initialize()
+        transport = httpx.ASGITransport(app=backend.app)
+        try:
+            # El ciclo de vida es el mismo que ejecuta el servidor (eventos startup/shutdown)
+            async with backend.app.router.lifespan_context(backend.app):
+                async with httpx.AsyncClient(transport=transport, base_url='http://prueba') as client:
+                    yield client, backend
+        finally:
+            await backend.db_manager.close_db()
+
+    return factory
+
+
+async def login(client, username: str, password: str) -> Dict[str, str]:
+    """Inicia sesión y devuelve la cabecera de autorización"""
+    response = await client.post('/api/auth/login', json={'username': username, 'password': password})
+    assert response.status_code == 200, response.text
+    return {'Authorization': f"Bearer {response.json()['access_token']}"}
+
+
+def run(coroutine):
+    """Ejecuta una corrutina de prueba (el proyecto no depende de pytest-asyncio)"""
+    return asyncio.run(coroutine)
+
+
+def best_time(function, repeat: int = 20) -> float:
+    """
+    Menor duración en segundos de `repeat` ejecuciones de `function`. Las
+    mediciones comparan dos variantes en la misma máquina, no valores absolutos.
+    """
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        durations.append(time.perf_counter() - start)
+    return min(durations)
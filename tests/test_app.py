@@ -0,0 +1,54 @@
+"""Pruebas del ciclo de vida de la aplicación generada"""
+
+import asyncio
+
+import pytest
+
+from conftest import INITIAL_USERS, login, run
+
+fakeredis = pytest.importorskip("fakeredis")
+
+
+def test_cache_listener_starts_on_the_serving_loop(backend_client, monkeypatch):
+    from yaml_to_backend import app as app_module
+    from yaml_to_backend.core.cache import RedisCacheBackend
+
+    created = []
+
+    def fake_backend():
+        backend = RedisCacheBackend('redis://falso', client=fakeredis.FakeAsyncRedis(server=fakeredis.FakeServer()))
+        created.append(backend)
+        return backend
+
+    monkeypatch.setattr(app_module, 'create_cache_backend', fake_backend)
+
+    async def scenario():
+        async with backend_client(CACHE_BACKEND='redis') as (client, backend):
+            cache = created[0]
+            # El suscriptor corre en el bucle que atiende las peticiones
+            assert cache._listener is not None and not cache._listener.done()
+            assert cache._listener.get_loop() is asyncio.get_running_loop()
+
+            headers = await login(client, 'admin', 'admin123')
+            response = await client.get('/api/tarea/', headers=headers)
+            assert response.status_code == 200
+        assert cache._listener is None
+
+    run(scenario())
+
+
+def test_initialize_does_not_start_background_tasks(entities_path, monkeypatch):
+    """Con `run()` la inicialización corre en otro bucle: las tareas de fondo esperan al arranque"""
+    from yaml_to_backend import app as app_module
+    from yaml_to_backend.config import update_config
+    from yaml_to_backend.core.cache import RedisCacheBackend
+
+    cache = RedisCacheBackend('redis://falso', client=fakeredis.FakeAsyncRedis(server=fakeredis.FakeServer()))
+    monkeypatch.setattr(app_module, 'create_cache_backend', lambda: cache)
+    update_config(ENTITIES_PATH=str(entities_path), DATABASE_URL='sqlite+aiosqlite:///:memory:', INSTALL=True, LOG=False,
+                  INITIAL_USERS=INITIAL_USERS)
+
+    backend = app_module.BackendGenerator()
+    run(backend.initialize())
+    assert cache._listener is None
+    assert cache.start in backend.app.router.on_startup
@@ -0,0 +1,252 @@
+"""Pruebas de los backends de caché (el de Redis sobre fakeredis)"""
+
+import asyncio
+
+import pytest
+
+from yaml_to_backend.core.cache import CacheBackend, MemoryCacheBackend, RedisCacheBackend, TTLCache
+
+fakeredis = pytest.importorskip("fakeredis")
+
+
+class CountingRedis(fakeredis.FakeAsyncRedis):
+    """Cliente falso que cuenta las lecturas y los recorridos del espacio de claves"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.gets = 0
+        self.scans = 0
+
+    async def get(self, name):
+        self.gets += 1
+        return await super().get(name)
+
+    def scan_iter(self, *args, **kwargs):
+        self.scans += 1
+        return super().scan_iter(*args, **kwargs)
+
+
+def make_backend(server, **kwargs) -> RedisCacheBackend:
+    backend = RedisCacheBackend('redis://falso', client=CountingRedis(server=server), **kwargs)
+    backend.configure('entidades', max_size=100, ttl=60)
+    return backend
+
+
+async def wait_for(condition, timeout: float = 2):
+    """Espera a que se cumpla una condición (las invalidaciones llegan por pub/sub)"""
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        if asyncio.get_running_loop().time() > deadline:
+            raise AssertionError("La condición no se cumplió a tiempo")
+        await asyncio.sleep(0.01)
+
+
+async def subscribed(backend: RedisCacheBackend, count: int):
+    """Espera a que haya `count` suscriptores de invalidaciones antes de publicar"""
+    for _ in range(200):
+        counts = await backend.client.pubsub_numsub(backend.channel)
+        if counts and counts[0][1] >= count:
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError("Los suscriptores no se registraron")
+
+
+async def started(*backends):
+    for backend in backends:
+        await backend.start()
+    await subscribed(backends[0], len(backends))
+
+
+def test_cache_backend_is_abstract():
+    with pytest.raises(TypeError):
+        CacheBackend()
+
+    class Incomplete(CacheBackend):
+        async def get(self, namespace, key, default=None):
+            return default
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+    assert isinstance(MemoryCacheBackend(), CacheBackend)
+
+
+def test_delete_invalidates_other_nodes():
+    async def scenario():
+        server = fakeredis.FakeServer()
+        node_a, node_b = make_backend(server), make_backend(server)
+        await started(node_a, node_b)
+        try:
+            await node_a.set('entidades', 1, {'nombre': 'viejo'})
+            assert await node_b.get('entidades', 1) == {'nombre': 'viejo'}
+
+            # La copia local de B se descarta al recibir la invalidación de A
+            await node_a.delete('entidades', 1)
+            await wait_for(lambda: node_b.local._cache('entidades').get(1) is None)
+            assert await node_b.get('entidades', 1) is None
+        finally:
+            await node_a.close()
+            await node_b.close()
+
+    asyncio.run(scenario())
+
+
+def test_clear_bumps_the_generation_without_scanning():
+    async def scenario():
+        server = fakeredis.FakeServer()
+        node_a, node_b = make_backend(server), make_backend(server)
+        await started(node_a, node_b)
+        try:
+            await node_a.set('entidades', 1, 'a')
+            await node_a.set('entidades', 2, 'b')
+            assert await node_b.get('entidades', 1) == 'a'
+
+            await node_a.clear('entidades')
+            await wait_for(lambda: node_b._generations.get('entidades') == 1)
+
+            assert await node_a.get('entidades', 1) is None
+            assert await node_b.get('entidades', 1) is None
+            assert await node_b.get('entidades', 2) is None
+            assert node_a.client.scans == 0
+
+            # Las claves nuevas se escriben en la nueva generación
+            await node_b.set('entidades', 1, 'c')
+            node_a.local.clear_all()
+            assert await node_a.get('entidades', 1) == 'c'
+        finally:
+            await node_a.close()
+            await node_b.close()
+
+    asyncio.run(scenario())
+
+
+def test_missed_clear_is_detected_when_the_generation_is_reread():
+    async def scenario():
+        server = fakeredis.FakeServer()
+        node_a, node_b = make_backend(server, local_ttl=0.05), make_backend(server, local_ttl=0.05)
+        try:
+            # Sin suscriptores: B no recibe el mensaje de `clear`
+            await node_a.set('entidades', 1, 'a')
+            assert await node_b.get('entidades', 1) == 'a'
+            await node_a.clear('entidades')
+
+            await asyncio.sleep(0.06)
+            assert await node_b.get('entidades', 1) is None
+        finally:
+            await node_a.close()
+            await node_b.close()
+
+    asyncio.run(scenario())
+
+
+def test_negative_lookups_are_cached_locally():
+    async def scenario():
+        server = fakeredis.FakeServer()
+        node = make_backend(server, negative_ttl=0.05)
+        try:
+            assert await node.get('entidades', 'ausente') is None
+            gets = node.client.gets
+            for _ in range(5):
+                assert await node.get('entidades', 'ausente', 'defecto') == 'defecto'
+            assert node.client.gets == gets
+
+            # Una escritura del mismo nodo reemplaza la marca de ausencia
+            await node.set('entidades', 'ausente', 1)
+            assert await node.get('entidades', 'ausente') == 1
+
+            # En otro nodo la marca de ausencia expira a los `negative_ttl` segundos
+            other = make_backend(server, negative_ttl=0.05)
+            assert await other.get('entidades', 'nueva') is None
+            await node.set('entidades', 'nueva', 2)
+            assert await other.get('entidades', 'nueva') is None
+            await asyncio.sleep(0.06)
+            assert await other.get('entidades', 'nueva') == 2
+            await other.close()
+        finally:
+            await node.close()
+
+    asyncio.run(scenario())
+
+
+def test_unbounded_cache_only_drops_expired_entries(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr('yaml_to_backend.core.cache.time.monotonic', lambda: now[0])
+    cache = TTLCache(max_size=None, ttl=10)
+    for key in range(TTLCache.MIN_PURGE_SIZE - 2):
+        cache.set(key, key)
+    now[0] += 5
+    cache.set('vigente', True, ttl=100)
+
+    # Al llegar al umbral se purgan solo las expiradas
+    now[0] += 6
+    cache.set('nueva', True)
+    assert len(cache._data) == 2
+    assert cache.get('vigente') is True
+    assert cache.evictions == 0
+
+    # Sin expiradas, nada se descarta aunque se supere el umbral
+    for key in range(3 * TTLCache.MIN_PURGE_SIZE):
+        cache.set(('otra', key), key)
+    assert cache.get(('otra', 0)) == 0
+    assert len(cache._data) == 3 * TTLCache.MIN_PURGE_SIZE + 2
+
+
+def test_propagated_writes_replace_negative_lookups_on_other_nodes():
+    async def scenario():
+        server = fakeredis.FakeServer()
+        node_a, node_b = make_backend(server, negative_ttl=60), make_backend(server, negative_ttl=60)
+        for node in (node_a, node_b):
+            node.configure('revocados', max_size=None, ttl=60, propagate_writes=True)
+        await started(node_a, node_b)
+        try:
+            # B recuerda que el token no está revocado
+            assert await node_b.get('revocados', ('jti', 'abc')) is None
+            assert await node_b.get('entidades', 'nueva') is None
+            gets = node_b.client.gets
+
+            await node_a.set('revocados', ('jti', 'abc'), True)
+            await node_a.set('entidades', 'nueva', 1)
+            await wait_for(lambda: node_b.local._cache('revocados').get(('jti', 'abc')) is None)
+            assert await node_b.get('revocados', ('jti', 'abc')) is True
+            assert node_b.client.gets == gets + 1
+            # Los espacios sin propagación conservan la marca hasta `negative_ttl`
+            assert await node_b.get('entidades', 'nueva') is None
+        finally:
+            await node_a.close()
+            await node_b.close()
+
+    asyncio.run(scenario())
+
+
+def test_listener_reconnects_after_a_failure():
+    async def scenario():
+        server = fakeredis.FakeServer()
+        node_a, node_b = make_backend(server), make_backend(server)
+        original_pubsub = node_b.client.pubsub
+        failures = []
+
+        def flaky_pubsub(**kwargs):
+            if not failures:
+                failures.append(True)
+                raise ConnectionError("conexión perdida")
+            return original_pubsub(**kwargs)
+
+        node_b.client.pubsub = flaky_pubsub
+        node_b.RECONNECT_DELAY = 0.01
+        try:
+            await node_b.start()
+            await node_a.set('entidades', 1, 'a')
+            assert await node_b.get('entidades', 1) == 'a'
+            await wait_for(lambda: failures)
+            # B reintenta por su cuenta: no se vuelve a llamar a `start`
+            await node_a.start()
+            await subscribed(node_a, 2)
+            assert not node_b._listener.done()
+
+            await node_a.delete('entidades', 1)
+            await wait_for(lambda: node_b.local._cache('entidades').get(1) is None)
+        finally:
+            await node_a.close()
+            await node_b.close()
+
+    asyncio.run(scenario())
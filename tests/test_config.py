@@ -0,0 +1,23 @@
+"""Prioridad de DATABASE_URL en update_config"""
+
+import yaml_to_backend.config as config
+from yaml_to_backend.config import update_config
+
+
+def test_db_fields_rebuild_the_url_without_environment(monkeypatch):
+    monkeypatch.delenv('DATABASE_URL', raising=False)
+    update_config(DB_DRIVER='postgresql', DB_HOST='db', DB_PORT=5432, DB_USER='u', DB_PASSWORD='p', DB_NAME='app')
+    assert config.DATABASE_URL == 'postgresql+asyncpg://u:p@db:5432/app'
+
+
+def test_environment_url_survives_db_fields(monkeypatch):
+    monkeypatch.setenv('DATABASE_URL', 'sqlite+aiosqlite:///desde_entorno.db')
+    config.DATABASE_URL = 'sqlite+aiosqlite:///desde_entorno.db'
+
+    update_config(DB_HOST='otro', DB_NAME='otra')
+    assert config.DATABASE_URL == 'sqlite+aiosqlite:///desde_entorno.db'
+    assert config.DB_HOST == 'otro'
+
+    # Una URL explícita sigue teniendo prioridad sobre la del entorno
+    update_config(DATABASE_URL='sqlite+aiosqlite:///explicita.db', DB_HOST='db')
+    assert config.DATABASE_URL == 'sqlite+aiosqlite:///explicita.db'
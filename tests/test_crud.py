@@ -0,0 +1,317 @@
+"""Endpoints CRUD generados, sobre SQLite en memoria"""
+
+import json
+from types import SimpleNamespace
+from typing import Optional
+
+from pydantic import BaseModel
+from sqlalchemy import Column, Integer, MetaData, String, Table, create_engine, event, select
+
+from yaml_to_backend.api.crud_generator import CRUDGenerator
+from yaml_to_backend.security.auth import AuthManager
+
+from conftest import login, run
+
+
+def tarea(titulo, usuario_id, prioridad=1):
+    return {'titulo': titulo, 'prioridad': prioridad, 'usuario_id': usuario_id}
+
+
+async def seed(client, headers, count=5):
+    """Crea `count` tareas alternando entre ana (2) y beto (3)"""
+    items = [tarea(f"t{i}", 2 + i % 2, prioridad=i) for i in range(count)]
+    response = await client.post('/api/tarea/bulk', json=items, headers=headers)
+    assert response.json() == {'creados': count}
+
+
+def test_create_read_update_delete(backend_client):
+    async def scenario():
+        async with backend_client() as (client, backend):
+            admin = await login(client, 'admin', 'admin123')
+
+            response = await client.post('/api/tarea/', json=tarea('nueva', 2), headers=admin)
+            assert response.status_code == 200, response.text
+            created = response.json()
+            assert created['titulo'] == 'nueva' and created['id'] == 1
+
+            response = await client.get('/api/tarea/1', headers=admin)
+            assert response.json()['titulo'] == 'nueva'
+
+            response = await client.put('/api/tarea/1', json={**tarea('editada', 2), 'prioridad': 5}, headers=admin)
+            assert response.status_code == 200, response.text
+            assert response.json()['prioridad'] == 5
+            assert (await client.get('/api/tarea/1', headers=admin)).json()['titulo'] == 'editada'
+
+            assert (await client.delete('/api/tarea/1', headers=admin)).status_code == 200
+            assert (await client.get('/api/tarea/1', headers=admin)).status_code == 404
+            assert (await client.delete('/api/tarea/1', headers=admin)).status_code == 404
+            assert (await client.get('/api/tarea/', headers=admin)).json() == []
+
+    run(scenario())
+
+
+def test_requests_without_token_or_with_invalid_body(backend_client):
+    async def scenario():
+        async with backend_client() as (client, backend):
+            admin = await login(client, 'admin', 'admin123')
+            assert (await client.get('/api/tarea/')).status_code in (401, 403)
+            bad = {'Authorization': 'Bearer no-es-un-token'}
+            assert (await client.get('/api/tarea/', headers=bad)).status_code == 401
+
+            response = await client.post('/api/tarea/', json={'titulo': 'x'}, headers=admin)
+            assert response.status_code == 422
+            response = await client.post('/api/auth/login', json={'username': 'ana', 'password': 'mal'})
+            assert response.status_code == 401
+
+    run(scenario())
+
+
+def test_owner_rules(backend_client):
+    async def scenario():
+        async with backend_client() as (client, backend):
+            admin = await login(client, 'admin', 'admin123')
+            ana = await login(client, 'ana', 'ana123')
+            await seed(client, admin, 4)
+
+            # Solo ve sus propias tareas (ids 1 y 3)
+            rows = (await client.get('/api/tarea/', headers=ana)).json()
+            assert [row['id'] for row in rows] == [1, 3]
+            rows = (await client.get('/api/tarea/yo', headers=ana)).json()
+            assert [row['id'] for row in rows] == [1, 3]
+            assert (await client.get('/api/tarea/2', headers=ana)).status_code in (403, 404)
+
+            # La columna de dueño se completa con su ID y no puede ser otra
+            response = await client.post('/api/tarea/', json=tarea('propia', 2), headers=ana)
+            assert response.status_code == 200 and response.json()['usuario_id'] == 2
+            response = await client.post('/api/tarea/', json=tarea('ajena', 3), headers=ana)
+            assert response.status_code == 403
+
+            # No modifica ni elimina tareas ajenas
+            response = await client.put('/api/tarea/2', json=tarea('robada', 2), headers=ana)
+            assert response.status_code in (403, 404)
+            assert (await client.delete('/api/tarea/2', headers=ana)).status_code in (403, 404)
+            assert (await client.get('/api/tarea/2', headers=admin)).json()['titulo'] == 't1'
+
+            # En la tabla de usuarios solo se ve a sí misma
+            rows = (await client.get('/api/usuario/', headers=ana)).json()
+            assert [row['nombre'] for row in rows] == ['ana']
+
+    run(scenario())
+
+
+def test_filters_sort_pagination_and_count(backend_client):
+    async def scenario():
+        async with backend_client() as (client, backend):
+            admin = await login(client, 'admin', 'admin123')
+            await seed(client, admin, 6)
+
+            rows = (await client.get('/api/tarea/?usuario_id__eq=3&sort=-prioridad', headers=admin)).json()
+            assert [row['prioridad'] for row in rows] == [5, 3, 1]
+            rows = (await client.get('/api/tarea/?prioridad__gte=4', headers=admin)).json()
+            assert [row['id'] for row in rows] == [5, 6]
+            rows = (await client.get('/api/tarea/?prioridad__in=0,2', headers=admin)).json()
+            assert [row['id'] for row in rows] == [1, 3]
+
+            # Los campos no indexados no se pueden filtrar
+            assert (await client.get('/api/tarea/?titulo__eq=t1', headers=admin)).status_code == 400
+            assert (await client.get('/api/tarea/?prioridad__regex=1', headers=admin)).status_code == 400
+
+            response = await client.get('/api/tarea/?skip=2&limit=2&count=exact', headers=admin)
+            assert [row['id'] for row in response.json()] == [3, 4]
+            assert response.headers['X-Total-Count'] == '6'
+
+            # Paginación por cursor
+            seen, cursor = [], ''
+            while cursor is not None:
+                response = await client.get(f'/api/tarea/?after={cursor}&limit=4', headers=admin)
+                seen.extend(row['id'] for row in response.json())
+                cursor = response.headers.get('X-Next-Cursor')
+            assert seen == [1, 2, 3, 4, 5, 6]
+
+            rows = (await client.get('/api/tarea/?fields=id,titulo&limit=2', headers=admin)).json()
+            assert rows == [{'id': 1, 'titulo': 't0'}, {'id': 2, 'titulo': 't1'}]
+
+    run(scenario())
+
+
+def test_conditional_requests(backend_client):
+    async def scenario():
+        async with backend_client() as (client, backend):
+            admin = await login(client, 'admin', 'admin123')
+            await seed(client, admin, 3)
+
+            response = await client.get('/api/tarea/', headers=admin)
+            etag = response.headers['ETag']
+            response = await client.get('/api/tarea/', headers={**admin, 'If-None-Match': etag})
+            assert response.status_code == 304
+
+            await client.put('/api/tarea/1', json=tarea('cambiada', 2), headers=admin)
+            response = await client.get('/api/tarea/', headers={**admin, 'If-None-Match': etag})
+            assert response.status_code == 200
+
+    run(scenario())
+
+
+def test_bulk_operations_and_upsert(backend_client):
+    async def scenario():
+        async with backend_client() as (client, backend):
+            admin = await login(client, 'admin', 'admin123')
+            await seed(client, admin, 5)
+
+            response = await client.patch('/api/tarea/bulk', json={'ids': [1, 2], 'datos': {'prioridad': 9}}, headers=admin)
+            assert response.json() == {'actualizados': 2}
+            response = await client.patch('/api/tarea/bulk?usuario_id__eq=3', json={'datos': {'titulo': 'de beto'}}, headers=admin)
+            assert response.json() == {'actualizados': 2}
+            response = await client.patch('/api/tarea/bulk', json={'ids': [1], 'datos': {}}, headers=admin)
+            assert response.status_code == 400
+
+            rows = (await client.get('/api/tarea/', headers=admin)).json()
+            assert [(row['prioridad'], row['titulo']) for row in rows] == [
+                (9, 't0'), (9, 'de beto'), (2, 't2'), (3, 'de beto'), (4, 't4')
+            ]
+
+            response = await client.request('DELETE', '/api/tarea/bulk', json={'ids': [1, 2, 99]}, headers=admin)
+            assert response.json() == {'eliminados': 2}
+            assert [row['id'] for row in (await client.get('/api/tarea/', headers=admin)).json()] == [3, 4, 5]
+
+            # Upsert sobre un campo único
+            rows = [
+                {'nombre': 'ana', 'email': 'ana@ejemplo.com', 'password': 'x', 'rol': 'admin', 'habilitado': True},
+                {'nombre': 'dora', 'email': 'dora@ejemplo.com', 'password': 'x', 'rol': 'usuario', 'habilitado': True},
+            ]
+            response = await client.post('/api/usuario/bulk?upsert=email', json=rows, headers=admin)
+            assert response.json() == {'procesados': 2}
+            users = {row['nombre']: row for row in (await client.get('/api/usuario/', headers=admin)).json()}
+            assert users['ana']['rol'] == 'admin' and users['ana']['id'] == 2
+            assert 'dora' in users
+            response = await client.post('/api/usuario/bulk?upsert=nombre', json=rows, headers=admin)
+            assert response.status_code == 400
+
+            # Un conflicto deja el lote completo sin aplicar
+            response = await client.post('/api/usuario/bulk', json=rows[:1], headers=admin)
+            assert response.status_code == 409
+
+    run(scenario())
+
+
+def test_export_and_expand(backend_client):
+    async def scenario():
+        async with backend_client() as (client, backend):
+            admin = await login(client, 'admin', 'admin123')
+            await seed(client, admin, 3)
+
+            response = await client.get('/api/tarea/export?fields=id,titulo', headers=admin)
+            assert response.status_code == 200
+            lines = [json.loads(line) for line in response.text.splitlines()]
+            assert lines == [{'id': 1, 'titulo': 't0'}, {'id': 2, 'titulo': 't1'}, {'id': 3, 'titulo': 't2'}]
+
+            response = await client.get('/api/tarea/export?format=csv&fields=id,titulo', headers=admin)
+            assert response.text.splitlines() == ['id,titulo', '1,t0', '2,t1', '3,t2']
+
+            item = (await client.get('/api/tarea/1?expand=usuario_id', headers=admin)).json()
+            assert item['usuario_id']['nombre'] == 'ana'
+            assert 'password' not in item['usuario_id']
+
+    run(scenario())
+
+
+def test_expand_runs_one_query_per_relation(backend_client):
+    """Expandir una página no agrega una consulta por fila, sino una por relación"""
+    async def scenario():
+        async with backend_client() as (client, backend):
+            admin = await login(client, 'admin', 'admin123')
+            statements = []
+
+            def record(conn, cursor, statement, *args):
+                statements.append(statement)
+
+            engine = backend.db_manager.engine.sync_engine
+            event.listen(engine, 'before_cursor_execute', record)
+            try:
+                queries = {}
+                for count in (2, 50):
+                    await seed(client, admin, count)
+                    for expand in ('', '&expand=usuario_id'):
+                        statements.clear()
+                        response = await client.get(f'/api/tarea/?limit=100{expand}', headers=admin)
+                        rows = response.json()
+                        queries[count, expand] = len(statements)
+                    assert {row['usuario_id']['nombre'] for row in rows} == {'ana', 'beto'}
+            finally:
+                event.remove(engine, 'before_cursor_execute', record)
+
+            assert queries[50, '&expand=usuario_id'] == queries[2, '&expand=usuario_id'] == queries[50, ''] + 1
+
+    run(scenario())
+
+
+def usuario(nombre, email=None):
+    email = email or f"{nombre}@ejemplo.com"
+    return {'nombre': nombre, 'email': email, 'password': 'x', 'rol': 'usuario', 'habilitado': True}
+
+
+def test_bulk_conflict_reports_the_failing_item(backend_client):
+    async def scenario():
+        async with backend_client(BULK_CHUNK_SIZE=2) as (client, backend):
+            admin = await login(client, 'admin', 'admin123')
+
+            # Choca con una fila existente en el segundo bloque
+            rows = [usuario('c1'), usuario('c2'), usuario('c3'), usuario('otra-ana', 'ana@ejemplo.com'), usuario('c4')]
+            response = await client.post('/api/usuario/bulk', json=rows, headers=admin)
+            assert response.status_code == 409
+            detail = response.json()['detail']
+            assert (detail['indice'], detail['desde'], detail['hasta']) == (3, 2, 3)
+
+            # Choca con un elemento de un bloque anterior del mismo lote
+            rows = [usuario('d1'), usuario('d2'), usuario('d3'), usuario('d4'), usuario('d1-bis', 'd1@ejemplo.com')]
+            detail = (await client.post('/api/usuario/bulk', json=rows, headers=admin)).json()['detail']
+            assert (detail['indice'], detail['desde'], detail['hasta']) == (4, 4, 4)
+
+            # Nada del lote se escribió
+            names = {row['nombre'] for row in (await client.get('/api/usuario/', headers=admin)).json()}
+            assert names == {'admin', 'ana', 'beto'}
+
+    run(scenario())
+
+
+class Contacto(BaseModel):
+    email: str
+    nombre: str = 'sin nombre'
+    nivel: Optional[int] = None
+
+
+def test_upsert_only_updates_the_fields_sent():
+    metadata = MetaData()
+    table = Table(
+        'contactos', metadata,
+        Column('id', Integer, primary_key=True),
+        Column('email', String(50), unique=True),
+        Column('nombre', String(50)),
+        Column('nivel', Integer),
+    )
+    model = SimpleNamespace(__table__=table)
+    engine = create_engine('sqlite://')
+    metadata.create_all(engine)
+    generator = CRUDGenerator(AuthManager(secret_key='secreto-de-prueba'))
+
+    with engine.begin() as connection:
+        connection.execute(table.insert(), [
+            {'email': 'a@x', 'nombre': 'Ana', 'nivel': 1},
+            {'email': 'b@x', 'nombre': 'Beto', 'nivel': 2},
+        ])
+        items = [
+            Contacto(email='a@x', nivel=5),             # conserva el nombre
+            Contacto(email='b@x', nombre='Roberto'),    # conserva el nivel
+            Contacto(email='c@x'),                      # nueva: valores por defecto
+        ]
+        session = SimpleNamespace(bind=connection)
+        statements = generator._bulk_insert_statements(
+            session, model, [item.model_dump() for item in items],
+            [frozenset(item.model_fields_set) for item in items], 'email', None
+        )
+        assert len(statements) == 3
+        for statement in statements:
+            connection.execute(statement)
+        rows = connection.execute(select(table.c.email, table.c.nombre, table.c.nivel).order_by(table.c.id)).all()
+
+    assert [tuple(row) for row in rows] == [('a@x', 'Ana', 5), ('b@x', 'Roberto', 2), ('c@x', 'sin nombre', None)]
@@ -0,0 +1,103 @@
+"""Caché de lectura por ID (`cache` en el YAML)"""
+
+import pytest
+from sqlalchemy import text
+
+from yaml_to_backend.core.cache import get_cache_backend
+
+from conftest import TAREA_YAML, USUARIO_YAML, login, run
+
+CACHE_YAML = "\ncache:\n  ttl: 60\n  max: 100\n"
+
+
+@pytest.fixture
+def cached_entities(entities_path):
+    (entities_path / 'usuario.yaml').write_text(USUARIO_YAML + CACHE_YAML, encoding='utf-8')
+    (entities_path / 'tarea.yaml').write_text(TAREA_YAML + CACHE_YAML, encoding='utf-8')
+    return entities_path
+
+
+async def seed(client, headers):
+    items = [
+        {'titulo': 'de ana', 'prioridad': 1, 'usuario_id': 2},
+        {'titulo': 'de beto', 'prioridad': 2, 'usuario_id': 3},
+    ]
+    assert (await client.post('/api/tarea/bulk', json=items, headers=headers)).status_code == 200
+
+
+async def rename_behind_the_cache(backend, entity_id, titulo):
+    """Cambia la fila directamente en la base, sin pasar por los endpoints"""
+    async with backend.db_manager.get_session() as session:
+        await session.execute(text("UPDATE tareas SET titulo = :titulo WHERE id = :id"), {'titulo': titulo, 'id': entity_id})
+        await session.commit()
+
+
+async def cache_stats(namespace):
+    return (await get_cache_backend().stats())[namespace]
+
+
+def test_hit_and_invalidation_on_writes(backend_client, cached_entities):
+    async def scenario():
+        async with backend_client() as (client, backend):
+            admin = await login(client, 'admin', 'admin123')
+            await seed(client, admin)
+
+            assert (await client.get('/api/tarea/1', headers=admin)).json()['titulo'] == 'de ana'
+            await rename_behind_the_cache(backend, 1, 'cambiada')
+            # La segunda lectura sale de la caché
+            assert (await client.get('/api/tarea/1', headers=admin)).json()['titulo'] == 'de ana'
+            stats = await cache_stats('entidad:Tarea')
+            assert (stats['hits'], stats['misses']) == (1, 1)
+
+            # PUT descarta la copia
+            body = {'titulo': 'editada', 'prioridad': 1, 'usuario_id': 2}
+            assert (await client.put('/api/tarea/1', json=body, headers=admin)).status_code == 200
+            assert (await client.get('/api/tarea/1', headers=admin)).json()['titulo'] == 'editada'
+
+            # La actualización en lote también
+            await client.patch('/api/tarea/bulk', json={'ids': [1], 'datos': {'titulo': 'en lote'}}, headers=admin)
+            assert (await client.get('/api/tarea/1', headers=admin)).json()['titulo'] == 'en lote'
+
+            # DELETE descarta la copia: la fila borrada no se sigue sirviendo
+            assert (await client.delete('/api/tarea/1', headers=admin)).status_code == 200
+            assert (await client.get('/api/tarea/1', headers=admin)).status_code == 404
+
+    run(scenario())
+
+
+def test_owner_check_runs_on_the_cached_row(backend_client, cached_entities):
+    async def scenario():
+        async with backend_client() as (client, backend):
+            admin = await login(client, 'admin', 'admin123')
+            ana = await login(client, 'ana', 'ana123')
+            await seed(client, admin)
+
+            # El admin deja en caché la tarea de beto
+            assert (await client.get('/api/tarea/2', headers=admin)).status_code == 200
+            hits = (await cache_stats('entidad:Tarea'))['hits']
+
+            assert (await client.get('/api/tarea/2', headers=ana)).status_code == 403
+            assert (await cache_stats('entidad:Tarea'))['hits'] == hits + 1
+            assert (await client.get('/api/tarea/1', headers=ana)).status_code == 200
+
+    run(scenario())
+
+
+def test_password_hash_is_not_cached_or_returned(backend_client, cached_entities):
+    async def scenario():
+        async with backend_client() as (client, backend):
+            admin = await login(client, 'admin', 'admin123')
+            ana = await login(client, 'ana', 'ana123')
+
+            first = (await client.get('/api/usuario/2', headers=ana)).json()
+            cached = await get_cache_backend().get('entidad:Usuario', 2)
+            assert cached['nombre'] == 'ana'
+            assert 'password' not in cached
+            second = (await client.get('/api/usuario/2', headers=ana)).json()
+            assert first == second
+            assert 'password' not in first
+
+            assert (await client.get('/api/usuario/2?fields=password', headers=admin)).status_code == 400
+            assert all('password' not in row for row in (await client.get('/api/usuario/', headers=admin)).json())
+
+    run(scenario())
@@ -0,0 +1,47 @@
+"""Índices de la sección `indices` del YAML"""
+
+import yaml
+from sqlalchemy import inspect
+
+from yaml_to_backend.core.model_generator import get_composite_indexes
+
+from conftest import TAREA_YAML, run
+
+
+def tarea_with(indices):
+    entity_data = yaml.safe_load(TAREA_YAML)
+    entity_data['indices'] = indices
+    return entity_data
+
+
+def test_single_column_indexes_already_in_the_model_are_skipped():
+    indexes = get_composite_indexes(tarea_with([
+        ['usuario_id'],             # clave foránea y dueño "yo"
+        ['prioridad'],              # index: true
+        ['fecha_creacion'],         # campo automático indexado
+        ['id'],                     # clave primaria
+        ['titulo'],
+        {'campos': ['usuario_id'], 'unique': True},
+        ['usuario_id', 'prioridad'],
+    ]))
+    assert indexes == [
+        ('ix_tareas_titulo', ['titulo'], False),
+        ('uq_tareas_usuario_id', ['usuario_id'], True),
+        ('ix_tareas_usuario_id_prioridad', ['usuario_id', 'prioridad'], False),
+    ]
+
+
+def test_backend_starts_with_redundant_single_column_indexes(backend_client, entities_path):
+    indices = "\nindices:\n  - [usuario_id]\n  - [prioridad]\n  - [titulo]\n  - [usuario_id, prioridad]\n"
+    (entities_path / 'tarea.yaml').write_text(TAREA_YAML + indices, encoding='utf-8')
+
+    async def scenario():
+        async with backend_client() as (client, backend):
+            async with backend.db_manager.engine.connect() as connection:
+                return await connection.run_sync(lambda sync: inspect(sync).get_indexes('tareas'))
+
+    names = sorted(index['name'] for index in run(scenario()))
+    assert names == sorted([
+        'ix_tareas_usuario_id', 'ix_tareas_prioridad', 'ix_tareas_titulo', 'ix_tareas_usuario_id_prioridad',
+        'ix_tareas_fecha_creacion', 'ix_tareas_habilitado',
+    ])
@@ -0,0 +1,157 @@
+"""Cola de logins acotada por LOGIN_MAX_CONCURRENCY y hash de contraseñas fuera del event loop"""
+
+import asyncio
+import time
+
+import pytest
+from fastapi import HTTPException
+
+from yaml_to_backend.config import update_config
+from yaml_to_backend.security.auth import AuthManager
+
+from conftest import login, run
+
+
+def test_concurrent_logins_are_bounded():
+    update_config(LOGIN_MAX_CONCURRENCY=2, LOGIN_QUEUE_TIMEOUT=5)
+    manager = AuthManager(secret_key='secreto-de-prueba')
+    active = 0
+    peak = 0
+
+    async def attempt():
+        nonlocal active, peak
+        async with manager.login_slot():
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.02)
+            active -= 1
+
+    async def scenario():
+        await asyncio.gather(*(attempt() for _ in range(8)))
+
+    run(scenario())
+    assert peak == 2
+    assert active == 0
+
+
+def test_queued_login_times_out_with_503():
+    update_config(LOGIN_MAX_CONCURRENCY=1, LOGIN_QUEUE_TIMEOUT=0.05)
+    manager = AuthManager(secret_key='secreto-de-prueba')
+
+    async def scenario():
+        async with manager.login_slot():
+            with pytest.raises(HTTPException) as error:
+                async with manager.login_slot():
+                    pass
+        assert error.value.status_code == 503
+        assert error.value.headers['Retry-After'] == '1'
+
+        # El turno se libera aunque el login falle
+        with pytest.raises(RuntimeError):
+            async with manager.login_slot():
+                raise RuntimeError("fallo del login")
+        async with manager.login_slot():
+            pass
+
+    run(scenario())
+
+
+def test_password_hashing_does_not_block_the_event_loop():
+    manager = AuthManager(secret_key='secreto-de-prueba')
+    hashed = manager.get_password_hash('clave')
+
+    async def scenario():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.001)
+                ticks += 1
+
+        task = asyncio.create_task(ticker())
+        assert await manager.verify_password_async('clave', hashed)
+        task.cancel()
+        return ticks
+
+    try:
+        # bcrypt con 12 rondas tarda decenas de milisegundos: el bucle sigue atendiendo mientras tanto
+        assert run(scenario()) > 5
+    finally:
+        manager.close()
+
+
+def test_login_endpoint_returns_503_when_the_queue_is_full(backend_client, monkeypatch):
+    async def scenario():
+        async with backend_client(LOGIN_MAX_CONCURRENCY=1, LOGIN_QUEUE_TIMEOUT=0.05) as (client, backend):
+            original = backend.auth_manager.verify_password_async
+
+            async def slow_verify(plain, hashed):
+                await asyncio.sleep(0.3)
+                return await original(plain, hashed)
+
+            monkeypatch.setattr(backend.auth_manager, 'verify_password_async', slow_verify)
+            credentials = {'username': 'ana', 'password': 'ana123'}
+            first, second = await asyncio.gather(
+                client.post('/api/auth/login', json=credentials),
+                client.post('/api/auth/login', json=credentials),
+            )
+            assert sorted([first.status_code, second.status_code]) == [200, 503]
+
+    run(scenario())
+
+
+def test_login_storm_does_not_stall_other_requests(backend_client, monkeypatch):
+    """
+    40 logins simultáneos con 2 turnos y 0.2 s de cola, mientras un cliente ya
+    autenticado consulta tareas sin parar. Referencia local (bcrypt ~0.3 s por
+    verificación): GET de ~2.5 ms sin carga; durante la tormenta p95 de ~12 ms
+    y máximo de ~70 ms en ~140 peticiones; 2 logins aceptados y 38 rechazados
+    con 503, todo en ~1.1 s.
+    """
+    async def scenario():
+        async with backend_client(LOGIN_MAX_CONCURRENCY=2, LOGIN_QUEUE_TIMEOUT=0.2) as (client, backend):
+            ana = await login(client, 'ana', 'ana123')
+            original = backend.auth_manager.verify_password_async
+
+            async def slow_verify(plain, hashed):
+                # bcrypt real en el pool de hilos, más una espera que retiene el turno
+                await asyncio.sleep(0.1)
+                return await original(plain, hashed)
+
+            monkeypatch.setattr(backend.auth_manager, 'verify_password_async', slow_verify)
+
+            async def timed_get():
+                start = time.perf_counter()
+                response = await client.get('/api/tarea/', headers=ana)
+                assert response.status_code == 200
+                return time.perf_counter() - start
+
+            idle = min([await timed_get() for _ in range(5)])
+
+            credentials = {'username': 'beto', 'password': 'beto123'}
+            storm = asyncio.gather(*(client.post('/api/auth/login', json=credentials) for _ in range(40)))
+            storm_start = time.perf_counter()
+            storm_task = asyncio.ensure_future(storm)
+            latencies = []
+            while not storm_task.done():
+                latencies.append(await timed_get())
+            responses = await asyncio.wait_for(storm_task, timeout=5)
+            storm_time = time.perf_counter() - storm_start
+            statuses = [response.status_code for response in responses]
+            p95 = sorted(latencies)[int(len(latencies) * 0.95)]
+            print(f"GET sin carga: {idle * 1000:.1f} ms, durante la tormenta: p95 {p95 * 1000:.1f} ms, "
+                  f"máx {max(latencies) * 1000:.1f} ms en {len(latencies)} peticiones; logins: {statuses.count(200)} aceptados, "
+                  f"{statuses.count(503)} rechazados en {storm_time:.2f} s")
+            return p95, latencies, statuses, storm_time
+
+    p95, latencies, statuses, storm_time = run(scenario())
+    # Los logins en exceso se rechazan en lugar de esperar indefinidamente
+    assert set(statuses) == {200, 503}
+    assert statuses.count(200) >= 2
+    assert storm_time < 2
+    # Las demás peticiones se siguen atendiendo mientras dura la tormenta
+    assert len(latencies) >= 20
+    assert p95 < 0.05
+    # Un event loop bloqueado por bcrypt dejaría esperando al GET una verificación completa
+    assert max(latencies) < 0.25
@@ -0,0 +1,115 @@
+"""Pool de conexiones instrumentado, ping de conexiones inactivas y métricas del pool"""
+
+import asyncio
+
+import pytest
+from sqlalchemy import exc, text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from yaml_to_backend.db.pool import InstrumentedQueuePool, PoolMetrics, install_idle_ping, pool_status
+
+from conftest import login, run
+
+
+def instrumented_engine(tmp_path, **options):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'pool.db'}", poolclass=InstrumentedQueuePool, **options)
+    engine.sync_engine.pool.metrics = PoolMetrics()
+    return engine
+
+
+async def select_one(engine):
+    async with engine.connect() as connection:
+        return (await connection.execute(text("SELECT 1"))).scalar_one()
+
+
+def test_checkout_overflow_and_wait_counters(tmp_path):
+    async def scenario():
+        engine = instrumented_engine(tmp_path, pool_size=1, max_overflow=1, pool_timeout=0.1)
+        try:
+            async with engine.connect() as first, engine.connect() as second:
+                await first.execute(text("SELECT 1"))
+                await second.execute(text("SELECT 1"))
+                status = pool_status(engine)
+                assert (status['tamano'], status['en_uso'], status['desborde']) == (1, 2, 1)
+
+                # Sin conexiones libres ni desborde disponible, la tercera agota `pool_timeout`
+                with pytest.raises(exc.TimeoutError):
+                    await select_one(engine)
+
+            status = pool_status(engine)
+            assert status['pool'] == 'InstrumentedQueuePool'
+            assert (status['obtenciones'], status['timeouts'], status['en_uso']) == (3, 1, 0)
+            assert status['espera_maxima_ms'] >= 100
+            assert status['espera_histograma']['<=500ms'] == 1
+            assert sum(status['espera_histograma'].values()) == 3
+
+            # Las métricas se conservan al recrear el pool
+            metrics = engine.sync_engine.pool.metrics
+            assert engine.sync_engine.pool.recreate().metrics is metrics
+        finally:
+            await engine.dispose()
+
+    run(scenario())
+
+
+def test_idle_connections_are_pinged_after_the_threshold(tmp_path):
+    async def scenario():
+        engine = instrumented_engine(tmp_path, pool_size=1, max_overflow=0)
+        metrics = engine.sync_engine.pool.metrics
+        install_idle_ping(engine, 0.05, metrics)
+        try:
+            await select_one(engine)
+            await select_one(engine)
+            # Conexiones reutilizadas enseguida: no se verifican
+            assert metrics.pings == 0
+
+            await asyncio.sleep(0.06)
+            await select_one(engine)
+            assert (metrics.pings, metrics.stale) == (1, 0)
+
+            # Un ping fallido descarta la conexión y el pool abre otra
+            dialect = engine.sync_engine.dialect
+            original_ping = dialect.do_ping
+            failures = []
+
+            def failing_ping(dbapi_connection):
+                if not failures:
+                    failures.append(True)
+                    raise ConnectionError("conexión caída")
+                return original_ping(dbapi_connection)
+
+            dialect.do_ping = failing_ping
+            await asyncio.sleep(0.06)
+            assert await select_one(engine) == 1
+            assert (metrics.pings, metrics.stale) == (2, 1)
+        finally:
+            await engine.dispose()
+
+    run(scenario())
+
+
+def test_metrics_endpoint_reports_the_pool_to_allowed_roles(backend_client, tmp_path):
+    async def scenario():
+        database_url = f"sqlite+aiosqlite:///{tmp_path / 'metricas.db'}"
+        async with backend_client(DATABASE_URL=database_url) as (client, backend):
+            admin = await login(client, 'admin', 'admin123')
+            ana = await login(client, 'ana', 'ana123')
+            await client.get('/api/tarea/', headers=admin)
+
+            response = await client.get('/metricas', headers=admin)
+            assert response.status_code == 200
+            pool = response.json()['pool']
+            assert pool['pool'] == 'InstrumentedQueuePool'
+            assert pool['obtenciones'] > 0
+            assert pool['timeouts'] == 0
+            assert sum(pool['espera_histograma'].values()) == pool['obtenciones']
+
+            response = await client.get('/metricas', headers=ana)
+            assert response.status_code == 403
+            assert (await client.get('/metricas')).status_code == 401
+
+        async with backend_client(DATABASE_URL=database_url, METRICS_ROLES=['admin', 'usuario'], INSTALL=False) as (client, backend):
+            ana = await login(client, 'ana', 'ana123')
+            assert (await client.get('/metricas', headers=ana)).status_code == 200
+
+    run(scenario())
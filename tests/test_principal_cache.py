@@ -0,0 +1,89 @@
+"""Caché de usuarios autenticados: las escrituras en la tabla de usuarios la descartan"""
+
+import pytest
+from sqlalchemy import text
+
+from yaml_to_backend.core.cache import get_cache_backend
+from yaml_to_backend.security.auth import PRINCIPAL_CACHE
+
+from conftest import login, run
+
+
+async def principal_hits() -> int:
+    return (await get_cache_backend().stats()).get(PRINCIPAL_CACHE, {}).get('hits', 0)
+
+
+async def full_body(backend, user_id: int, **changes):
+    """Cuerpo completo del PUT de un usuario, conservando el hash de su contraseña"""
+    async with backend.db_manager.get_session() as session:
+        result = await session.execute(
+            text("SELECT nombre, email, password, rol, habilitado FROM usuarios WHERE id = :id"), {'id': user_id}
+        )
+        return {**dict(result.mappings().one()), **changes}
+
+
+async def status_of(client, headers) -> int:
+    return (await client.get('/api/auth/me', headers=headers)).status_code
+
+
+@pytest.mark.parametrize('stateless', [False, True], ids=['con-estado', 'sin-estado'])
+def test_update_evicts_the_cached_principal(backend_client, stateless):
+    async def scenario():
+        async with backend_client(AUTH_STATELESS=stateless) as (client, backend):
+            admin = await login(client, 'admin', 'admin123')
+            ana = await login(client, 'ana', 'ana123')
+            assert [row['nombre'] for row in (await client.get('/api/usuario/', headers=ana)).json()] == ['ana']
+            if not stateless:
+                # El usuario se resolvió desde la caché
+                hits = await principal_hits()
+                assert await status_of(client, ana) == 200
+                assert await principal_hits() > hits
+
+            response = await client.put('/api/usuario/2', json=await full_body(backend, 2, rol='admin'), headers=admin)
+            assert response.status_code == 200, response.text
+
+            if stateless:
+                # Los claims quedaron desactualizados: el token se revoca
+                assert await status_of(client, ana) == 401
+                ana = await login(client, 'ana', 'ana123')
+            # La siguiente petición ya usa el rol nuevo
+            rows = (await client.get('/api/usuario/', headers=ana)).json()
+            assert sorted(row['nombre'] for row in rows) == ['admin', 'ana', 'beto']
+
+    run(scenario())
+
+
+@pytest.mark.parametrize('stateless', [False, True], ids=['con-estado', 'sin-estado'])
+def test_disabled_user_stops_authenticating(backend_client, stateless):
+    async def scenario():
+        async with backend_client(AUTH_STATELESS=stateless) as (client, backend):
+            admin = await login(client, 'admin', 'admin123')
+            ana = await login(client, 'ana', 'ana123')
+            assert await status_of(client, ana) == 200
+            assert await status_of(client, ana) == 200
+
+            response = await client.put('/api/usuario/2', json=await full_body(backend, 2, habilitado=False), headers=admin)
+            assert response.status_code == 200, response.text
+            assert await status_of(client, ana) == 401
+            response = await client.post('/api/auth/login', json={'username': 'ana', 'password': 'ana123'})
+            assert response.status_code == 401
+            assert await status_of(client, admin) == 200
+
+    run(scenario())
+
+
+@pytest.mark.parametrize('stateless', [False, True], ids=['con-estado', 'sin-estado'])
+def test_deleted_user_stops_authenticating(backend_client, stateless):
+    async def scenario():
+        async with backend_client(AUTH_STATELESS=stateless) as (client, backend):
+            admin = await login(client, 'admin', 'admin123')
+            beto = await login(client, 'beto', 'beto123')
+            assert await status_of(client, beto) == 200
+            assert await status_of(client, beto) == 200
+
+            assert (await client.delete('/api/usuario/3', headers=admin)).status_code == 200
+            assert await status_of(client, beto) == 401
+            assert (await client.get('/api/tarea/', headers=beto)).status_code == 401
+            assert await status_of(client, admin) == 200
+
+    run(scenario())
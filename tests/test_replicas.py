@@ -0,0 +1,136 @@
+"""Reparto de lecturas entre la primaria y las réplicas de DatabaseManager"""
+
+import asyncio
+import sqlite3
+
+import pytest
+from sqlalchemy import text
+
+import yaml_to_backend.core.cache as cache
+from yaml_to_backend.core.cache import MemoryCacheBackend
+from yaml_to_backend.db.connection import DatabaseManager
+
+from conftest import run
+
+
+@pytest.fixture(autouse=True)
+def memory_cache(monkeypatch):
+    """Caché propia por prueba para que las escrituras recientes no se compartan"""
+    monkeypatch.setattr(cache, '_cache_backend', MemoryCacheBackend())
+
+
+@pytest.fixture
+def databases(tmp_path):
+    """Primaria y dos réplicas SQLite en archivos, cada una con su nombre en la tabla `origen`"""
+    urls = {}
+    for name in ('primaria', 'replica1', 'replica2'):
+        path = tmp_path / f"{name}.db"
+        with sqlite3.connect(path) as connection:
+            connection.execute("CREATE TABLE origen (nombre TEXT)")
+            connection.execute("INSERT INTO origen VALUES (?)", (name,))
+        urls[name] = f"sqlite+aiosqlite:///{path}"
+    return urls
+
+
+def manager_for(databases, **kwargs) -> DatabaseManager:
+    return DatabaseManager(databases['primaria'], [databases['replica1'], databases['replica2']], **kwargs)
+
+
+async def served_by(manager, client_key=None) -> str:
+    async with manager.read_session(client_key) as session:
+        origin = (await session.execute(text("SELECT nombre FROM origen"))).scalar_one()
+        assert manager.is_replica_session(session) is (origin != 'primaria')
+        if origin != 'primaria':
+            assert session.info['replica'].endswith(f"{origin}.db")
+        return origin
+
+
+def test_reads_use_the_primary_without_replicas(databases):
+    async def scenario():
+        manager = DatabaseManager(databases['primaria'])
+        await manager.init_db()
+        try:
+            assert [await served_by(manager, 'ana') for _ in range(3)] == ['primaria'] * 3
+            await manager.mark_write('ana')
+            assert await manager.wrote_recently('ana') is False
+        finally:
+            await manager.close_db()
+
+    run(scenario())
+
+
+def test_round_robin_alternates_between_replicas(databases):
+    async def scenario():
+        manager = manager_for(databases)
+        await manager.init_db()
+        try:
+            origins = [await served_by(manager) for _ in range(4)]
+            assert origins == ['replica1', 'replica2', 'replica1', 'replica2']
+            async with manager.get_session() as session:
+                assert (await session.execute(text("SELECT nombre FROM origen"))).scalar_one() == 'primaria'
+        finally:
+            await manager.close_db()
+
+    run(scenario())
+
+
+def test_recent_writer_reads_from_the_primary(databases):
+    async def scenario():
+        manager = manager_for(databases, sticky_seconds=0.3)
+        await manager.init_db()
+        try:
+            await manager.mark_write('ana')
+            assert await manager.wrote_recently('ana') is True
+            assert await served_by(manager, 'ana') == 'primaria'
+            assert await served_by(manager, 'ana') == 'primaria'
+            # Otros clientes y las lecturas anónimas siguen en las réplicas
+            assert await served_by(manager, 'beto') != 'primaria'
+            assert await served_by(manager) != 'primaria'
+
+            # Pasada la ventana, vuelve a leer de las réplicas
+            await asyncio.sleep(0.4)
+            assert await manager.wrote_recently('ana') is False
+            assert await served_by(manager, 'ana') != 'primaria'
+        finally:
+            await manager.close_db()
+
+    run(scenario())
+
+
+def test_sticky_window_can_be_disabled(databases):
+    async def scenario():
+        manager = manager_for(databases, sticky_seconds=0)
+        await manager.init_db()
+        try:
+            await manager.mark_write('ana')
+            assert await served_by(manager, 'ana') != 'primaria'
+        finally:
+            await manager.close_db()
+
+    run(scenario())
+
+
+def test_least_busy_picks_the_idle_replica(databases):
+    async def scenario():
+        manager = manager_for(databases, replica_strategy='least_busy')
+        await manager.init_db()
+        try:
+            async with manager.read_session() as busy:
+                busy_origin = busy.info['replica']
+                for _ in range(3):
+                    async with manager.read_session() as session:
+                        assert session.info['replica'] != busy_origin
+                assert [replica.in_flight for replica in manager.replicas].count(1) == 1
+
+            assert [replica.in_flight for replica in manager.replicas] == [0, 0]
+            # Sin carga, los empates se reparten en orden rotativo
+            assert {await served_by(manager) for _ in range(2)} == {'replica1', 'replica2'}
+        finally:
+            await manager.close_db()
+
+    run(scenario())
+
+
+def test_unknown_strategy_is_rejected(databases):
+    with pytest.raises(ValueError):
+        manager_for(databases, replica_strategy='aleatoria')
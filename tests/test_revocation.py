@@ -0,0 +1,124 @@
+"""Revocación de tokens: escrituras masivas sobre usuarios y rutas personalizadas"""
+
+import pytest
+
+from conftest import login, run
+
+
+def ping():
+    return {'ok': True}
+
+
+CUSTOM_ROUTES = [{'path': '/api/ping', 'metodo': 'GET', 'funcion': ping, 'permisos': ['admin', 'usuario']}]
+
+
+@pytest.fixture(params=[True, False], ids=['returning', 'consulta-previa'])
+def returning(request, monkeypatch):
+    """Ejecuta la prueba con RETURNING y con la consulta previa de IDs"""
+    if not request.param:
+        from yaml_to_backend.api.crud_generator import CRUDGenerator
+        monkeypatch.setattr(CRUDGenerator, '_supports_returning', lambda self, session, operation: False)
+    return request.param
+
+
+async def status_of(client, headers) -> int:
+    return (await client.get('/api/auth/me', headers=headers)).status_code
+
+
+def test_empty_bulk_write_on_users_revokes_nobody(backend_client, returning):
+    async def scenario():
+        async with backend_client(AUTH_STATELESS=True) as (client, backend):
+            admin = await login(client, 'admin', 'admin123')
+            ana = await login(client, 'ana', 'ana123')
+
+            response = await client.request('DELETE', '/api/usuario/bulk', json={'ids': [999]}, headers=admin)
+            assert response.json() == {'eliminados': 0}
+            response = await client.patch('/api/usuario/bulk', json={'ids': [999], 'datos': {'email': 'x@y'}}, headers=admin)
+            assert response.json() == {'actualizados': 0}
+
+            assert await status_of(client, admin) == 200
+            assert await status_of(client, ana) == 200
+
+    run(scenario())
+
+
+def test_bulk_write_on_users_revokes_only_affected_users(backend_client, returning):
+    async def scenario():
+        async with backend_client(AUTH_STATELESS=True) as (client, backend):
+            admin = await login(client, 'admin', 'admin123')
+            ana = await login(client, 'ana', 'ana123')
+            beto = await login(client, 'beto', 'beto123')
+
+            response = await client.patch('/api/usuario/bulk', json={'ids': [3], 'datos': {'email': 'b@y'}}, headers=admin)
+            assert response.json() == {'actualizados': 1}
+            assert await status_of(client, beto) == 401
+            assert await status_of(client, ana) == 200
+            assert await status_of(client, admin) == 200
+
+            response = await client.request('DELETE', '/api/usuario/bulk', json={'ids': [2]}, headers=admin)
+            assert response.json() == {'eliminados': 1}
+            assert await status_of(client, ana) == 401
+            assert await status_of(client, admin) == 200
+
+    run(scenario())
+
+
+def test_upsert_on_users_revokes_only_existing_rows(backend_client):
+    async def scenario():
+        async with backend_client(AUTH_STATELESS=True) as (client, backend):
+            admin = await login(client, 'admin', 'admin123')
+            ana = await login(client, 'ana', 'ana123')
+            beto = await login(client, 'beto', 'beto123')
+
+            rows = [
+                {'nombre': 'ana', 'email': 'ana@ejemplo.com', 'password': 'x', 'rol': 'usuario', 'habilitado': True},
+                {'nombre': 'carla', 'email': 'carla@ejemplo.com', 'password': 'x', 'rol': 'usuario', 'habilitado': True},
+            ]
+            response = await client.post('/api/usuario/bulk?upsert=email', json=rows, headers=admin)
+            assert response.json() == {'procesados': 2}
+            assert await status_of(client, ana) == 401
+            assert await status_of(client, beto) == 200
+
+    run(scenario())
+
+
+@pytest.mark.parametrize('stateless', [False, True], ids=['con-estado', 'sin-estado'])
+def test_custom_routes_reject_revoked_tokens(backend_client, stateless):
+    async def scenario():
+        async with backend_client(AUTH_STATELESS=stateless, CUSTOM_ROUTES=CUSTOM_ROUTES) as (client, backend):
+            admin = await login(client, 'admin', 'admin123')
+            ana = await login(client, 'ana', 'ana123')
+            assert (await client.get('/api/ping', headers=ana)).json() == {'ok': True}
+
+            response = await client.post('/api/auth/revocar/2', headers=admin)
+            assert response.status_code == 200
+            assert (await client.get('/api/ping', headers=ana)).status_code == 401
+
+            await client.post('/api/auth/logout', headers=admin)
+            assert (await client.get('/api/ping', headers=admin)).status_code == 401
+
+    run(scenario())
+
+
+def test_revocation_list_never_evicts_live_entries(monkeypatch):
+    import time
+
+    import yaml_to_backend.core.cache as cache
+    from yaml_to_backend.core.cache import MemoryCacheBackend
+    from yaml_to_backend.security.auth import REVOCATION_CACHE, configure_revocation_list, is_revoked, revoke_token
+
+    monkeypatch.setattr(cache, '_cache_backend', MemoryCacheBackend())
+    configure_revocation_list()
+
+    async def scenario():
+        expires = time.time() + 600
+        # Más revocaciones que el antiguo límite de 100000 entradas
+        for jti in range(100_001 + 1000):
+            await revoke_token({'jti': jti, 'exp': expires})
+        assert await is_revoked({'jti': 0})
+        assert await is_revoked({'jti': 100_000})
+        assert not await is_revoked({'jti': 'otro'})
+        stats = (await cache.get_cache_backend().stats())[REVOCATION_CACHE]
+        assert stats['evictions'] == 0
+
+    run(scenario())
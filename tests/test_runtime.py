@@ -0,0 +1,53 @@
+"""Sentencias precompiladas de EntityRuntime"""
+
+from itertools import permutations
+
+import yaml_to_backend.api.runtime as runtime_module
+
+from conftest import login, run
+
+
+def test_field_order_reuses_the_statement_and_keeps_the_response_order(backend_client):
+    async def scenario():
+        async with backend_client() as (client, backend):
+            admin = await login(client, 'admin', 'admin123')
+            item = {'titulo': 'una', 'prioridad': 4, 'usuario_id': 2}
+            await client.post('/api/tarea/', json=item, headers=admin)
+            runtime = backend.crud_generator.entities_by_table['tareas']['runtime']
+
+            names = ['id', 'titulo', 'prioridad', 'usuario_id']
+            for order in permutations(names):
+                fields = ','.join(order)
+                rows = (await client.get(f'/api/tarea/?fields={fields}', headers=admin)).json()
+                assert list(rows[0]) == list(order)
+                detail = (await client.get(f'/api/tarea/1?fields={fields}', headers=admin)).json()
+                assert list(detail) == list(order)
+
+            # 24 órdenes de los mismos campos: una sola sentencia por tipo de consulta
+            listed = [key for key in runtime._selects._data if set(names) <= key]
+            assert len(listed) == 1
+            assert len(runtime._selects_by_id._data) == 1
+
+    run(scenario())
+
+
+def test_statement_cache_is_bounded(backend_client, monkeypatch):
+    monkeypatch.setattr(runtime_module, 'MAX_CACHED_SELECTS', 4)
+
+    async def scenario():
+        async with backend_client() as (client, backend):
+            runtime = backend.crud_generator.entities_by_table['tareas']['runtime']
+            columns = ['id', 'titulo', 'prioridad', 'usuario_id', 'fecha_creacion']
+            for size in range(1, len(columns) + 1):
+                for start in range(len(columns) - size + 1):
+                    runtime.select_columns(columns[start:start + size])
+                    runtime.select_by_id(columns[start:start + size])
+            assert len(runtime._selects._data) == 4
+            assert len(runtime._selects_by_id._data) == 4
+            assert runtime._selects.evictions > 0
+
+            # Las columnas se seleccionan en el orden de la tabla
+            statement = runtime.select_columns(['titulo', 'id'])
+            assert [column.name for column in statement.selected_columns] == ['id', 'titulo']
+
+    run(scenario())
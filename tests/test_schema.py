@@ -0,0 +1,96 @@
+"""Planificación incremental del esquema (plan_schema / sync_schema)"""
+
+import logging
+
+from sqlalchemy import Column, Integer, MetaData, String, Table, create_engine, inspect, text
+
+from yaml_to_backend.db.schema import plan_schema, read_fingerprint, schema_fingerprint, sync_schema
+
+
+def usuarios(unique_email=False, email_type=String(100)) -> MetaData:
+    metadata = MetaData()
+    Table(
+        'usuarios', metadata,
+        Column('id', Integer, primary_key=True),
+        Column('email', email_type, unique=unique_email),
+    )
+    return metadata
+
+
+def database(tmp_path, rows=('a@x', 'b@x')):
+    engine = create_engine(f"sqlite:///{tmp_path / 'esquema.db'}")
+    with engine.begin() as connection:
+        sync_schema(connection, usuarios())
+        for email in rows:
+            connection.execute(text("INSERT INTO usuarios (email) VALUES (:email)"), {'email': email})
+    return engine
+
+
+def unique_columns(engine):
+    inspector = inspect(engine)
+    uniques = [index['column_names'] for index in inspector.get_indexes('usuarios') if index['unique']]
+    return uniques + [constraint['column_names'] for constraint in inspector.get_unique_constraints('usuarios')]
+
+
+def test_unchanged_schema_plans_nothing(tmp_path):
+    engine = database(tmp_path)
+    with engine.begin() as connection:
+        assert plan_schema(connection, usuarios()) == []
+        assert sync_schema(connection, usuarios()) is False
+
+
+def test_unique_on_existing_column_creates_the_index(tmp_path):
+    engine = database(tmp_path)
+    metadata = usuarios(unique_email=True)
+    with engine.begin() as connection:
+        assert sync_schema(connection, metadata) is True
+        assert read_fingerprint(connection) == schema_fingerprint(metadata, connection.dialect)
+    assert unique_columns(engine) == [['email']]
+
+    # Ya aplicada, no se vuelve a planificar
+    with engine.begin() as connection:
+        assert plan_schema(connection, metadata) == []
+
+
+def test_unique_with_duplicates_keeps_the_old_fingerprint(tmp_path, caplog):
+    engine = database(tmp_path, rows=('a@x', 'a@x', None, None))
+    with engine.begin() as connection:
+        previous = read_fingerprint(connection)
+        with caplog.at_level(logging.WARNING):
+            sync_schema(connection, usuarios(unique_email=True))
+        assert read_fingerprint(connection) == previous
+    assert unique_columns(engine) == []
+    assert 'filas repetidas' in caplog.text
+
+    # Al corregir los datos se crea en el siguiente inicio
+    with engine.begin() as connection:
+        connection.execute(text("UPDATE usuarios SET email = 'b@x' WHERE id = 2"))
+        sync_schema(connection, usuarios(unique_email=True))
+        assert read_fingerprint(connection) != previous
+    assert unique_columns(engine) == [['email']]
+
+
+def test_type_mismatch_is_logged(tmp_path, caplog):
+    engine = database(tmp_path)
+    with engine.begin() as connection, caplog.at_level(logging.WARNING):
+        assert plan_schema(connection, usuarios(email_type=Integer())) == []
+    assert 'usuarios.email es VARCHAR(100) en la base y INTEGER en el YAML' in caplog.text
+
+    caplog.clear()
+    with engine.begin() as connection, caplog.at_level(logging.WARNING):
+        plan_schema(connection, usuarios(email_type=String(255)))
+    assert 'VARCHAR(100) en la base y VARCHAR(255)' in caplog.text
+
+    caplog.clear()
+    with engine.begin() as connection, caplog.at_level(logging.WARNING):
+        plan_schema(connection, usuarios())
+    assert 'en la base' not in caplog.text
+
+
+def test_new_columns_get_their_unique_index(tmp_path):
+    engine = database(tmp_path, rows=())
+    metadata = usuarios()
+    Table('usuarios', metadata, Column('alias', String(50), unique=True), extend_existing=True)
+    with engine.begin() as connection:
+        sync_schema(connection, metadata)
+    assert unique_columns(engine) == [['alias']]
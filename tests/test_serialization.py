@@ -0,0 +1,147 @@
+"""Las respuestas serializadas con TypeAdapter coinciden con la serialización previa de FastAPI"""
+
+from typing import List
+
+import asyncio
+
+import httpx
+from fastapi import FastAPI
+from fastapi.encoders import jsonable_encoder
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+from pydantic import TypeAdapter
+from sqlalchemy import select
+
+from conftest import best_time, login, run
+
+TAREAS = [
+    {'titulo': 'Revisión de índices', 'prioridad': 1, 'usuario_id': 2},
+    {'titulo': 'Migración "ñandú" ✓', 'prioridad': 2, 'usuario_id': 2},
+    {'titulo': 'Tercera', 'prioridad': 3, 'usuario_id': 3},
+]
+
+
+async def fastapi_reference(backend, path: str):
+    """
+    Respuesta que producía FastAPI al devolver instancias ORM desde un endpoint
+    con `response_model` (la serialización anterior a los TypeAdapter).
+    """
+    model_class = backend.generated_models['Tarea']
+    response_model = backend.pydantic_models['Tarea']['response']
+    reference = FastAPI()
+
+    @reference.get('/', response_model=List[response_model])
+    async def listing():
+        async with backend.db_manager.get_session() as session:
+            result = await session.execute(select(model_class).order_by(model_class.id))
+            return result.scalars().all()
+
+    @reference.get('/{entity_id}', response_model=response_model)
+    async def detail(entity_id: int):
+        async with backend.db_manager.get_session() as session:
+            return await session.get(model_class, entity_id)
+
+    transport = httpx.ASGITransport(app=reference)
+    async with httpx.AsyncClient(transport=transport, base_url='http://referencia') as client:
+        return await client.get(path)
+
+
+def test_full_rows_match_fastapi_serialization(backend_client):
+    async def scenario():
+        async with backend_client() as (client, backend):
+            headers = await login(client, 'admin', 'admin123')
+            response = await client.post('/api/tarea/bulk', json=TAREAS, headers=headers)
+            assert response.status_code == 200, response.text
+
+            response = await client.get('/api/tarea/?limit=10', headers=headers)
+            assert response.status_code == 200
+            expected = await fastapi_reference(backend, '/')
+            assert response.json() == expected.json()
+            assert response.content == expected.content
+
+            for entity_id in (1, 2, 3):
+                response = await client.get(f'/api/tarea/{entity_id}', headers=headers)
+                expected = await fastapi_reference(backend, f'/{entity_id}')
+                assert response.status_code == 200
+                assert response.content == expected.content
+
+    run(scenario())
+
+
+def test_write_responses_match_fastapi_serialization(backend_client):
+    async def scenario():
+        async with backend_client() as (client, backend):
+            headers = await login(client, 'admin', 'admin123')
+
+            response = await client.post('/api/tarea/', json=TAREAS[1], headers=headers)
+            assert response.status_code == 200, response.text
+            assert response.content == (await fastapi_reference(backend, '/1')).content
+
+            body = {**TAREAS[0], 'prioridad': 7}
+            response = await client.put('/api/tarea/1', json=body, headers=headers)
+            assert response.status_code == 200, response.text
+            assert response.content == (await fastapi_reference(backend, '/1')).content
+
+    run(scenario())
+
+
+def test_type_adapter_is_faster_than_fastapi_serialization(backend_client):
+    """
+    Serialización de 1000 filas: `serialize_response` de FastAPI sobre
+    instancias ORM (lo que hacía el `response_model`) contra el TypeAdapter
+    precompilado sobre las filas leídas. Referencia local: ~3.2 ms contra ~1.8 ms.
+    """
+    async def models():
+        async with backend_client() as (client, backend):
+            return backend.generated_models['Tarea'], backend.pydantic_models['Tarea']['response']
+
+    model_class, response_model = run(models())
+    fields = list(response_model.model_fields)
+    entities = [model_class(id=i, titulo=f"tarea {i}", prioridad=i % 5, usuario_id=2) for i in range(1000)]
+    rows = [{name: getattr(entity, name) for name in fields} for entity in entities]
+
+    field = create_model_field(name='respuesta', type_=List[response_model], mode='serialization')
+    adapter = TypeAdapter(List[response_model])
+    loop = asyncio.new_event_loop()
+    try:
+        def fastapi_path():
+            return loop.run_until_complete(serialize_response(field=field, response_content=entities, dump_json=True))
+
+        def adapter_path():
+            return adapter.dump_json(adapter.validate_python(rows))
+
+        assert fastapi_path() == adapter_path()
+        fastapi_time = best_time(fastapi_path)
+        adapter_time = best_time(adapter_path)
+    finally:
+        loop.close()
+    print(f"FastAPI: {fastapi_time * 1000:.2f} ms, TypeAdapter: {adapter_time * 1000:.2f} ms")
+    assert adapter_time < fastapi_time
+
+
+def test_projected_rows_match_jsonable_encoder(backend_client):
+    async def scenario():
+        async with backend_client() as (client, backend):
+            headers = await login(client, 'admin', 'admin123')
+            await client.post('/api/tarea/bulk', json=TAREAS, headers=headers)
+
+            response = await client.get('/api/tarea/?fields=titulo,usuario_id', headers=headers)
+            assert response.status_code == 200
+            full = (await fastapi_reference(backend, '/')).json()
+            projected = [{'titulo': row['titulo'], 'usuario_id': row['usuario_id']} for row in full]
+            assert response.json() == jsonable_encoder(projected)
+
+    run(scenario())
+
+
+def test_invalid_body_keeps_fastapi_error_format(backend_client):
+    async def scenario():
+        async with backend_client() as (client, backend):
+            headers = await login(client, 'admin', 'admin123')
+            response = await client.post('/api/tarea/', json={'prioridad': 'alta'}, headers=headers)
+            assert response.status_code == 422
+            locations = {tuple(error['loc']) for error in response.json()['detail']}
+            assert ('body', 'titulo') in locations
+            assert ('body', 'prioridad') in locations
+
+    run(scenario())
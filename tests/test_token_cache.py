@@ -0,0 +1,98 @@
+"""Caché de tokens JWT verificados del AuthManager"""
+
+import time
+from datetime import timedelta
+
+from yaml_to_backend.security.auth import AuthManager
+
+from conftest import best_time
+
+
+def counting_manager(**kwargs) -> AuthManager:
+    """AuthManager que cuenta las decodificaciones reales del JWT"""
+    manager = AuthManager(secret_key='secreto-de-prueba', **kwargs)
+    manager.decodes = 0
+    decode = manager._decode_token
+
+    def counted(token):
+        manager.decodes += 1
+        return decode(token)
+
+    manager._decode_token = counted
+    return manager
+
+
+def test_verified_token_is_decoded_once():
+    manager = counting_manager(token_cache_size=10)
+    token = manager.create_access_token({'sub': 'ana'})
+
+    first = manager.verify_token(token)
+    for _ in range(5):
+        assert manager.verify_token(token) == first
+    assert first['sub'] == 'ana'
+    assert manager.decodes == 1
+    assert manager.token_cache.stats()['hits'] == 5
+
+
+def test_cached_token_expires_with_its_exp():
+    manager = counting_manager(token_cache_size=10)
+    token = manager.create_access_token({'sub': 'ana'}, expires_delta=timedelta(seconds=1))
+
+    assert manager.verify_token(token) is not None
+    assert manager.verify_token(token) is not None
+    assert manager.decodes == 1
+
+    # python-jose compara `exp` con segundos enteros
+    time.sleep(2.1)
+    assert manager.verify_token(token) is None
+    assert manager.decodes == 2
+    assert len(manager.token_cache) == 0
+
+
+def test_invalid_tokens_are_not_cached():
+    manager = counting_manager(token_cache_size=10)
+    other = AuthManager(secret_key='otro-secreto')
+    token = other.create_access_token({'sub': 'ana'})
+
+    assert manager.verify_token(token) is None
+    assert manager.verify_token(token) is None
+    assert manager.decodes == 2
+    assert len(manager.token_cache) == 0
+
+
+def test_cache_is_bounded_and_can_be_disabled():
+    manager = counting_manager(token_cache_size=2)
+    tokens = [manager.create_access_token({'sub': f'usuario{i}'}) for i in range(3)]
+    for token in tokens:
+        manager.verify_token(token)
+    assert len(manager.token_cache) == 2
+    assert manager.token_cache.stats()['evictions'] == 1
+
+    disabled = counting_manager(token_cache_size=0)
+    token = disabled.create_access_token({'sub': 'ana'})
+    disabled.verify_token(token)
+    disabled.verify_token(token)
+    assert disabled.token_cache is None
+    assert disabled.decodes == 2
+
+
+def test_cached_verification_is_faster_than_decoding():
+    """
+    1000 verificaciones de 10 tokens vigentes con la caché y sin ella
+    (`TOKEN_CACHE_SIZE=0`, que decodifica y valida la firma en cada petición).
+    Referencia local: ~1.7 ms contra ~60 ms.
+    """
+    cached = AuthManager(secret_key='secreto-de-prueba', token_cache_size=100)
+    uncached = AuthManager(secret_key='secreto-de-prueba', token_cache_size=0)
+    tokens = [cached.create_access_token({'sub': f"usuario{i}"}) for i in range(10)] * 100
+
+    def verify_all(manager):
+        for token in tokens:
+            assert manager.verify_token(token) is not None
+
+    assert [cached.verify_token(token) for token in tokens[:10]] == [uncached.verify_token(token) for token in tokens[:10]]
+    cached_time = best_time(lambda: verify_all(cached), repeat=10)
+    uncached_time = best_time(lambda: verify_all(uncached), repeat=10)
+    print(f"Con caché: {cached_time * 1000:.2f} ms, sin caché: {uncached_time * 1000:.2f} ms")
+    assert cached.token_cache.stats()['misses'] == 10
+    assert cached_time * 5 < uncached_time
@@ -3,7 +3,7 @@ from fastapi.security import OAuth2PasswordRequestForm, HTTPBearer, HTTPAuthoriz
 from pydantic import BaseModel
 from typing import Optional, Any
 import logging
-from ..security.auth import AuthManager
+from ..security.auth import AuthManager, get_auth_manager, revoke_token, revoke_user
 # Los modelos se generan dinámicamente, no se importan directamente
 # from ..db.models import Usuario
 
@@ -12,7 +12,6 @@ Usuario = Any
 from ..db.connection import get_db_session, get_db_manager
 from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime, timedelta
-from ..config import JWT_SECRET_KEY, JWT_ALGORITHM, JWT_ACCESS_TOKEN_EXPIRE_MINUTES, AUTH
 
 logger = logging.getLogger(__name__)
 
@@ -32,17 +31,18 @@ class LoginRequest(BaseModel):
     password: str
 
 @router.post("/login", response_model=Token)
-async def login(login_data: LoginRequest, session: AsyncSession = Depends(get_db_session)):
+async def login(
+    login_data: LoginRequest,
+    session: AsyncSession = Depends(get_db_session),
+    auth_manager: AuthManager = Depends(get_auth_manager)
+):
     """Endpoint de login que devuelve un token JWT"""
-    auth_manager = AuthManager(
-        secret_key=JWT_SECRET_KEY,
-        algorithm=JWT_ALGORITHM,
-        access_token_expire_minutes=JWT_ACCESS_TOKEN_EXPIRE_MINUTES
-    )
+    from ..config import AUTH
     
     try:
         # El campo username del OAuth2 se mapea a la columna configurada
-        user = await auth_manager.authenticate_user(login_data.username, login_data.password, session)
+        async with auth_manager.login_slot():
+            user = await auth_manager.authenticate_user(login_data.username, login_data.password, session)
         
         if not user:
             raise HTTPException(
@@ -55,10 +55,16 @@ async def login(login_data: LoginRequest, session: AsyncSession = Depends(get_db
         user_column = AUTH['columna_usuario']
         user_value = getattr(user, user_column)
             
+        # En modo sin estado el token lleva los claims que necesitan los permisos
+        from ..config import AUTH_STATELESS
+        claims = {"sub": user_value}
+        if AUTH_STATELESS:
+            claims.update({"id": user.id, "rol": user.rol})
+        
         # Crear token de acceso
         access_token_expires = timedelta(minutes=auth_manager.access_token_expire_minutes)
         access_token = auth_manager.create_access_token(
-            data={"sub": user_value}, expires_delta=access_token_expires
+            data=claims, expires_delta=access_token_expires
         )
         
         logger.info(f"Login exitoso para usuario: {user_value}")
@@ -85,15 +91,25 @@ async def login(login_data: LoginRequest, session: AsyncSession = Depends(get_db
 
 async def get_current_user_with_session(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    session: AsyncSession = Depends(get_db_session)
+    session: AsyncSession = Depends(get_db_session),
+    auth_manager: AuthManager = Depends(get_auth_manager)
 ):
     """Dependencia para obtener usuario actual con sesión de base de datos"""
-    auth_manager = AuthManager(JWT_SECRET_KEY, JWT_ALGORITHM, JWT_ACCESS_TOKEN_EXPIRE_MINUTES)
     return await auth_manager.get_current_user(credentials, session)
 
+async def get_read_db_session(current_user: Usuario = Depends(get_current_user_with_session)):
+    """
+    Dependencia de sesión para los endpoints de lectura: usa una réplica si
+    están configuradas, o la primaria si el usuario escribió recientemente.
+    """
+    async with get_db_manager().read_session(getattr(current_user, 'id', None)) as session:
+        yield session
+
 @router.get("/me")
 async def get_current_user_info(current_user: Usuario = Depends(get_current_user_with_session)):
     """Obtiene información del usuario actual"""
+    from ..config import AUTH
+    
     # Obtener la columna de usuario desde la configuración
     user_column = AUTH['columna_usuario']
     user_value = getattr(current_user, user_column)
@@ -102,4 +118,33 @@ async def get_current_user_info(current_user: Usuario = Depends(get_current_user
         "id": current_user.id,
         "username": user_value,  # Mantener 'username' en la respuesta para compatibilidad
         "rol": current_user.rol
-    } 
\ No newline at end of file
+    } 
+
+@router.post("/logout")
+async def logout(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    current_user: Usuario = Depends(get_current_user_with_session),
+    auth_manager: AuthManager = Depends(get_auth_manager)
+):
+    """Revoca el token actual hasta que expire"""
+    payload = auth_manager.verify_token(credentials.credentials)
+    await revoke_token(payload)
+    
+    return {"message": "Sesión cerrada correctamente"}
+
+@router.post("/revocar/{user_id}")
+async def revoke_user_tokens(user_id: int, current_user: Usuario = Depends(get_current_user_with_session)):
+    """Revoca todos los tokens emitidos hasta ahora para un usuario (solo superusuario)"""
+    from ..config import AUTH
+    
+    user_column = AUTH['columna_usuario']
+    if getattr(current_user, user_column, None) != AUTH['superusuario']:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Solo el superusuario puede revocar tokens"
+        )
+    
+    await revoke_user(user_id)
+    logger.info(f"Tokens revocados para el usuario con ID: {user_id}")
+    
+    return {"message": "Tokens revocados correctamente"}
@@ -0,0 +1,73 @@
+"""Validadores HTTP (ETag y Last-Modified) para las peticiones condicionales"""
+
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+from .query_params import get_value
+
+# Columnas que determinan la versión de una fila, en orden de preferencia
+VERSION_COLUMNS = ('fecha_actualizacion', 'fecha_creacion')
+
+
+def row_version(row: Any) -> Optional[datetime]:
+    """Última modificación de una fila: su fecha de actualización o, si no tiene, la de creación"""
+    for column in VERSION_COLUMNS:
+        value = get_value(row, column)
+        if value is not None:
+            return value
+    return None
+
+
+def compute_validators(rows: Sequence[Any]) -> Tuple[str, Optional[datetime]]:
+    """
+    Calcula el ETag débil y la fecha de última modificación de un conjunto de filas.
+
+    El ETag depende de los IDs y versiones de las filas, por lo que cambia tanto
+    al modificar una fila como al agregar o quitar filas del resultado.
+    """
+    digest = hashlib.sha1()
+    last_modified = None
+    for row in rows:
+        version = row_version(row)
+        digest.update(f"{get_value(row, 'id')}@{version.isoformat() if version else ''};".encode('utf-8'))
+        if version is not None and (last_modified is None or version > last_modified):
+            last_modified = version
+    return f'W/"{digest.hexdigest()[:24]}"', last_modified
+
+
+def validator_headers(etag: str, last_modified: Optional[datetime]) -> Dict[str, str]:
+    """Cabeceras ETag y Last-Modified de una respuesta"""
+    headers = {'ETag': etag}
+    if last_modified is not None:
+        headers['Last-Modified'] = format_datetime(last_modified.replace(tzinfo=timezone.utc), usegmt=True)
+    return headers
+
+
+def is_not_modified(headers, etag: str, last_modified: Optional[datetime], allow_since: bool = True) -> bool:
+    """
+    Indica si la copia del cliente sigue vigente según If-None-Match o If-Modified-Since.
+
+    If-None-Match tiene prioridad y se compara de forma débil. If-Modified-Since
+    solo se usa si `allow_since` es verdadero, ya que la fecha no detecta filas
+    eliminadas de un listado.
+    """
+    if_none_match = headers.get('if-none-match')
+    if if_none_match is not None:
+        if if_none_match.strip() == '*':
+            return True
+        current = etag.removeprefix('W/')
+        return any(tag.strip().removeprefix('W/') == current for tag in if_none_match.split(','))
+
+    if_modified_since = headers.get('if-modified-since')
+    if allow_since and if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        # Last-Modified se envía con precisión de segundos
+        return last_modified.replace(microsecond=0, tzinfo=timezone.utc) <= since
+    return False
@@ -1,38 +1,58 @@
-from fastapi import APIRouter, HTTPException, status, Depends, Query
-from typing import Dict, Any, List, Optional, Type
+from fastapi import APIRouter, HTTPException, status, Depends, Query, Request, Response
+from fastapi.exceptions import RequestValidationError
+from typing import Dict, Any, List, Optional, Tuple, Type
+import itertools
 import logging
+from contextlib import asynccontextmanager
 from datetime import datetime
-from ..security.auth import AuthManager
+from ..security.auth import AuthManager, invalidate_principals
+from ..core.cache import get_cache_backend
+from ..core.model_generator import ENDPOINT_DESCRIPTIONS
 # Los modelos se generan dinámicamente, no se importan directamente
 # from ..db.models import Usuario
 
 # Tipo para el usuario (se generará dinámicamente)
 Usuario = Any
-from ..db.connection import get_db_session
-from .auth_routes import get_current_user_with_session
-from sqlalchemy import select
+from ..db.connection import get_db_session, get_db_manager
+from ..db.upsert import UPSERT_DIALECTS, build_upsert
+from .auth_routes import get_current_user_with_session, get_read_db_session
+from .query_params import (
+    get_cursor_field, get_field_type, decode_cursor, apply_cursor, next_cursor,
+    parse_filters, apply_filters, parse_sort, apply_sort, parse_fields, get_value,
+    FILTER_OPERATORS
+)
+from .export import EXPORT_FORMATS, ExportResponse, stream_export
+from .conditional import VERSION_COLUMNS, compute_validators, validator_headers, is_not_modified
+from .runtime import EntityRuntime
+from sqlalchemy import select, insert, update, delete, func
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlmodel import SQLModel
+from pydantic import BaseModel, TypeAdapter, ValidationError, create_model as create_pydantic_model
+from pydantic_core import to_json
 import inflection
 
 logger = logging.getLogger(__name__)
 
+class BulkDeleteRequest(BaseModel):
+    """Cuerpo de la eliminación en lote"""
+    ids: Optional[List[int]] = None
+
 class CRUDGenerator:
     """Generador de endpoints CRUD para entidades"""
     
     def __init__(self, auth_manager: AuthManager):
         self.auth_manager = auth_manager
         self.routers = {}
+        # Entidades con caché de lectura por ID (`cache` en el YAML)
+        self.cached_entities = set()
+        # Entidades sobre la tabla de usuarios (sus escrituras descartan los usuarios autenticados en caché)
+        self.principal_entities = set()
+        # Entidades registradas por tabla, para expandir claves foráneas
+        self.entities_by_table: Dict[str, Dict[str, Any]] = {}
         
         # Plantillas de descripción para endpoints
-        self.endpoint_descriptions = {
-            "list": "Lista todos los {entity_plural} del sistema con paginación",
-            "create": "Crea un nuevo {entity_singular}",
-            "read": "Obtiene un {entity_singular} específico por ID",
-            "update": "Actualiza un {entity_singular} existente",
-            "delete": "Elimina un {entity_singular} (soft delete)",
-            "yo": "Obtiene {entity_plural} del usuario autenticado"
-        }
+        self.endpoint_descriptions = ENDPOINT_DESCRIPTIONS
     
     def get_endpoint_description(self, entity_name: str, operation: str, entity_data: Dict[str, Any]) -> str:
         """Genera descripción de endpoint basada en YAML y plantillas"""
@@ -51,6 +71,412 @@ class CRUDGenerator:
         )
         
         return description
+    
+    def _without_fields(self, model: Type[BaseModel], excluded: set) -> Type[BaseModel]:
+        """Copia del modelo de respuesta sin los campos excluidos"""
+        return create_pydantic_model(
+            model.__name__,
+            __config__=model.model_config,
+            __doc__=model.__doc__,
+            **{name: (info.annotation, info) for name, info in model.model_fields.items() if name not in excluded}
+        )
+    
+    def _parse_projection(self, fields: Optional[str], response_fields: List[str]) -> Optional[List[str]]:
+        """Interpreta el parámetro `fields` o lanza un error 400"""
+        try:
+            return parse_fields(fields, response_fields)
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
+    
+    def _parse_expand(self, expand: Optional[str], fk_fields: Dict[str, tuple]) -> List[str]:
+        """Interpreta el parámetro `expand` o lanza un error 400"""
+        if not expand:
+            return []
+        
+        requested = list(dict.fromkeys(item.strip() for item in expand.split(',') if item.strip()))
+        for field_name in requested:
+            if field_name not in fk_fields:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"El campo '{field_name}' no es una clave foránea expandible"
+                )
+            related_table, _ = fk_fields[field_name]
+            if related_table not in self.entities_by_table:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"La tabla '{related_table}' no tiene una entidad generada"
+                )
+        return requested
+    
+    async def _expand_relations(self, session: AsyncSession, current_user: Any, items: List[Dict[str, Any]],
+                                expand_fields: List[str], fk_fields: Dict[str, tuple]):
+        """
+        Reemplaza los IDs de las claves foráneas por la entidad relacionada.
+
+        Cada relación se resuelve con una única consulta `WHERE columna IN (...)`
+        respetando los permisos y el borrado lógico de la entidad relacionada.
+        """
+        for field_name in expand_fields:
+            related_table, related_column = fk_fields[field_name]
+            related = self.entities_by_table[related_table]
+            related_runtime = related['runtime']
+            
+            if not related_runtime.policy.allows(current_user, 'r'):
+                raise HTTPException(
+                    status_code=status.HTTP_403_FORBIDDEN,
+                    detail=f"No tienes permisos para leer {related['entity_name']}"
+                )
+            
+            ids = {item[field_name] for item in items if item[field_name] is not None}
+            related_rows = {}
+            if ids:
+                key_column = getattr(related_runtime.model_class, related_column)
+                columns = [related_column, *related['expand_fields']]
+                query = related_runtime.select_columns(columns).where(key_column.in_(ids))
+                
+                related_filter = related_runtime.user_filter(current_user)
+                if related_filter:
+                    query = query.where(related_runtime.owner_condition(related_filter))
+                
+                result = await session.execute(query)
+                for row in result.mappings():
+                    related_rows[row[related_column]] = {name: row[name] for name in related['expand_fields']}
+            
+            # Las filas eliminadas o no visibles para el usuario se expanden como null
+            for item in items:
+                item[field_name] = related_rows.get(item[field_name])
+    
+    def _render(self, content: Any, response: Response, adapter: Optional[TypeAdapter] = None) -> Response:
+        """
+        Serializa la respuesta directamente a bytes JSON conservando las cabeceras
+        ya asignadas. Con `adapter` las filas se validan contra el modelo de
+        respuesta; sin él (proyecciones y expansiones) se serializan tal cual.
+        """
+        if adapter is not None:
+            body = adapter.dump_json(adapter.validate_python(content))
+        else:
+            body = to_json(content)
+        return Response(content=body, media_type="application/json", headers=dict(response.headers))
+    
+    async def _parse_body(self, request: Request, adapter: TypeAdapter) -> Any:
+        """Valida el cuerpo JSON directamente desde los bytes recibidos"""
+        body = await request.body()
+        try:
+            return adapter.validate_json(body)
+        except ValidationError as e:
+            raise RequestValidationError(
+                [{**error, 'loc': ('body', *error['loc'])} for error in e.errors(include_url=False)],
+                body=body
+            )
+    
+    def _body_schema(self, adapter: TypeAdapter) -> Dict[str, Any]:
+        """Documenta en OpenAPI el cuerpo de los endpoints que lo leen sin FastAPI"""
+        return {
+            "requestBody": {
+                "required": True,
+                "content": {"application/json": {"schema": adapter.json_schema()}}
+            }
+        }
+    
+    async def _count_total(self, session: AsyncSession, entity_name: str, model_class: Type[SQLModel],
+                           query, request: Request, user_filter: Optional[Dict[str, Any]], mode: str) -> int:
+        """
+        Obtiene el total de filas de un listado usando la caché por
+        (entidad, filtros, dueño). En modo 'approx' y sin filtros usa las
+        estadísticas de la tabla en lugar de un COUNT(*).
+        """
+        filter_key = tuple(sorted((k, v) for k, v in request.query_params.multi_items() if '__' in k))
+        owner_key = tuple(sorted(user_filter.items())) if user_filter else ()
+        approximate = mode == 'approx' and not filter_key and not owner_key
+        cache_key = ('approx' if approximate else 'exact', filter_key, owner_key)
+        
+        cache = get_cache_backend()
+        total = await cache.get(f"totales:{entity_name}", cache_key)
+        if total is not None:
+            return total
+        
+        # El total en caché se calcula en la primaria: una réplica atrasada
+        # dejaría un total viejo en la caché compartida durante todo el TTL
+        async with self._primary_session(session) as primary_session:
+            if approximate:
+                total = await get_db_manager().estimate_row_count(primary_session, model_class.__tablename__)
+            
+            if total is None:
+                count_query = query.with_only_columns(func.count(), maintain_column_froms=True).order_by(None)
+                result = await primary_session.execute(count_query)
+                total = result.scalar_one()
+        
+        await cache.set(f"totales:{entity_name}", cache_key, total)
+        return total
+    
+    @asynccontextmanager
+    async def _primary_session(self, session: AsyncSession):
+        """Sesión de la primaria para llenar las cachés compartidas (la de la petición si ya lo es)"""
+        if not get_db_manager().is_replica_session(session):
+            yield session
+            return
+        async with get_db_manager().get_session() as primary_session:
+            yield primary_session
+    
+    async def _invalidate_counts(self, entity_name: str):
+        """Descarta los totales en caché de una entidad tras una escritura"""
+        await get_cache_backend().clear(f"totales:{entity_name}")
+    
+    async def _invalidate_entity(self, entity_name: str, entity_id: Optional[int] = None):
+        """Descarta una entidad (o todas si no se indica ID) de la caché de lectura"""
+        if entity_name in self.principal_entities:
+            await invalidate_principals(entity_id)
+        if entity_name not in self.cached_entities:
+            return
+        cache = get_cache_backend()
+        if entity_id is None:
+            await cache.clear(f"entidad:{entity_name}")
+        else:
+            await cache.delete(f"entidad:{entity_name}", entity_id)
+    
+    async def _invalidate_entities(self, entity_name: str, rowcount: int, entity_ids: List[int]):
+        """
+        Descarta de las cachés las entidades de una escritura masiva. Si no se
+        afectaron filas no se descarta nada; en la tabla de usuarios solo se
+        invalidan (y, sin estado, se revocan) los usuarios afectados.
+        """
+        if not rowcount:
+            return
+        if entity_name in self.principal_entities:
+            await invalidate_principals(*entity_ids)
+        if entity_name in self.cached_entities:
+            await get_cache_backend().clear(f"entidad:{entity_name}")
+    
+    async def _execute_bulk_write(self, session: AsyncSession, entity_name: str, model_class: Type[SQLModel],
+                                  statement, conditions: list, operation: str) -> Tuple[int, List[int]]:
+        """
+        Ejecuta un UPDATE o DELETE masivo y retorna las filas afectadas y sus IDs.
+
+        Los IDs solo se obtienen en la tabla de usuarios, para invalidar y revocar
+        únicamente a los usuarios afectados: con RETURNING si el dialecto lo
+        soporta o, si no, consultándolos antes en la misma transacción y
+        limitando la escritura a esas filas.
+        """
+        if entity_name not in self.principal_entities:
+            result = await session.execute(statement)
+            return result.rowcount, []
+        
+        if self._supports_returning(session, operation):
+            result = await session.execute(statement.returning(model_class.id))
+            entity_ids = list(result.scalars())
+            return len(entity_ids), entity_ids
+        
+        result = await session.execute(select(model_class.id).where(*conditions))
+        entity_ids = list(result.scalars())
+        if not entity_ids:
+            return 0, []
+        result = await session.execute(statement.where(model_class.id.in_(entity_ids)))
+        return result.rowcount, entity_ids
+    
+    async def _probe_page(self, session: AsyncSession, request: Request, model_class: Type[SQLModel],
+                          query, version_columns: List[str]) -> Optional[Response]:
+        """
+        Responde 304 si la página no cambió respecto al ETag del cliente.
+
+        Solo se consultan el ID y las columnas de versión de la página, sin leer
+        ni serializar el resto de los campos.
+        """
+        if not version_columns or request.headers.get('if-none-match') is None:
+            return None
+        
+        probe = query.with_only_columns(*[getattr(model_class, name) for name in version_columns])
+        result = await session.execute(probe)
+        etag, last_modified = compute_validators(result.mappings().all())
+        if is_not_modified(request.headers, etag, last_modified, allow_since=False):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=validator_headers(etag, last_modified))
+        return None
+    
+    def _supports_returning(self, session: AsyncSession, operation: str) -> bool:
+        """Indica si el dialecto de la sesión soporta RETURNING para la operación"""
+        return getattr(session.bind.dialect, f"{operation}_returning", False)
+    
+    async def _raise_write_failure(self, session: AsyncSession, runtime: EntityRuntime,
+                                   entity_id: int, action: str):
+        """Distingue 404 de 403 cuando una escritura condicionada no afectó filas"""
+        # Consulta de verificación, solo en el camino de error
+        result = await session.execute(runtime.select_exists, {'entity_id': entity_id})
+        if result.scalar_one_or_none() is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"{runtime.entity_name} no encontrada"
+            )
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail=f"No tienes permisos para {action} esta entidad"
+        )
+    
+    def _bulk_insert_statements(self, session: AsyncSession, model_class: Type[SQLModel], rows: List[Dict[str, Any]],
+                                provided: List[frozenset], upsert: Optional[str],
+                                update_values: Optional[Dict[str, Any]]) -> List[Any]:
+        """
+        INSERT multi-fila de un bloque. Con `upsert`, las filas consecutivas se
+        agrupan según los campos recibidos y cada grupo actualiza solo esos
+        campos en las filas existentes (los omitidos conservan su valor).
+        """
+        if not upsert:
+            return [insert(model_class).values(rows)]
+        statements = []
+        for keys, group in itertools.groupby(zip(rows, provided), key=lambda pair: pair[1]):
+            group_rows = [row for row, _ in group]
+            statements.append(build_upsert(
+                session.bind.dialect.name, model_class.__table__, group_rows, upsert, update_values, sorted(keys)
+            ))
+        return statements
+    
+    async def _find_failing_item(self, session: AsyncSession, chunk_statements, start: int,
+                                 end: int) -> Tuple[Optional[int], Optional[IntegrityError]]:
+        """
+        Reproduce el lote hasta el bloque fallido y luego ese bloque elemento por
+        elemento, en una transacción que se revierte, para encontrar el primer
+        elemento que viola la integridad. Retorna (índice, error) o (None, None).
+        """
+        try:
+            for statement in chunk_statements(0, start):
+                await session.execute(statement)
+            for index in range(start, end):
+                try:
+                    for statement in chunk_statements(index, index + 1):
+                        await session.execute(statement)
+                except IntegrityError as e:
+                    return index, e
+        except IntegrityError:
+            # Los bloques anteriores fallan ahora (escritura concurrente): solo se informa el rango
+            pass
+        finally:
+            await session.rollback()
+        return None, None
+    
+    def _enforce_owner(self, values: Dict[str, Any], user_filter: Optional[Dict[str, Any]],
+                       creating: bool = False):
+        """
+        Impide que un usuario con permisos 'yo' escriba filas a nombre de otro.
+
+        Al crear, la columna de dueño se completa con el ID del usuario si no se
+        indicó. Si la columna de dueño es la clave primaria (la propia fila del
+        usuario), no se pueden crear filas nuevas.
+        """
+        if not user_filter:
+            return
+        (owner_column, owner_id), = user_filter.items()
+        if creating and owner_column == 'id':
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="No tienes permisos para crear esta entidad"
+            )
+        if creating and values.get(owner_column) is None:
+            values[owner_column] = owner_id
+        elif owner_column in values and values[owner_column] != owner_id:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="No puedes asignar la entidad a otro usuario"
+            )
+    
+    def _check_upsert(self, session: AsyncSession, upsert: str, upsert_fields: List[str],
+                      user_filter: Optional[Dict[str, Any]]):
+        """Valida el campo de `upsert` y que el dialecto y los permisos lo admitan"""
+        if upsert not in upsert_fields:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"El campo '{upsert}' no es un campo único que admita upsert"
+            )
+        if session.bind.dialect.name not in UPSERT_DIALECTS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"La base de datos {session.bind.dialect.name} no soporta upsert"
+            )
+        # Un upsert podría actualizar filas de otro usuario
+        if user_filter:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="El upsert no está disponible con permisos 'yo'"
+            )
+    
+    def _bulk_conditions(self, runtime: EntityRuntime, entity_data: Dict[str, Any],
+                         request: Request, ids: Optional[List[int]],
+                         user_filter: Optional[Dict[str, Any]]) -> list:
+        """Construye las condiciones SQL de una operación masiva (IDs, filtros, dueño y borrado)"""
+        try:
+            filters = parse_filters(request.query_params, entity_data)
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
+        
+        if ids is None and not filters:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Debe indicar una lista de IDs o al menos un filtro"
+            )
+        
+        model_class = runtime.model_class
+        conditions = []
+        if ids is not None:
+            conditions.append(runtime.pk_column.in_(ids))
+        for field_name, operator, value in filters:
+            conditions.append(FILTER_OPERATORS[operator](getattr(model_class, field_name), value))
+        
+        # El predicado de dueño y el de borrado lógico se evalúan en SQL
+        if user_filter:
+            conditions.append(runtime.owner_condition(user_filter))
+        if runtime.not_deleted is not None:
+            conditions.append(runtime.not_deleted)
+        
+        return conditions
+    
+    def _apply_query_language(self, query, model_class: Type[SQLModel], entity_data: Dict[str, Any],
+                              request: Request, sort: Optional[str], after: Optional[str]):
+        """Aplica los filtros `campo__operador` y el ordenamiento de la consulta"""
+        try:
+            filters = parse_filters(request.query_params, entity_data)
+            sort_fields = parse_sort(sort, entity_data)
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
+        
+        if sort_fields and after is not None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="No se puede combinar 'sort' con la paginación por cursor"
+            )
+        
+        query = apply_filters(query, model_class, filters)
+        return apply_sort(query, model_class, sort_fields)
+    
+    def _paginate(self, query, model_class: Type[SQLModel], cursor_field: str, cursor_type: str,
+                  skip: int, limit: int, after: Optional[str]):
+        """Aplica paginación por offset o, si se recibe `after`, por cursor"""
+        if after is None:
+            return query.offset(skip).limit(limit)
+        
+        if skip:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="No se puede combinar 'skip' con la paginación por cursor"
+            )
+        
+        # Un cursor vacío solicita la primera página
+        cursor = None
+        if after:
+            try:
+                cursor = decode_cursor(after, cursor_type)
+            except ValueError:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Cursor de paginación inválido"
+                )
+        
+        return apply_cursor(query, model_class, cursor_field, cursor).limit(limit)
         
     def generate_crud_router(self, entity_name: str, model_class: Type[SQLModel], 
                            pydantic_models: Dict[str, Any], entity_data: Dict[str, Any]) -> APIRouter:
@@ -63,59 +489,176 @@ class CRUDGenerator:
         update_model = pydantic_models['update']
         response_model = pydantic_models['response']
         
+        # Columnas sensibles (hash de contraseña): no se devuelven, no se expanden
+        # y no se guardan en la caché de lectura
+        from ..config import AUTH
+        sensitive_fields = set()
+        if entity_data['tabla'] == AUTH['tabla']:
+            self.principal_entities.add(entity_name)
+            sensitive_fields.add(AUTH['columna_password'])
+            response_model = self._without_fields(response_model, sensitive_fields)
+        
         # Obtener permisos de la entidad
         permissions = entity_data.get('permisos', {})
         
+        # Caché de totales para X-Total-Count
+        from ..config import BULK_CHUNK_SIZE, COUNT_CACHE_TTL, EXPORT_CHUNK_SIZE
+        get_cache_backend().configure(f"totales:{entity_name}", max_size=1024, ttl=COUNT_CACHE_TTL)
+        count_description = "Incluye el total en la cabecera X-Total-Count ('exact' o 'approx')"
+        
+        # Caché de lectura por ID, configurable con `cache: {ttl: 30, max: 10000}`
+        entity_cache = None
+        cache_config = entity_data.get('cache')
+        if cache_config:
+            entity_cache = f"entidad:{entity_name}"
+            get_cache_backend().configure(entity_cache, max_size=cache_config.get('max', 1024), ttl=cache_config.get('ttl', 60))
+            self.cached_entities.add(entity_name)
+        
+        # Campo de ordenamiento para la paginación por cursor
+        cursor_field = get_cursor_field(entity_name, entity_data)
+        cursor_type = get_field_type(entity_data, cursor_field)
+        after_description = "Cursor opaco de la página anterior (vacío para la primera página)"
+        sort_description = "Campos indexados para ordenar, separados por coma (prefijo '-' para descendente)"
+        
+        # Cuerpo de la actualización en lote: `datos` admite cualquier subconjunto
+        # de los campos actualizables (solo se aplican los recibidos)
+        bulk_update_values_model = create_pydantic_model(
+            f"{entity_name}BulkUpdateDatos",
+            **{
+                field_name: (Optional[field_info.annotation], None)
+                for field_name, field_info in update_model.model_fields.items()
+            }
+        )
+        bulk_update_model = create_pydantic_model(
+            f"{entity_name}BulkUpdate",
+            ids=(Optional[List[int]], None),
+            datos=(bulk_update_values_model, ...)
+        )
+        
+        # Columnas cuyo valor lo genera la base de datos (no la aplicación)
+        server_generated_columns = [
+            column.name for column in model_class.__table__.columns
+            if not column.primary_key and (column.server_default is not None or column.server_onupdate is not None)
+        ]
+        
+        # Campos que se pueden proyectar con `fields`
+        response_fields = [name for name in response_model.model_fields if hasattr(model_class, name)]
+        fields_description = "Campos a devolver separados por coma (por defecto, todos)"
+        
+        # Serializadores y validadores precompilados de la entidad
+        item_adapter = TypeAdapter(response_model)
+        list_adapter = TypeAdapter(List[response_model])
+        create_adapter = TypeAdapter(create_model)
+        bulk_create_adapter = TypeAdapter(List[create_model])
+        update_adapter = TypeAdapter(update_model)
+        
+        # Campos únicos del cuerpo de creación que admiten `upsert` en la creación en lote
+        upsert_fields = [
+            field_name for field_name, field_config in entity_data['campos'].items()
+            if field_config.get('unique') and field_name in create_model.model_fields
+        ]
+        upsert_description = f"Campo único para actualizar las filas existentes en lugar de fallar ({', '.join(upsert_fields) or 'ninguno'})"
+        
+        # Claves foráneas expandibles con `expand`: {campo: (tabla, columna)}
+        fk_fields = {
+            field_name: tuple(field_config['fk'].split('.'))
+            for field_name, field_config in entity_data['campos'].items()
+            if field_config.get('fk')
+        }
+        expand_description = "Claves foráneas a expandir con la entidad relacionada, separadas por coma"
+        
+        # Columnas de versión (junto al ID) para ETag y Last-Modified
+        version_columns = ['id', *VERSION_COLUMNS] if all(hasattr(model_class, name) for name in VERSION_COLUMNS) else []
+        
+        # Descriptor de ejecución precalculado (borrado lógico, dueño y sentencias)
+        runtime = EntityRuntime(entity_name, model_class, permissions)
+        
+        # Registrar la entidad para que otras puedan expandir sus claves foráneas
+        self.entities_by_table[entity_data['tabla']] = {
+            'entity_name': entity_name,
+            'expand_fields': response_fields,
+            'runtime': runtime
+        }
+        
         # Endpoint GET / - Listar todos
         list_description = self.get_endpoint_description(entity_name, 'list', entity_data)
         @router.get("/", response_model=List[response_model], description=list_description)
         async def list_entities(
+            request: Request,
+            response: Response,
             current_user: Usuario = Depends(get_current_user_with_session),
-            session: AsyncSession = Depends(get_db_session),
+            session: AsyncSession = Depends(get_read_db_session),
             skip: int = Query(0, ge=0),
-            limit: int = Query(100, ge=1, le=1000)
+            limit: int = Query(100, ge=1, le=1000),
+            after: Optional[str] = Query(None, description=after_description),
+            sort: Optional[str] = Query(None, description=sort_description),
+            fields: Optional[str] = Query(None, description=fields_description),
+            count: Optional[str] = Query(None, pattern="^(exact|approx)$", description=count_description),
+            expand: Optional[str] = Query(None, description=expand_description)
         ):
             """Lista todas las entidades con paginación"""
             try:
-                from ..config import AUTH
-                
                 # Verificar permisos de lectura
-                if not self.auth_manager.has_permission(current_user, permissions, 'r'):
+                if not runtime.policy.allows(current_user, 'r'):
                     raise HTTPException(
                         status_code=status.HTTP_403_FORBIDDEN,
                         detail="No tienes permisos para leer esta entidad"
                     )
                 
-                # Construir query base
-                query = select(model_class)
-                
-                # Aplicar filtro de borrado lógico
-                delete_column = AUTH['columna_borrado']
-                delete_type = AUTH['borrado_logico']
-                
-                if hasattr(model_class, delete_column):
-                    if delete_type == 'boolean':
-                        # Para boolean, mostrar solo los que son True (no eliminados)
-                        query = query.where(getattr(model_class, delete_column) == True)
-                    else:
-                        # Para timestamp/datetime, mostrar solo los que son None (no eliminados)
-                        query = query.where(getattr(model_class, delete_column) == None)
+                # Construir query base (entidad completa o columnas proyectadas)
+                projection = self._parse_projection(fields, response_fields)
+                expand_fields = self._parse_expand(expand, fk_fields)
+                if expand_fields:
+                    # La expansión trabaja sobre filas proyectadas que incluyen las claves foráneas
+                    projection = list(dict.fromkeys([*(projection or response_fields), *expand_fields]))
+                # Las filas completas se validan con el TypeAdapter precompilado del modelo de respuesta
+                adapter = list_adapter if projection is None else None
+                projection = projection or response_fields
+                cursor_columns = ['id', cursor_field] if after is not None else []
+                # El select base ya excluye las filas con borrado lógico
+                query = runtime.select_columns([*projection, *cursor_columns, *version_columns])
                 
                 # Aplicar filtros según permisos
-                user_filter = self.auth_manager.get_user_filter(current_user, permissions)
+                user_filter = runtime.user_filter(current_user)
                 if user_filter:
-                    for key, value in user_filter.items():
-                        query = query.where(getattr(model_class, key) == value)
+                    query = query.where(runtime.owner_condition(user_filter))
+                
+                # Aplicar filtros y ordenamiento de la consulta
+                query = self._apply_query_language(query, model_class, entity_data, request, sort, after)
                 
                 # Aplicar paginación
-                query = query.offset(skip).limit(limit)
+                page_query = self._paginate(query, model_class, cursor_field, cursor_type, skip, limit, after)
+                
+                # Responder 304 si la página no cambió (las relaciones expandidas no tienen versión)
+                page_versions = version_columns if not expand_fields else []
+                not_modified = await self._probe_page(session, request, model_class, page_query, page_versions)
+                if not_modified is not None:
+                    return not_modified
+                
+                # Total del listado completo (antes de paginar)
+                if count is not None:
+                    total = await self._count_total(session, entity_name, model_class, query, request, user_filter, count)
+                    response.headers['X-Total-Count'] = str(total)
                 
                 # Ejecutar query
-                result = await session.execute(query)
-                entities = result.scalars().all()
+                result = await session.execute(page_query)
+                entities = result.mappings().all()
+                
+                if page_versions:
+                    response.headers.update(validator_headers(*compute_validators(entities)))
+                
+                if after is not None:
+                    cursor = next_cursor(entities, cursor_field, limit)
+                    if cursor:
+                        response.headers['X-Next-Cursor'] = cursor
                 
-                return entities
+                items = [{name: row[name] for name in projection} for row in entities]
+                if expand_fields:
+                    await self._expand_relations(session, current_user, items, expand_fields, fk_fields)
+                return self._render(items, response, adapter)
                 
+            except HTTPException:
+                raise
             except Exception as e:
                 logger.error(f"Error listando {entity_name}: {e}")
                 raise HTTPException(
@@ -125,28 +668,42 @@ class CRUDGenerator:
         
         # Endpoint POST / - Crear
         create_description = self.get_endpoint_description(entity_name, 'create', entity_data)
-        @router.post("/", response_model=response_model, description=create_description)
+        @router.post("/", response_model=response_model, description=create_description,
+                     openapi_extra=self._body_schema(create_adapter))
         async def create_entity(
-            entity_data: create_model,
+            request: Request,
+            response: Response,
             current_user: Usuario = Depends(get_current_user_with_session),
             session: AsyncSession = Depends(get_db_session)
         ):
             """Crea una nueva entidad"""
+            entity_data = await self._parse_body(request, create_adapter)
             try:
                 # Verificar permisos de escritura
-                if not self.auth_manager.has_permission(current_user, permissions, 'w'):
+                if not runtime.policy.allows(current_user, 'w'):
                     raise HTTPException(
                         status_code=status.HTTP_403_FORBIDDEN,
                         detail="No tienes permisos para crear esta entidad"
                     )
                 
-                # Crear la entidad
-                entity = model_class(**entity_data.dict())
+                # Con permisos 'yo' la entidad se crea a nombre del usuario
+                values = entity_data.model_dump()
+                self._enforce_owner(values, runtime.user_filter(current_user, 'w'), creating=True)
+                
+                # Crear la entidad (los valores por defecto del cliente se aplican en memoria)
+                entity = model_class(**values)
                 session.add(entity)
                 await session.commit()
-                await session.refresh(entity)
+                await self._invalidate_counts(entity_name)
+                await get_db_manager().mark_write(current_user.id)
+                
+                # La sesión no expira los atributos al hacer commit y la clave primaria
+                # ya se obtuvo en el flush; solo se releen las columnas con valor por
+                # defecto del servidor cuando el dialecto no las devolvió con RETURNING
+                if server_generated_columns and not self._supports_returning(session, 'insert'):
+                    await session.refresh(entity, attribute_names=server_generated_columns)
                 
-                return entity
+                return self._render({name: getattr(entity, name) for name in response_fields}, response, item_adapter)
                 
             except HTTPException:
                 raise
@@ -157,62 +714,296 @@ class CRUDGenerator:
                     detail="Error interno del servidor"
                 )
         
+        # Endpoint POST /bulk - Crear en lote
+        bulk_create_description = self.get_endpoint_description(entity_name, 'bulk_create', entity_data)
+        @router.post("/bulk", description=bulk_create_description,
+                     openapi_extra=self._body_schema(bulk_create_adapter))
+        async def bulk_create_entities(
+            request: Request,
+            current_user: Usuario = Depends(get_current_user_with_session),
+            session: AsyncSession = Depends(get_db_session),
+            upsert: Optional[str] = Query(None, description=upsert_description)
+        ):
+            """Crea entidades en lote con un INSERT multi-fila por cada bloque"""
+            items = await self._parse_body(request, bulk_create_adapter)
+            
+            # Verificar permisos de escritura
+            if not runtime.policy.allows(current_user, 'w'):
+                raise HTTPException(
+                    status_code=status.HTTP_403_FORBIDDEN,
+                    detail="No tienes permisos para crear esta entidad"
+                )
+            
+            user_filter = runtime.user_filter(current_user, 'w')
+            if upsert is not None:
+                self._check_upsert(session, upsert, upsert_fields, user_filter)
+            
+            if not items:
+                return {"procesados": 0} if upsert else {"creados": 0}
+            
+            # Los elementos ya fueron validados desde el JSON recibido; los
+            # errores de validación se informan con el índice de cada elemento.
+            # Las filas nuevas toman los valores por defecto del modelo, pero el
+            # upsert solo actualiza en las existentes los campos recibidos
+            rows = [item.model_dump() for item in items]
+            provided = [frozenset(item.model_fields_set) | frozenset(user_filter or {}) for item in items]
+            if user_filter:
+                for row in rows:
+                    self._enforce_owner(row, user_filter, creating=True)
+            
+            # Las filas existentes actualizadas registran la fecha de actualización
+            update_values = None
+            if upsert and runtime.has_update_stamp:
+                update_values = {'fecha_actualizacion': datetime.utcnow()}
+            
+            def chunk_statements(first: int, last: int):
+                """Sentencias de los elementos `first` a `last - 1`, por bloques de BULK_CHUNK_SIZE"""
+                for chunk_start in range(first, last, BULK_CHUNK_SIZE):
+                    chunk_end = min(chunk_start + BULK_CHUNK_SIZE, last)
+                    yield from self._bulk_insert_statements(
+                        session, model_class, rows[chunk_start:chunk_end], provided[chunk_start:chunk_end],
+                        upsert, update_values
+                    )
+            
+            start = 0
+            try:
+                # En la tabla de usuarios se registran las filas existentes que
+                # actualizará el upsert, para invalidar solo a esos usuarios
+                existing_ids: List[int] = []
+                if upsert and entity_name in self.principal_entities:
+                    upsert_column = getattr(model_class, upsert)
+                    result = await session.execute(
+                        select(model_class.id).where(upsert_column.in_([row[upsert] for row in rows]))
+                    )
+                    existing_ids = list(result.scalars())
+                
+                # Todos los bloques se escriben en una única transacción
+                for start in range(0, len(rows), BULK_CHUNK_SIZE):
+                    for statement in chunk_statements(start, min(start + BULK_CHUNK_SIZE, len(rows))):
+                        await session.execute(statement)
+                await session.commit()
+                await self._invalidate_counts(entity_name)
+                await get_db_manager().mark_write(current_user.id)
+                
+                if upsert:
+                    await self._invalidate_entities(entity_name, len(rows), existing_ids)
+                    return {"procesados": len(rows)}
+                return {"creados": len(rows)}
+                
+            except IntegrityError as e:
+                await session.rollback()
+                end = min(start + BULK_CHUNK_SIZE, len(rows)) - 1
+                index, item_error = await self._find_failing_item(session, chunk_statements, start, end + 1)
+                error = item_error or e
+                logger.warning(f"Error de integridad creando {entity_name} en lote (elemento {index}, bloque {start}-{end}): {error.orig}")
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail={
+                        "mensaje": "Error de integridad, no se creó ningún elemento",
+                        "indice": index,
+                        "desde": start,
+                        "hasta": end,
+                        "error": str(error.orig)
+                    }
+                )
+            except Exception as e:
+                await session.rollback()
+                logger.error(f"Error creando {entity_name} en lote: {e}")
+                raise HTTPException(
+                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                    detail="Error interno del servidor"
+                )
+        
+        # Endpoint PATCH /bulk - Actualizar en lote
+        bulk_update_description = self.get_endpoint_description(entity_name, 'bulk_update', entity_data)
+        @router.patch("/bulk", description=bulk_update_description)
+        async def bulk_update_entities(
+            request: Request,
+            payload: bulk_update_model,
+            current_user: Usuario = Depends(get_current_user_with_session),
+            session: AsyncSession = Depends(get_db_session)
+        ):
+            """Actualiza entidades por IDs o filtros con un único UPDATE"""
+            try:
+                # Verificar permisos de escritura
+                if not runtime.policy.allows(current_user, 'w'):
+                    raise HTTPException(
+                        status_code=status.HTTP_403_FORBIDDEN,
+                        detail="No tienes permisos para actualizar esta entidad"
+                    )
+                
+                values = runtime.stamp(payload.datos.model_dump(exclude_unset=True))
+                if not values:
+                    raise HTTPException(
+                        status_code=status.HTTP_400_BAD_REQUEST,
+                        detail="No se indicaron campos para actualizar"
+                    )
+                
+                user_filter = runtime.user_filter(current_user, 'w')
+                self._enforce_owner(values, user_filter)
+                conditions = self._bulk_conditions(runtime, entity_data, request, payload.ids, user_filter)
+                
+                statement = (
+                    update(model_class)
+                    .where(*conditions)
+                    .values(**values)
+                    .execution_options(synchronize_session=False)
+                )
+                rowcount, entity_ids = await self._execute_bulk_write(
+                    session, entity_name, model_class, statement, conditions, 'update'
+                )
+                await session.commit()
+                await self._invalidate_counts(entity_name)
+                await get_db_manager().mark_write(current_user.id)
+                await self._invalidate_entities(entity_name, rowcount, entity_ids)
+                
+                return {"actualizados": rowcount}
+                
+            except HTTPException:
+                raise
+            except Exception as e:
+                await session.rollback()
+                logger.error(f"Error actualizando {entity_name} en lote: {e}")
+                raise HTTPException(
+                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                    detail="Error interno del servidor"
+                )
+        
+        # Endpoint DELETE /bulk - Eliminar en lote (DEBE IR ANTES DE /{entity_id})
+        bulk_delete_description = self.get_endpoint_description(entity_name, 'bulk_delete', entity_data)
+        @router.delete("/bulk", description=bulk_delete_description)
+        async def bulk_delete_entities(
+            request: Request,
+            payload: Optional[BulkDeleteRequest] = None,
+            current_user: Usuario = Depends(get_current_user_with_session),
+            session: AsyncSession = Depends(get_db_session)
+        ):
+            """Elimina entidades por IDs o filtros con un único UPDATE (o DELETE)"""
+            try:
+                # Verificar permisos de eliminación
+                if not runtime.policy.allows(current_user, 'd'):
+                    raise HTTPException(
+                        status_code=status.HTTP_403_FORBIDDEN,
+                        detail="No tienes permisos para eliminar esta entidad"
+                    )
+                
+                ids = payload.ids if payload else None
+                user_filter = runtime.user_filter(current_user, 'd')
+                conditions = self._bulk_conditions(runtime, entity_data, request, ids, user_filter)
+                
+                # Borrado lógico si la entidad tiene la columna configurada
+                delete_values = runtime.soft_delete_values()
+                if delete_values is not None:
+                    statement = update(model_class).where(*conditions).values(**delete_values)
+                    operation = 'update'
+                else:
+                    statement = delete(model_class).where(*conditions)
+                    operation = 'delete'
+                
+                rowcount, entity_ids = await self._execute_bulk_write(
+                    session, entity_name, model_class,
+                    statement.execution_options(synchronize_session=False), conditions, operation
+                )
+                await session.commit()
+                await self._invalidate_counts(entity_name)
+                await get_db_manager().mark_write(current_user.id)
+                await self._invalidate_entities(entity_name, rowcount, entity_ids)
+                
+                return {"eliminados": rowcount}
+                
+            except HTTPException:
+                raise
+            except Exception as e:
+                await session.rollback()
+                logger.error(f"Error eliminando {entity_name} en lote: {e}")
+                raise HTTPException(
+                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                    detail="Error interno del servidor"
+                )
+        
         # Endpoint GET /yo - Obtener entidades del usuario actual (DEBE IR ANTES DE /{entity_id})
-        if any('yo' in perm for perm in permissions.values()):
+        if runtime.policy.has_owner_rules:
             yo_description = self.get_endpoint_description(entity_name, 'yo', entity_data)
             @router.get("/yo", response_model=List[response_model], description=yo_description)
             async def get_my_entities(
+                request: Request,
+                response: Response,
                 current_user: Usuario = Depends(get_current_user_with_session),
-                session: AsyncSession = Depends(get_db_session),
+                session: AsyncSession = Depends(get_read_db_session),
                 skip: int = Query(0, ge=0),
-                limit: int = Query(100, ge=1, le=1000)
+                limit: int = Query(100, ge=1, le=1000),
+                after: Optional[str] = Query(None, description=after_description),
+                sort: Optional[str] = Query(None, description=sort_description),
+                fields: Optional[str] = Query(None, description=fields_description),
+                count: Optional[str] = Query(None, pattern="^(exact|approx)$", description=count_description),
+                expand: Optional[str] = Query(None, description=expand_description)
             ):
                 """Obtiene las entidades del usuario actual"""
                 try:
-                    from ..config import AUTH
-                    
                     # Verificar permisos 'yo'
-                    if not self.auth_manager.has_permission(current_user, permissions, 'yo'):
+                    if not runtime.policy.allows(current_user, 'yo'):
                         raise HTTPException(
                             status_code=status.HTTP_403_FORBIDDEN,
                             detail="No tienes permisos para acceder a tus entidades"
                         )
                     
                     # Aplicar filtro de usuario
-                    user_filter = self.auth_manager.get_user_filter(current_user, permissions)
+                    user_filter = runtime.user_filter(current_user, 'yo')
                     if not user_filter:
                         raise HTTPException(
                             status_code=status.HTTP_403_FORBIDDEN,
                             detail="Configuración de permisos 'yo' inválida"
                         )
                     
-                    # Construir query con filtros
-                    query = select(model_class)
-                    
-                    # Aplicar filtro de borrado lógico
-                    delete_column = AUTH['columna_borrado']
-                    delete_type = AUTH['borrado_logico']
-                    
-                    if hasattr(model_class, delete_column):
-                        if delete_type == 'boolean':
-                            # Para boolean, mostrar solo los que son True (no eliminados)
-                            query = query.where(getattr(model_class, delete_column) == True)
-                        else:
-                            # Para timestamp/datetime, mostrar solo los que son None (no eliminados)
-                            query = query.where(getattr(model_class, delete_column) == None)
+                    # Construir query con filtros (entidad completa o columnas proyectadas)
+                    projection = self._parse_projection(fields, response_fields)
+                    expand_fields = self._parse_expand(expand, fk_fields)
+                    if expand_fields:
+                        # La expansión trabaja sobre filas proyectadas que incluyen las claves foráneas
+                        projection = list(dict.fromkeys([*(projection or response_fields), *expand_fields]))
+                    # Las filas completas se validan con el TypeAdapter precompilado del modelo de respuesta
+                    adapter = list_adapter if projection is None else None
+                    projection = projection or response_fields
+                    cursor_columns = ['id', cursor_field] if after is not None else []
+                    # El select base ya excluye las filas con borrado lógico
+                    query = runtime.select_columns([*projection, *cursor_columns, *version_columns])
                     
                     # Aplicar filtros de usuario
-                    for key, value in user_filter.items():
-                        query = query.where(getattr(model_class, key) == value)
+                    query = query.where(runtime.owner_condition(user_filter))
+                    
+                    # Aplicar filtros y ordenamiento de la consulta
+                    query = self._apply_query_language(query, model_class, entity_data, request, sort, after)
                     
                     # Aplicar paginación
-                    query = query.offset(skip).limit(limit)
+                    page_query = self._paginate(query, model_class, cursor_field, cursor_type, skip, limit, after)
+                    
+                    # Responder 304 si la página no cambió (las relaciones expandidas no tienen versión)
+                    page_versions = version_columns if not expand_fields else []
+                    not_modified = await self._probe_page(session, request, model_class, page_query, page_versions)
+                    if not_modified is not None:
+                        return not_modified
+                    
+                    # Total del listado completo (antes de paginar)
+                    if count is not None:
+                        total = await self._count_total(session, entity_name, model_class, query, request, user_filter, count)
+                        response.headers['X-Total-Count'] = str(total)
                     
                     # Ejecutar query
-                    result = await session.execute(query)
-                    entities = result.scalars().all()
+                    result = await session.execute(page_query)
+                    entities = result.mappings().all()
+                    
+                    if page_versions:
+                        response.headers.update(validator_headers(*compute_validators(entities)))
+                    
+                    if after is not None:
+                        cursor = next_cursor(entities, cursor_field, limit)
+                        if cursor:
+                            response.headers['X-Next-Cursor'] = cursor
                     
-                    return entities
+                    items = [{name: row[name] for name in projection} for row in entities]
+                    if expand_fields:
+                        await self._expand_relations(session, current_user, items, expand_fields, fk_fields)
+                    return self._render(items, response, adapter)
                     
                 except HTTPException:
                     raise
@@ -223,42 +1014,110 @@ class CRUDGenerator:
                         detail="Error interno del servidor"
                     )
         
+        # Endpoint GET /export - Exportar en streaming (DEBE IR ANTES DE /{entity_id})
+        export_description = self.get_endpoint_description(entity_name, 'export', entity_data)
+        @router.get("/export", description=export_description)
+        async def export_entities(
+            request: Request,
+            current_user: Usuario = Depends(get_current_user_with_session),
+            export_format: str = Query("ndjson", alias="format", pattern="^(ndjson|csv)$"),
+            sort: Optional[str] = Query(None, description=sort_description),
+            fields: Optional[str] = Query(None, description=fields_description)
+        ):
+            """Exporta las entidades usando un cursor del servidor y memoria constante"""
+            try:
+                
+                # Verificar permisos de lectura
+                if not runtime.policy.allows(current_user, 'r'):
+                    raise HTTPException(
+                        status_code=status.HTTP_403_FORBIDDEN,
+                        detail="No tienes permisos para leer esta entidad"
+                    )
+                
+                # Siempre se proyectan columnas: nunca se hidratan instancias ORM
+                columns = self._parse_projection(fields, response_fields) or response_fields
+                query = runtime.select_columns(columns)
+                
+                # Aplicar filtros según permisos
+                user_filter = runtime.user_filter(current_user)
+                if user_filter:
+                    query = query.where(runtime.owner_condition(user_filter))
+                
+                # Aplicar filtros y ordenamiento de la consulta
+                query = self._apply_query_language(query, model_class, entity_data, request, sort, None)
+                query = query.execution_options(yield_per=EXPORT_CHUNK_SIZE)
+                
+            except HTTPException:
+                raise
+            except Exception as e:
+                logger.error(f"Error preparando exportación de {entity_name}: {e}")
+                raise HTTPException(
+                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                    detail="Error interno del servidor"
+                )
+            
+            # Se lee de una réplica salvo que el usuario haya escrito recientemente
+            rows = stream_export(
+                lambda: get_db_manager().read_session(current_user.id),
+                query, columns, export_format, EXPORT_CHUNK_SIZE, entity_name
+            )
+            
+            filename = f"{entity_data['tabla']}.{export_format}"
+            return ExportResponse(
+                rows,
+                media_type=EXPORT_FORMATS[export_format],
+                headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+            )
+        
         # Endpoint GET /{id} - Obtener por ID
         read_description = self.get_endpoint_description(entity_name, 'read', entity_data)
         @router.get("/{entity_id}", response_model=response_model, description=read_description)
         async def get_entity(
             entity_id: int,
+            request: Request,
+            response: Response,
             current_user: Usuario = Depends(get_current_user_with_session),
-            session: AsyncSession = Depends(get_db_session)
+            session: AsyncSession = Depends(get_read_db_session),
+            fields: Optional[str] = Query(None, description=fields_description),
+            expand: Optional[str] = Query(None, description=expand_description)
         ):
             """Obtiene una entidad por ID"""
             try:
-                from ..config import AUTH
-                
                 # Verificar permisos de lectura
-                if not self.auth_manager.has_permission(current_user, permissions, 'r'):
+                if not runtime.policy.allows(current_user, 'r'):
                     raise HTTPException(
                         status_code=status.HTTP_403_FORBIDDEN,
                         detail="No tienes permisos para leer esta entidad"
                     )
                 
-                # Buscar la entidad
-                query = select(model_class).where(model_class.id == entity_id)
+                # Buscar la entidad (completa o solo las columnas proyectadas)
+                projection = self._parse_projection(fields, response_fields)
+                expand_fields = self._parse_expand(expand, fk_fields)
+                if expand_fields:
+                    projection = list(dict.fromkeys([*(projection or response_fields), *expand_fields]))
+                adapter = item_adapter if projection is None else None
+                projection = projection or response_fields
+                user_filter = runtime.user_filter(current_user)
                 
-                # Aplicar filtro de borrado lógico
-                delete_column = AUTH['columna_borrado']
-                delete_type = AUTH['borrado_logico']
-                
-                if hasattr(model_class, delete_column):
-                    if delete_type == 'boolean':
-                        # Para boolean, mostrar solo los que son True (no eliminados)
-                        query = query.where(getattr(model_class, delete_column) == True)
-                    else:
-                        # Para timestamp/datetime, mostrar solo los que son None (no eliminados)
-                        query = query.where(getattr(model_class, delete_column) == None)
-                
-                result = await session.execute(query)
-                entity = result.scalar_one_or_none()
+                if entity_cache is not None:
+                    # Lectura a través de la caché: se guarda la fila completa (sin
+                    # columnas sensibles) para que el filtro 'yo' se verifique también
+                    # sobre la copia en caché. Se llena desde la primaria: una réplica
+                    # atrasada dejaría la fila previa a una escritura durante todo el TTL
+                    entity = await get_cache_backend().get(entity_cache, entity_id)
+                    if entity is None:
+                        async with self._primary_session(session) as primary_session:
+                            result = await primary_session.execute(runtime.select_row, {'entity_id': entity_id})
+                            row = result.mappings().one_or_none()
+                        if row is not None:
+                            entity = {name: value for name, value in row.items() if name not in sensitive_fields}
+                            await get_cache_backend().set(entity_cache, entity_id, entity)
+                else:
+                    # Select precompilado por combinación de columnas (excluye el borrado lógico)
+                    owner_columns = list(user_filter.keys()) if user_filter else []
+                    query = runtime.select_by_id([*projection, *owner_columns, *version_columns])
+                    result = await session.execute(query, {'entity_id': entity_id})
+                    entity = result.mappings().one_or_none()
                 
                 if not entity:
                     raise HTTPException(
@@ -267,17 +1126,26 @@ class CRUDGenerator:
                     )
                 
                 # Verificar permisos 'yo' si aplica
-                user_filter = self.auth_manager.get_user_filter(current_user, permissions)
                 if user_filter:
                     # Verificar que la entidad pertenece al usuario
-                    filter_values = {k: getattr(entity, k) for k in user_filter.keys()}
+                    filter_values = {k: get_value(entity, k) for k in user_filter.keys()}
                     if filter_values != user_filter:
                         raise HTTPException(
                             status_code=status.HTTP_403_FORBIDDEN,
                             detail="No tienes permisos para acceder a esta entidad"
                         )
                 
-                return entity
+                # Validadores de la entidad; 304 si la copia del cliente sigue vigente
+                if version_columns and not expand_fields:
+                    etag, last_modified = compute_validators([entity])
+                    response.headers.update(validator_headers(etag, last_modified))
+                    if is_not_modified(request.headers, etag, last_modified):
+                        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=dict(response.headers))
+                
+                item = {name: entity[name] for name in projection}
+                if expand_fields:
+                    await self._expand_relations(session, current_user, [item], expand_fields, fk_fields)
+                return self._render(item, response, adapter)
                 
             except HTTPException:
                 raise
@@ -290,57 +1158,68 @@ class CRUDGenerator:
         
         # Endpoint PUT /{id} - Actualizar
         update_description = self.get_endpoint_description(entity_name, 'update', entity_data)
-        @router.put("/{entity_id}", response_model=response_model, description=update_description)
+        @router.put("/{entity_id}", response_model=response_model, description=update_description,
+                    openapi_extra=self._body_schema(update_adapter))
         async def update_entity(
             entity_id: int,
-            entity_data: update_model,
+            request: Request,
+            response: Response,
             current_user: Usuario = Depends(get_current_user_with_session),
             session: AsyncSession = Depends(get_db_session)
         ):
-            """Actualiza una entidad existente"""
+            """Actualiza una entidad existente con un único UPDATE"""
+            entity_data = await self._parse_body(request, update_adapter)
             try:
                 # Verificar permisos de escritura
-                if not self.auth_manager.has_permission(current_user, permissions, 'w'):
+                if not runtime.policy.allows(current_user, 'w'):
                     raise HTTPException(
                         status_code=status.HTTP_403_FORBIDDEN,
                         detail="No tienes permisos para actualizar esta entidad"
                     )
                 
-                # Buscar la entidad
-                query = select(model_class).where(model_class.id == entity_id)
-                result = await session.execute(query)
-                entity = result.scalar_one_or_none()
+                # El dueño y el borrado lógico se verifican dentro del UPDATE
+                user_filter = runtime.user_filter(current_user, 'w')
+                conditions = runtime.row_conditions(entity_id, user_filter)
+                update_data = runtime.stamp(entity_data.model_dump(exclude_unset=True))
+                self._enforce_owner(update_data, user_filter)
                 
-                if not entity:
-                    raise HTTPException(
-                        status_code=status.HTTP_404_NOT_FOUND,
-                        detail=f"{entity_name} no encontrada"
+                row = None
+                if not update_data:
+                    # Sin cambios: solo se devuelve la fila actual
+                    result = await session.execute(select(model_class.__table__).where(*conditions))
+                    row = result.mappings().one_or_none()
+                elif self._supports_returning(session, 'update'):
+                    statement = (
+                        update(model_class)
+                        .where(*conditions)
+                        .values(**update_data)
+                        .returning(*model_class.__table__.columns)
                     )
+                    result = await session.execute(statement)
+                    row = result.mappings().one_or_none()
+                else:
+                    statement = update(model_class).where(*conditions).values(**update_data)
+                    result = await session.execute(statement.execution_options(synchronize_session=False))
+                    if result.rowcount:
+                        # Sin RETURNING, se lee la fila dentro de la misma transacción
+                        result = await session.execute(runtime.select_row, {'entity_id': entity_id})
+                        row = result.mappings().one_or_none()
                 
-                # Verificar permisos 'yo' si aplica
-                user_filter = self.auth_manager.get_user_filter(current_user, permissions)
-                if user_filter:
-                    filter_values = {k: getattr(entity, k) for k in user_filter.keys()}
-                    if filter_values != user_filter:
-                        raise HTTPException(
-                            status_code=status.HTTP_403_FORBIDDEN,
-                            detail="No tienes permisos para actualizar esta entidad"
-                        )
-                
-                # Actualizar la entidad
-                update_data = entity_data.dict(exclude_unset=True)
-                for key, value in update_data.items():
-                    setattr(entity, key, value)
+                if row is None:
+                    await session.rollback()
+                    await self._raise_write_failure(session, runtime, entity_id, 'actualizar')
                 
-                session.add(entity)
                 await session.commit()
-                await session.refresh(entity)
+                await self._invalidate_counts(entity_name)
+                await get_db_manager().mark_write(current_user.id)
+                await self._invalidate_entity(entity_name, entity_id)
                 
-                return entity
+                return self._render({name: row[name] for name in response_fields}, response, item_adapter)
                 
             except HTTPException:
                 raise
             except Exception as e:
+                await session.rollback()
                 logger.error(f"Error actualizando {entity_name}: {e}")
                 raise HTTPException(
                     status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -355,64 +1234,36 @@ class CRUDGenerator:
             current_user: Usuario = Depends(get_current_user_with_session),
             session: AsyncSession = Depends(get_db_session)
         ):
-            """Elimina una entidad por ID (soft delete)"""
+            """Elimina una entidad por ID (soft delete) con un único UPDATE"""
             try:
-                from ..config import AUTH
-                
                 # Verificar permisos de eliminación
-                if not self.auth_manager.has_permission(current_user, permissions, 'd'):
+                if not runtime.policy.allows(current_user, 'd'):
                     raise HTTPException(
                         status_code=status.HTTP_403_FORBIDDEN,
                         detail="No tienes permisos para eliminar esta entidad"
                     )
                 
-                # Buscar la entidad
-                query = select(model_class).where(model_class.id == entity_id)
-                result = await session.execute(query)
-                entity = result.scalar_one_or_none()
+                # Eliminar la entidad (borrado lógico si la columna existe) con la
+                # sentencia precompilada; el dueño y el borrado lógico se verifican en SQL
+                user_filter = runtime.user_filter(current_user, 'd')
+                statement, params = runtime.delete_statement(user_filter)
+                result = await session.execute(statement, {'entity_id': entity_id, **params})
                 
-                if not entity:
-                    raise HTTPException(
-                        status_code=status.HTTP_404_NOT_FOUND,
-                        detail=f"{entity_name} no encontrada"
-                    )
-                
-                # Verificar permisos 'yo' si aplica
-                user_filter = self.auth_manager.get_user_filter(current_user, permissions)
-                if user_filter:
-                    filter_values = {k: getattr(entity, k) for k in user_filter.keys()}
-                    if filter_values != user_filter:
-                        raise HTTPException(
-                            status_code=status.HTTP_403_FORBIDDEN,
-                            detail="No tienes permisos para eliminar esta entidad"
-                        )
-                
-                # Eliminar la entidad (borrado lógico)
-                delete_column = AUTH['columna_borrado']
-                delete_type = AUTH['borrado_logico']
-                
-                if hasattr(entity, delete_column):
-                    if delete_type == 'timestamp' or delete_type == 'datetime':
-                        from datetime import datetime
-                        setattr(entity, delete_column, datetime.utcnow())
-                    elif delete_type == 'boolean':
-                        setattr(entity, delete_column, False)
-                    else:
-                        # Por defecto, usar timestamp
-                        from datetime import datetime
-                        setattr(entity, delete_column, datetime.utcnow())
-                    
-                    session.add(entity)
-                else:
-                    await session.delete(entity)
+                if not result.rowcount:
+                    await session.rollback()
+                    await self._raise_write_failure(session, runtime, entity_id, 'eliminar')
                 
                 await session.commit()
+                await self._invalidate_counts(entity_name)
+                await get_db_manager().mark_write(current_user.id)
+                await self._invalidate_entity(entity_name, entity_id)
                 
                 return {"message": f"{entity_name} eliminada correctamente"}
                 
             except HTTPException:
                 raise
             except Exception as e:
+                await session.rollback()
                 logger.error(f"Error eliminando {entity_name}: {e}")
                 raise HTTPException(
                     status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
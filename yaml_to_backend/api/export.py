@@ -0,0 +1,98 @@
+"""Serialización por lotes para la exportación de entidades"""
+
+import csv
+import io
+import json
+import logging
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, AsyncIterator, Callable, List, Sequence
+
+from fastapi.responses import StreamingResponse
+
+logger = logging.getLogger(__name__)
+
+# Formatos de exportación soportados y su tipo de contenido
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv; charset=utf-8',
+}
+
+
+def _json_default(value: Any) -> Any:
+    """Convierte los tipos que json no serializa de forma nativa"""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    return str(value)
+
+
+def serialize_ndjson(rows: Sequence[Any], columns: List[str]) -> str:
+    """Serializa un lote de filas como JSON delimitado por saltos de línea"""
+    lines = [
+        json.dumps({name: row[name] for name in columns}, default=_json_default, ensure_ascii=False)
+        for row in rows
+    ]
+    return "\n".join(lines) + "\n" if lines else ""
+
+
+def serialize_csv_header(columns: List[str]) -> str:
+    """Serializa la fila de encabezados del CSV"""
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(columns)
+    return buffer.getvalue()
+
+
+def serialize_csv(rows: Sequence[Any], columns: List[str]) -> str:
+    """Serializa un lote de filas como CSV"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow([
+            row[name].isoformat() if isinstance(row[name], (datetime, date)) else row[name]
+            for name in columns
+        ])
+    return buffer.getvalue()
+
+
+async def stream_export(open_session: Callable[[], Any], query, columns: List[str], export_format: str,
+                        chunk_size: int, entity_name: str) -> AsyncIterator[str]:
+    """
+    Genera la exportación por lotes con un cursor del servidor.
+
+    La sesión vive lo que dura el streaming, no lo que dura el handler. El
+    cursor y la sesión se liberan en el `finally` tanto si el streaming termina
+    como si se cierra el generador antes (desconexión del cliente).
+    """
+    async with open_session() as session:
+        result = None
+        try:
+            if export_format == 'csv':
+                yield serialize_csv_header(columns)
+
+            result = await session.stream(query)
+            async for rows in result.mappings().partitions(chunk_size):
+                if export_format == 'csv':
+                    yield serialize_csv(rows, columns)
+                else:
+                    yield serialize_ndjson(rows, columns)
+        except Exception as e:
+            logger.error(f"Error exportando {entity_name}: {e}")
+            raise
+        finally:
+            if result is not None:
+                await result.close()
+
+
+class ExportResponse(StreamingResponse):
+    """
+    Respuesta en streaming que cierra siempre el generador al terminar, de modo
+    que una desconexión del cliente también libera la sesión de la exportación.
+    """
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            await self.body_iterator.aclose()
@@ -0,0 +1,275 @@
+"""Utilidades para interpretar los parámetros de consulta de los endpoints CRUD"""
+
+import base64
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set, Tuple
+import logging
+from collections.abc import Mapping
+
+from sqlalchemy import and_, or_
+
+from ..core.model_generator import AUTOMATIC_FIELDS, get_auto_indexed_fields, get_composite_indexes
+
+logger = logging.getLogger(__name__)
+
+
+def get_fields(entity_data: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """Campos de la entidad: los del YAML más los automáticos que el YAML no redefine"""
+    return {**AUTOMATIC_FIELDS, **entity_data.get('campos', {})}
+
+
+def get_indexed_fields(entity_data: Dict[str, Any]) -> Set[str]:
+    """
+    Obtiene los campos de la entidad respaldados por un índice: los declarados
+    en el YAML (o automáticos, como `fecha_creacion`), los indexados
+    automáticamente y el primer campo de cada índice compuesto.
+    """
+    campos = get_fields(entity_data)
+    indexed = {'id'}
+    for field_name, field_config in campos.items():
+        if field_config.get('pk') or field_config.get('index') or field_config.get('unique'):
+            indexed.add(field_name)
+    indexed.update(field_name for field_name in get_auto_indexed_fields(entity_data) if field_name in campos)
+    indexed.update(
+        columns[0] for _, columns, _ in get_composite_indexes(entity_data) if columns[0] in campos
+    )
+    return indexed
+
+
+def get_field_type(entity_data: Dict[str, Any], field_name: str) -> str:
+    """Obtiene el tipo declarado en el YAML para un campo"""
+    if field_name == 'id':
+        return 'integer'
+    field_config = get_fields(entity_data).get(field_name, {})
+    return field_config.get('tipo', 'string').lower()
+
+
+def coerce_value(value: Any, field_type: str) -> Any:
+    """Convierte un valor recibido como texto al tipo declarado en el YAML"""
+    if value is None:
+        return None
+    if field_type in ('integer', 'int'):
+        return int(value)
+    if field_type in ('float', 'decimal'):
+        return float(value)
+    if field_type in ('boolean', 'bool'):
+        if isinstance(value, bool):
+            return value
+        normalized = str(value).lower()
+        if normalized in ('true', '1', 'si', 'sí'):
+            return True
+        if normalized in ('false', '0', 'no'):
+            return False
+        raise ValueError(f"Valor booleano inválido: {value}")
+    if field_type in ('datetime', 'date'):
+        if isinstance(value, datetime):
+            return value
+        return datetime.fromisoformat(str(value))
+    return str(value)
+
+
+# =============================================================================
+# FILTROS Y ORDENAMIENTO
+# =============================================================================
+
+# Operadores admitidos en los filtros `?campo__operador=valor`
+FILTER_OPERATORS = {
+    'eq': lambda column, value: column == value,
+    'ne': lambda column, value: column != value,
+    'gt': lambda column, value: column > value,
+    'gte': lambda column, value: column >= value,
+    'lt': lambda column, value: column < value,
+    'lte': lambda column, value: column <= value,
+    'in': lambda column, value: column.in_(value),
+    'prefix': lambda column, value: column.startswith(value, autoescape=True),
+    'isnull': lambda column, value: column.is_(None) if value else column.is_not(None),
+}
+
+
+def parse_filters(query_params, entity_data: Dict[str, Any]) -> List[Tuple[str, str, Any]]:
+    """
+    Interpreta los parámetros `campo__operador=valor` de la consulta.
+
+    Solo se admiten campos indexados para evitar recorridos completos de la
+    tabla. Lanza ValueError si el campo, el operador o el valor no son válidos.
+    """
+    indexed_fields = get_indexed_fields(entity_data)
+    filters = []
+
+    for key, raw_value in query_params.multi_items():
+        if '__' not in key:
+            continue
+
+        field_name, operator = key.rsplit('__', 1)
+        if operator not in FILTER_OPERATORS:
+            raise ValueError(f"Operador de filtro no soportado: {operator}")
+        if field_name not in indexed_fields:
+            raise ValueError(f"El campo '{field_name}' no está indexado y no se puede filtrar")
+
+        field_type = get_field_type(entity_data, field_name)
+        try:
+            if operator == 'in':
+                value = [coerce_value(item, field_type) for item in raw_value.split(',') if item != '']
+            elif operator == 'isnull':
+                value = coerce_value(raw_value, 'boolean')
+            elif operator == 'prefix':
+                value = str(raw_value)
+            else:
+                value = coerce_value(raw_value, field_type)
+        except ValueError:
+            raise ValueError(f"Valor inválido para el filtro '{key}': {raw_value}")
+
+        filters.append((field_name, operator, value))
+
+    return filters
+
+
+def apply_filters(query, model_class, filters: List[Tuple[str, str, Any]]):
+    """Agrega los filtros interpretados a la consulta"""
+    for field_name, operator, value in filters:
+        query = query.where(FILTER_OPERATORS[operator](getattr(model_class, field_name), value))
+    return query
+
+
+def parse_sort(sort: Optional[str], entity_data: Dict[str, Any]) -> List[Tuple[str, bool]]:
+    """
+    Interpreta el parámetro `sort=-campo1,campo2`.
+
+    Retorna una lista de tuplas (campo, descendente). Lanza ValueError si algún
+    campo no está indexado.
+    """
+    if not sort:
+        return []
+
+    indexed_fields = get_indexed_fields(entity_data)
+    sort_fields = []
+    for item in sort.split(','):
+        item = item.strip()
+        if not item:
+            continue
+        descending = item.startswith('-')
+        field_name = item.lstrip('+-')
+        if field_name not in indexed_fields:
+            raise ValueError(f"El campo '{field_name}' no está indexado y no se puede ordenar")
+        sort_fields.append((field_name, descending))
+    return sort_fields
+
+
+def apply_sort(query, model_class, sort_fields: List[Tuple[str, bool]]):
+    """Ordena la consulta usando `id` como desempate para un orden estable"""
+    if not sort_fields:
+        return query
+
+    for field_name, descending in sort_fields:
+        column = getattr(model_class, field_name)
+        query = query.order_by(column.desc() if descending else column.asc())
+
+    if 'id' not in [field_name for field_name, _ in sort_fields]:
+        query = query.order_by(model_class.id)
+    return query
+
+
+# =============================================================================
+# PROYECCIÓN DE CAMPOS
+# =============================================================================
+
+def parse_fields(fields: Optional[str], allowed_fields: List[str]) -> Optional[List[str]]:
+    """
+    Interpreta el parámetro `fields=id,nombre`.
+
+    Retorna None si no se solicitó proyección. Lanza ValueError si algún campo
+    no forma parte del modelo de respuesta.
+    """
+    if fields is None:
+        return None
+
+    requested = [item.strip() for item in fields.split(',') if item.strip()]
+    if not requested:
+        raise ValueError("Debe indicar al menos un campo en 'fields'")
+
+    invalid = [field_name for field_name in requested if field_name not in allowed_fields]
+    if invalid:
+        raise ValueError(f"Campos no disponibles: {', '.join(invalid)}")
+
+    # Eliminar duplicados conservando el orden solicitado
+    return list(dict.fromkeys(requested))
+
+
+def get_value(row: Any, field_name: str) -> Any:
+    """Obtiene un valor tanto de una instancia ORM como de una fila proyectada"""
+    if isinstance(row, Mapping):
+        return row[field_name]
+    return getattr(row, field_name)
+
+
+# =============================================================================
+# PAGINACIÓN POR CURSOR
+# =============================================================================
+
+def get_cursor_field(entity_name: str, entity_data: Dict[str, Any]) -> str:
+    """
+    Obtiene el campo usado para ordenar la paginación por cursor.
+
+    Se configura en el YAML con `paginacion: {cursor: campo}`. El campo debe
+    estar indexado y ser requerido; en caso contrario se usa `id`.
+    """
+    cursor_field = (entity_data.get('paginacion') or {}).get('cursor', 'id')
+    if cursor_field == 'id':
+        return cursor_field
+
+    field_config = get_fields(entity_data).get(cursor_field)
+    if field_config is None or cursor_field not in get_indexed_fields(entity_data):
+        logger.warning(f"Campo de cursor '{cursor_field}' no indexado en {entity_name}, se usará 'id'")
+        return 'id'
+    if not field_config.get('required', True):
+        logger.warning(f"Campo de cursor '{cursor_field}' admite nulos en {entity_name}, se usará 'id'")
+        return 'id'
+    return cursor_field
+
+
+def encode_cursor(key_value: Any, entity_id: int) -> str:
+    """Codifica la posición de la última fila de una página en un cursor opaco"""
+    if isinstance(key_value, datetime):
+        key_value = key_value.isoformat()
+    payload = json.dumps([key_value, entity_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str, field_type: str) -> Tuple[Any, int]:
+    """Decodifica un cursor opaco. Lanza ValueError si el cursor es inválido"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        key_value, entity_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        return coerce_value(key_value, field_type), int(entity_id)
+    except Exception as e:
+        raise ValueError(f"Cursor inválido: {cursor}") from e
+
+
+def apply_cursor(query, model_class, cursor_field: str, cursor: Optional[Tuple[Any, int]]):
+    """Ordena la consulta por el campo del cursor y aplica la búsqueda por clave"""
+    id_column = model_class.id
+
+    if cursor_field == 'id':
+        query = query.order_by(id_column)
+        if cursor is not None:
+            query = query.where(id_column > cursor[1])
+        return query
+
+    key_column = getattr(model_class, cursor_field)
+    query = query.order_by(key_column, id_column)
+    if cursor is not None:
+        key_value, last_id = cursor
+        query = query.where(or_(
+            key_column > key_value,
+            and_(key_column == key_value, id_column > last_id)
+        ))
+    return query
+
+
+def next_cursor(entities: list, cursor_field: str, limit: int) -> Optional[str]:
+    """Genera el cursor de la página siguiente o None si no hay más filas"""
+    if len(entities) < limit:
+        return None
+    last = entities[-1]
+    return encode_cursor(get_value(last, cursor_field), get_value(last, 'id'))
@@ -0,0 +1,155 @@
+"""Descriptores de ejecución precalculados por entidad"""
+
+from datetime import datetime
+from typing import Any, Dict, FrozenSet, List, Optional, Sequence, Tuple, Type
+
+from sqlalchemy import bindparam, delete, select, update
+from sqlmodel import SQLModel
+
+from ..core.cache import TTLCache
+from ..security.policy import EntityPolicy
+
+# Sentencias de proyección guardadas por entidad (las combinaciones de `fields` no tienen límite)
+MAX_CACHED_SELECTS = 256
+
+
+class EntityRuntime:
+    """
+    Datos de una entidad que no cambian entre peticiones.
+
+    Se calcula una vez al generar el router: columnas de borrado lógico,
+    política de permisos, clave primaria y sentencias construidas con
+    `bindparam`, de modo que cada petición solo enlaza valores y SQLAlchemy
+    reutiliza la compilación.
+    """
+
+    def __init__(self, entity_name: str, model_class: Type[SQLModel], permissions: Dict[str, Any]):
+        from ..config import AUTH
+
+        self.entity_name = entity_name
+        self.model_class = model_class
+        self.table = model_class.__table__
+        self.pk_column = model_class.id
+        self.has_update_stamp = hasattr(model_class, 'fecha_actualizacion')
+
+        # Borrado lógico
+        self.delete_column = AUTH['columna_borrado'] if hasattr(model_class, AUTH['columna_borrado']) else None
+        self.delete_type = AUTH['borrado_logico']
+        self.not_deleted = None
+        if self.delete_column:
+            column = getattr(model_class, self.delete_column)
+            self.not_deleted = column == True if self.delete_type == 'boolean' else column == None
+
+        # Acciones permitidas y columna de dueño de los permisos 'yo' por rol
+        self.policy = EntityPolicy(entity_name, model_class, permissions)
+
+        # Sentencias con parámetros
+        self.select_row = self._where_not_deleted(
+            select(self.table).where(self.pk_column == bindparam('entity_id'))
+        )
+        self.select_exists = self._where_not_deleted(
+            select(self.pk_column).where(self.pk_column == bindparam('entity_id'))
+        )
+        # Por conjunto de columnas: el orden de `fields` no genera sentencias nuevas
+        self._column_order = {column.name: index for index, column in enumerate(self.table.columns)}
+        self._selects = TTLCache(max_size=MAX_CACHED_SELECTS, ttl=None)
+        self._selects_by_id = TTLCache(max_size=MAX_CACHED_SELECTS, ttl=None)
+        self._delete_statements: Dict[Optional[str], Any] = {}
+
+    def _where_not_deleted(self, statement):
+        if self.not_deleted is not None:
+            return statement.where(self.not_deleted)
+        return statement
+
+    def user_filter(self, user: Any, action: str = 'r') -> Optional[Dict[str, Any]]:
+        """Filtro de dueño del usuario para la acción, o None si la puede realizar sobre todas las filas"""
+        return self.policy.owner_filter(user, action)
+    
+    def owner_condition(self, user_filter: Optional[Dict[str, Any]]):
+        """Predicado SQL del filtro de dueño, o None si no hay filtro"""
+        return self.policy.owner_condition(user_filter)
+
+    def _ordered(self, key: FrozenSet[str]) -> List[str]:
+        """Columnas del conjunto en el orden de la tabla"""
+        return sorted(key, key=lambda name: (self._column_order.get(name, len(self._column_order)), name))
+
+    def select_columns(self, column_names: Sequence[str]):
+        """
+        Select de las columnas indicadas que excluye las filas con borrado lógico.
+
+        Las columnas se seleccionan en el orden de la tabla; las filas se leen
+        por nombre, así que el orden de la respuesta lo decide quien llama.
+        """
+        key = frozenset(column_names)
+        statement = self._selects.get(key)
+        if statement is None:
+            statement = self._where_not_deleted(select(*[getattr(self.model_class, name) for name in self._ordered(key)]))
+            self._selects.set(key, statement)
+        return statement
+
+    def select_by_id(self, column_names: Sequence[str]):
+        """Select de las columnas indicadas de una fila no eliminada, con el parámetro `entity_id`"""
+        key = frozenset(column_names)
+        statement = self._selects_by_id.get(key)
+        if statement is None:
+            statement = self.select_columns(key).where(self.pk_column == bindparam('entity_id'))
+            self._selects_by_id.set(key, statement)
+        return statement
+
+    def stamp(self, values: Dict[str, Any]) -> Dict[str, Any]:
+        """Agrega la fecha de actualización a los valores de un UPDATE"""
+        if values and self.has_update_stamp:
+            values['fecha_actualizacion'] = datetime.utcnow()
+        return values
+
+    def soft_delete_values(self) -> Optional[Dict[str, Any]]:
+        """Valores que marcan una fila como eliminada, o None si se borra físicamente"""
+        if not self.delete_column:
+            return None
+        if self.delete_type == 'boolean':
+            return self.stamp({self.delete_column: False})
+        return self.stamp({self.delete_column: datetime.utcnow()})
+
+    def row_conditions(self, entity_id: int, user_filter: Optional[Dict[str, Any]]) -> List[Any]:
+        """Condiciones SQL para escribir una fila: ID, dueño 'yo' y no eliminada"""
+        conditions = [self.pk_column == entity_id]
+        if user_filter:
+            conditions.append(self.owner_condition(user_filter))
+        if self.not_deleted is not None:
+            conditions.append(self.not_deleted)
+        return conditions
+
+    def delete_statement(self, user_filter: Optional[Dict[str, Any]]) -> Tuple[Any, Dict[str, Any]]:
+        """
+        Sentencia de eliminación de una fila (UPDATE de borrado lógico o DELETE)
+        y sus parámetros, sin contar `entity_id`. Se construye una vez por
+        columna de dueño.
+        """
+        owner_column = next(iter(user_filter)) if user_filter else None
+        statement = self._delete_statements.get(owner_column)
+        if statement is None:
+            conditions = [self.pk_column == bindparam('entity_id')]
+            if owner_column:
+                conditions.append(self.policy.owner_predicates[owner_column])
+            if self.not_deleted is not None:
+                conditions.append(self.not_deleted)
+
+            if self.delete_column:
+                values = {self.delete_column: bindparam('valor_borrado')}
+                if self.has_update_stamp:
+                    values['fecha_actualizacion'] = bindparam('fecha_borrado')
+                statement = update(self.model_class).where(*conditions).values(values)
+            else:
+                statement = delete(self.model_class).where(*conditions)
+            statement = statement.execution_options(synchronize_session=False)
+            self._delete_statements[owner_column] = statement
+
+        params = {}
+        if owner_column:
+            params['owner_id'] = user_filter[owner_column]
+        if self.delete_column:
+            now = datetime.utcnow()
+            params['valor_borrado'] = False if self.delete_type == 'boolean' else now
+            if self.has_update_stamp:
+                params['fecha_borrado'] = now
+        return statement, params
@@ -1,7 +1,7 @@
 import asyncio
 import logging
 from typing import Any
-from fastapi import FastAPI, Request
+from fastapi import FastAPI, Request, Depends, HTTPException, status
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
 
@@ -9,9 +9,10 @@ from .config import update_config
 from .core.entity_parser import EntityParser
 from .core.model_generator import ModelGenerator
 from .db.connection import DatabaseManager, set_db_manager
-from .security.auth import AuthManager
+from .core.cache import create_cache_backend, get_cache_backend, set_cache_backend
+from .security.auth import AuthManager, set_auth_manager, configure_principal_cache, configure_revocation_list
 from .api.crud_generator import CRUDGenerator
-from .api.auth_routes import router as auth_router
+from .api.auth_routes import router as auth_router, get_current_user_with_session
 
 # Configurar logging
 from .config import LOG, DEBUG
@@ -42,6 +43,7 @@ class BackendGenerator:
             allow_credentials=True,
             allow_methods=["*"],
             allow_headers=["*"],
+            expose_headers=["X-Next-Cursor", "X-Total-Count", "ETag", "Last-Modified"],
         )
         
         # Inicializar componentes
@@ -56,6 +58,8 @@ class BackendGenerator:
             algorithm=JWT_ALGORITHM,
             access_token_expire_minutes=JWT_ACCESS_TOKEN_EXPIRE_MINUTES
         )
+        # Instancia compartida por las rutas de autenticación y los endpoints generados
+        set_auth_manager(self.auth_manager)
         self.crud_generator = CRUDGenerator(self.auth_manager)
         
         # Modelos generados
@@ -68,8 +72,13 @@ class BackendGenerator:
             logger.info("Iniciando generación del backend...")
             
             # 0. Inicializar DatabaseManager con configuración actualizada
-            from .config import DATABASE_URL
-            self.db_manager = DatabaseManager(DATABASE_URL)
+            from .config import DATABASE_URL, DB_REPLICA_URLS, DB_REPLICA_STRATEGY, DB_STICKY_SECONDS
+            self.db_manager = DatabaseManager(
+                DATABASE_URL,
+                replica_urls=DB_REPLICA_URLS,
+                replica_strategy=DB_REPLICA_STRATEGY,
+                sticky_seconds=DB_STICKY_SECONDS
+            )
             logger.info(f"DatabaseManager inicializado con URL: {DATABASE_URL}")
             
             # 0.5. Inicializar EntityParser con configuración actualizada
@@ -77,6 +86,19 @@ class BackendGenerator:
             self.entity_parser = EntityParser(ENTITIES_PATH)
             logger.info(f"EntityParser inicializado con ruta: {ENTITIES_PATH}")
             
+            # 0.7. Inicializar el backend de caché compartido (antes de generar los routers).
+            # Sus tareas de fondo se inician al arrancar el servidor, en el bucle de
+            # eventos que atiende las peticiones (no en el de la inicialización)
+            from .config import CACHE_BACKEND
+            cache_backend = create_cache_backend()
+            set_cache_backend(cache_backend)
+            self.app.router.add_event_handler("startup", cache_backend.start)
+            self.app.router.add_event_handler("shutdown", cache_backend.close)
+            self.app.router.add_event_handler("shutdown", self.auth_manager.close)
+            configure_principal_cache()
+            configure_revocation_list()
+            logger.info(f"Backend de caché inicializado: {CACHE_BACKEND}")
+            
             # 1. Cargar entidades desde YAML
             logger.info("Cargando entidades desde archivos YAML...")
             entities = self.entity_parser.load_entities()
@@ -145,6 +167,22 @@ class BackendGenerator:
                     "message": "Backend funcionando correctamente"
                 }
             
+            # 8. Métricas de las cachés de lectura (solo para los roles de METRICS_ROLES)
+            @self.app.get("/metricas")
+            async def metrics(current_user: Any = Depends(get_current_user_with_session)):
+                from .config import METRICS_ROLES
+                if current_user.rol not in METRICS_ROLES:
+                    raise HTTPException(
+                        status_code=status.HTTP_403_FORBIDDEN,
+                        detail="No tienes permisos para consultar las métricas"
+                    )
+                return {
+                    "cache": await get_cache_backend().stats(),
+                    "tokens": self.auth_manager.token_cache.stats() if self.auth_manager.token_cache else None,
+                    "pool": self.db_manager.pool_stats(),
+                    "replicas": self.db_manager.replica_stats()
+                }
+            
             logger.info("Backend generado exitosamente!")
             
         except Exception as e:
@@ -237,21 +275,19 @@ class BackendGenerator:
     def _create_protected_endpoint(self, original_func, permissions):
         """Crea un endpoint protegido con permisos"""
         import inspect
-        from fastapi import Request, HTTPException, Depends
-        from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
         
-        security = HTTPBearer()
+        # Roles permitidos, compilados una vez al registrar la ruta
+        allowed_roles = frozenset(permissions)
         
-        async def endpoint_wrapper(request: Request, credentials: HTTPAuthorizationCredentials = Depends(security)):
+        # El usuario (con su rol real y la verificación de revocación) se resuelve
+        # con la misma dependencia que los endpoints generados
+        async def endpoint_wrapper(request: Request, current_user: Any = Depends(get_current_user_with_session)):
             try:
                 logger.info(f"Endpoint protegido llamado: {original_func.__name__} por usuario con permisos: {permissions}")
                 
-                # Obtener usuario actual usando el AuthManager
-                current_user = await self.auth_manager.get_current_user(credentials)
-                
                 # Verificar permisos
                 user_role = getattr(current_user, 'rol', '')
-                if user_role not in permissions:
+                if user_role not in allowed_roles:
                     logger.warning(f"Usuario {getattr(current_user, 'nombre', 'desconocido')} sin permisos para {original_func.__name__}")
                     raise HTTPException(status_code=403, detail="Permisos insuficientes")
                 
@@ -338,7 +374,7 @@ class BackendGenerator:
                     
                     if not existing_user:
                         # Crear hash de la contraseña
-                        hashed_password = self.auth_manager.get_password_hash(user_data[password_column])
+                        hashed_password = await self.auth_manager.get_password_hash_async(user_data[password_column])
                         
                         # Crear usuario usando las columnas configuradas
                         user_kwargs = {
@@ -22,6 +22,7 @@ Ejemplos de uso:
   yaml-to-backend                                    # Ejecutar con configuración por defecto
   yaml-to-backend --port 8001                       # Cambiar puerto
   yaml-to-backend --db-host localhost --db-name test # Configurar base de datos
+  yaml-to-backend --db-driver sqlite --db-name app.db # Usar SQLite local
   yaml-to-backend --entities ./mis_entidades/       # Especificar ruta de entidades
         """
     )
@@ -65,6 +66,47 @@ Ejemplos de uso:
         "--db-name", 
         help="Nombre de la base de datos"
     )
+    parser.add_argument(
+        "--db-driver",
+        choices=["mysql", "postgresql", "sqlite"],
+        help="Motor de base de datos (por defecto: mysql)"
+    )
+    parser.add_argument(
+        "--database-url",
+        help="URL completa de conexión (tiene prioridad sobre --db-*)"
+    )
+    
+    # Argumentos del pool de conexiones
+    parser.add_argument(
+        "--db-pool-size",
+        type=int,
+        help="Conexiones permanentes del pool (por defecto: 10)"
+    )
+    parser.add_argument(
+        "--db-max-overflow",
+        type=int,
+        help="Conexiones adicionales permitidas sobre el tamaño del pool (por defecto: 20)"
+    )
+    parser.add_argument(
+        "--db-pool-timeout",
+        type=float,
+        help="Segundos de espera máxima por una conexión libre (por defecto: 30)"
+    )
+    parser.add_argument(
+        "--db-pool-recycle",
+        type=int,
+        help="Segundos tras los cuales se recicla una conexión (por defecto: 3600)"
+    )
+    parser.add_argument(
+        "--db-pool-pre-ping",
+        action="store_true",
+        help="Verificar la conexión en cada obtención del pool"
+    )
+    parser.add_argument(
+        "--db-pool-ping-idle",
+        type=float,
+        help="Verificar solo las conexiones inactivas por más de estos segundos (por defecto: 30)"
+    )
     
     # Argumentos de entidades
     parser.add_argument(
@@ -122,6 +164,30 @@ Ejemplos de uso:
     if args.db_name:
         config_updates['DB_NAME'] = args.db_name
     
+    if args.db_driver:
+        config_updates['DB_DRIVER'] = args.db_driver
+    
+    if args.database_url:
+        config_updates['DATABASE_URL'] = args.database_url
+    
+    if args.db_pool_size is not None:
+        config_updates['DB_POOL_SIZE'] = args.db_pool_size
+    
+    if args.db_max_overflow is not None:
+        config_updates['DB_MAX_OVERFLOW'] = args.db_max_overflow
+    
+    if args.db_pool_timeout is not None:
+        config_updates['DB_POOL_TIMEOUT'] = args.db_pool_timeout
+    
+    if args.db_pool_recycle is not None:
+        config_updates['DB_POOL_RECYCLE'] = args.db_pool_recycle
+    
+    if args.db_pool_pre_ping:
+        config_updates['DB_POOL_PRE_PING'] = True
+    
+    if args.db_pool_ping_idle is not None:
+        config_updates['DB_POOL_PING_IDLE'] = args.db_pool_ping_idle
+    
     if args.entities:
         entities_path = Path(args.entities)
         if not entities_path.exists():
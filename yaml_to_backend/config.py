@@ -15,6 +15,32 @@ DEFAULT_DB_USER = 'root'
 DEFAULT_DB_PASSWORD = '1234'
 DEFAULT_DB_NAME = 'mi_base'
 
+# Motor de base de datos: 'mysql', 'postgresql' o 'sqlite' (DB_NAME es la ruta del archivo o ':memory:')
+DEFAULT_DB_DRIVER = 'mysql'
+
+# Réplicas de lectura: URLs, estrategia ('round_robin' o 'least_busy') y segundos
+# durante los que un usuario que escribió lee de la primaria (0 lo desactiva)
+DEFAULT_DB_REPLICA_URLS = []
+DEFAULT_DB_REPLICA_STRATEGY = 'round_robin'
+DEFAULT_DB_STICKY_SECONDS = 5
+
+# Pool de conexiones: tamaño, desborde, espera máxima y reciclado (segundos)
+DEFAULT_DB_POOL_SIZE = 10
+DEFAULT_DB_MAX_OVERFLOW = 20
+DEFAULT_DB_POOL_TIMEOUT = 30
+DEFAULT_DB_POOL_RECYCLE = 3600
+# Ping en cada obtención de conexión; si está desactivado, solo se verifican las
+# conexiones inactivas por más de DB_POOL_PING_IDLE segundos (negativo lo desactiva)
+DEFAULT_DB_POOL_PRE_PING = False
+DEFAULT_DB_POOL_PING_IDLE = 30
+
+# Driver asíncrono de SQLAlchemy de cada motor
+DB_DRIVERS = {
+    'mysql': 'mysql+asyncmy',
+    'postgresql': 'postgresql+asyncpg',
+    'sqlite': 'sqlite+aiosqlite',
+}
+
 # Configuración del servidor
 DEFAULT_DEBUG = True
 DEFAULT_PORT = 8000
@@ -37,6 +63,21 @@ DEFAULT_JWT_SECRET_KEY = 'tu_clave_secreta_muy_segura_aqui'
 DEFAULT_JWT_ALGORITHM = "HS256"
 DEFAULT_JWT_ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
+# Configuración de la caché de usuarios autenticados, en segundos (0 la desactiva)
+DEFAULT_AUTH_CACHE_TTL = 30
+
+# Modo sin estado: el usuario se obtiene de los claims del token, sin consultar la base de datos
+DEFAULT_AUTH_STATELESS = False
+
+# Cantidad máxima de tokens verificados en caché (0 la desactiva)
+DEFAULT_TOKEN_CACHE_SIZE = 10000
+
+# Hilos dedicados al hash de contraseñas (bcrypt) y límite de logins simultáneos
+DEFAULT_PASSWORD_HASH_WORKERS = 4
+DEFAULT_LOGIN_MAX_CONCURRENCY = 8
+# Segundos que un login espera turno antes de responder 503
+DEFAULT_LOGIN_QUEUE_TIMEOUT = 10
+
 # Configuración de usuarios iniciales para modo instalación
 DEFAULT_INITIAL_USERS = [
     {
@@ -54,6 +95,22 @@ DEFAULT_INITIAL_USERS = [
 # Configuración de rutas personalizadas
 DEFAULT_CUSTOM_ROUTES = []
 
+# Configuración de exportación (filas leídas por lote del cursor del servidor)
+DEFAULT_EXPORT_CHUNK_SIZE = 1000
+
+# Configuración de operaciones masivas (filas por cada INSERT multi-fila)
+DEFAULT_BULK_CHUNK_SIZE = 500
+
+# Configuración de la caché de totales (X-Total-Count), en segundos
+DEFAULT_COUNT_CACHE_TTL = 30
+
+# Configuración del backend de caché compartido ('memory' o 'redis')
+DEFAULT_CACHE_BACKEND = 'memory'
+DEFAULT_CACHE_URL = 'redis://localhost:6379/0'
+
+# Roles que pueden consultar GET /metricas
+DEFAULT_METRICS_ROLES = ['admin']
+
 # =============================================================================
 # VARIABLES DE CONFIGURACIÓN (se pueden sobrescribir)
 # =============================================================================
@@ -67,6 +124,18 @@ DB_PORT = int(os.getenv('DB_PORT', DEFAULT_DB_PORT))
 DB_USER = os.getenv('DB_USER', DEFAULT_DB_USER)
 DB_PASSWORD = os.getenv('DB_PASSWORD', DEFAULT_DB_PASSWORD)
 DB_NAME = os.getenv('DB_NAME', DEFAULT_DB_NAME)
+DB_DRIVER = os.getenv('DB_DRIVER', DEFAULT_DB_DRIVER)
+DB_REPLICA_URLS = [url.strip() for url in os.getenv('DB_REPLICA_URLS', '').split(',') if url.strip()] or DEFAULT_DB_REPLICA_URLS.copy()
+DB_REPLICA_STRATEGY = os.getenv('DB_REPLICA_STRATEGY', DEFAULT_DB_REPLICA_STRATEGY)
+DB_STICKY_SECONDS = float(os.getenv('DB_STICKY_SECONDS', DEFAULT_DB_STICKY_SECONDS))
+
+# Configuración del pool de conexiones
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', DEFAULT_DB_POOL_SIZE))
+DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', DEFAULT_DB_MAX_OVERFLOW))
+DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', DEFAULT_DB_POOL_TIMEOUT))
+DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', DEFAULT_DB_POOL_RECYCLE))
+DB_POOL_PRE_PING = os.getenv('DB_POOL_PRE_PING', str(DEFAULT_DB_POOL_PRE_PING)).lower() in ('true', '1', 'si', 'sí')
+DB_POOL_PING_IDLE = float(os.getenv('DB_POOL_PING_IDLE', DEFAULT_DB_POOL_PING_IDLE))
 
 # Configuración del servidor
 DEBUG = os.getenv('DEBUG', str(DEFAULT_DEBUG)).lower() == 'true'
@@ -82,8 +151,30 @@ JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY', DEFAULT_JWT_SECRET_KEY)
 JWT_ALGORITHM = DEFAULT_JWT_ALGORITHM
 JWT_ACCESS_TOKEN_EXPIRE_MINUTES = DEFAULT_JWT_ACCESS_TOKEN_EXPIRE_MINUTES
 
-# URL de conexión a la base de datos
-DATABASE_URL = f"mysql+asyncmy://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+# Configuración de la caché de usuarios autenticados
+AUTH_CACHE_TTL = int(os.getenv('AUTH_CACHE_TTL', DEFAULT_AUTH_CACHE_TTL))
+
+# Configuración del modo de autenticación sin estado
+AUTH_STATELESS = os.getenv('AUTH_STATELESS', str(DEFAULT_AUTH_STATELESS)).lower() in ('true', '1', 'si', 'sí')
+
+# Configuración de la caché de tokens verificados
+TOKEN_CACHE_SIZE = int(os.getenv('TOKEN_CACHE_SIZE', DEFAULT_TOKEN_CACHE_SIZE))
+
+# Configuración del hash de contraseñas y de la cola de logins
+PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', DEFAULT_PASSWORD_HASH_WORKERS))
+LOGIN_MAX_CONCURRENCY = int(os.getenv('LOGIN_MAX_CONCURRENCY', DEFAULT_LOGIN_MAX_CONCURRENCY))
+LOGIN_QUEUE_TIMEOUT = float(os.getenv('LOGIN_QUEUE_TIMEOUT', DEFAULT_LOGIN_QUEUE_TIMEOUT))
+
+def build_database_url(driver: str, user: str, password: str, host: str, port: int, name: str) -> str:
+    """Construye la URL de conexión a partir del motor y de los campos DB_*"""
+    if driver not in DB_DRIVERS:
+        raise ValueError(f"Motor de base de datos no soportado: {driver}")
+    if driver == 'sqlite':
+        return f"{DB_DRIVERS[driver]}:///{name}"
+    return f"{DB_DRIVERS[driver]}://{user}:{password}@{host}:{port}/{name}"
+
+# URL de conexión a la base de datos (DATABASE_URL tiene prioridad sobre los campos DB_*)
+DATABASE_URL = os.getenv('DATABASE_URL') or build_database_url(DB_DRIVER, DB_USER, DB_PASSWORD, DB_HOST, DB_PORT, DB_NAME)
 
 # Configuración de usuarios iniciales para modo instalación
 INITIAL_USERS = DEFAULT_INITIAL_USERS.copy()
@@ -91,6 +182,22 @@ INITIAL_USERS = DEFAULT_INITIAL_USERS.copy()
 # Configuración de rutas personalizadas
 CUSTOM_ROUTES = DEFAULT_CUSTOM_ROUTES.copy()
 
+# Configuración de exportación
+EXPORT_CHUNK_SIZE = int(os.getenv('EXPORT_CHUNK_SIZE', DEFAULT_EXPORT_CHUNK_SIZE))
+
+# Configuración de operaciones masivas
+BULK_CHUNK_SIZE = int(os.getenv('BULK_CHUNK_SIZE', DEFAULT_BULK_CHUNK_SIZE))
+
+# Configuración de la caché de totales
+COUNT_CACHE_TTL = int(os.getenv('COUNT_CACHE_TTL', DEFAULT_COUNT_CACHE_TTL))
+
+# Configuración del backend de caché
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', DEFAULT_CACHE_BACKEND)
+CACHE_URL = os.getenv('CACHE_URL', DEFAULT_CACHE_URL)
+
+# Configuración del acceso a las métricas
+METRICS_ROLES = [role.strip() for role in os.getenv('METRICS_ROLES', '').split(',') if role.strip()] or DEFAULT_METRICS_ROLES.copy()
+
 # =============================================================================
 # FUNCIÓN PARA SOBRESCRIBIR CONFIGURACIÓN
 # =============================================================================
@@ -110,9 +217,14 @@ def update_config(**kwargs):
             INITIAL_USERS=[{'username': 'admin', 'password': 'admin123', 'rol': 'admin'}]
         )
     """
-    global ENTITIES_PATH, DB_HOST, DB_PORT, DB_USER, DB_PASSWORD, DB_NAME
+    global ENTITIES_PATH, DB_HOST, DB_PORT, DB_USER, DB_PASSWORD, DB_NAME, DB_DRIVER
+    global DB_REPLICA_URLS, DB_REPLICA_STRATEGY, DB_STICKY_SECONDS
+    global DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, DB_POOL_RECYCLE, DB_POOL_PRE_PING, DB_POOL_PING_IDLE
     global DEBUG, PORT, INSTALL, LOG, AUTH, JWT_SECRET_KEY, JWT_ALGORITHM
     global JWT_ACCESS_TOKEN_EXPIRE_MINUTES, DATABASE_URL, INITIAL_USERS, CUSTOM_ROUTES
+    global EXPORT_CHUNK_SIZE, BULK_CHUNK_SIZE, COUNT_CACHE_TTL, CACHE_BACKEND, CACHE_URL, METRICS_ROLES
+    global AUTH_CACHE_TTL, AUTH_STATELESS, TOKEN_CACHE_SIZE
+    global PASSWORD_HASH_WORKERS, LOGIN_MAX_CONCURRENCY, LOGIN_QUEUE_TIMEOUT
     
     # Actualizar variables individuales
     if 'ENTITIES_PATH' in kwargs:
@@ -133,6 +245,36 @@ def update_config(**kwargs):
     if 'DB_NAME' in kwargs:
         DB_NAME = kwargs['DB_NAME']
     
+    if 'DB_DRIVER' in kwargs:
+        DB_DRIVER = kwargs['DB_DRIVER']
+    
+    if 'DB_REPLICA_URLS' in kwargs:
+        DB_REPLICA_URLS = list(kwargs['DB_REPLICA_URLS'])
+    
+    if 'DB_REPLICA_STRATEGY' in kwargs:
+        DB_REPLICA_STRATEGY = kwargs['DB_REPLICA_STRATEGY']
+    
+    if 'DB_STICKY_SECONDS' in kwargs:
+        DB_STICKY_SECONDS = float(kwargs['DB_STICKY_SECONDS'])
+    
+    if 'DB_POOL_SIZE' in kwargs:
+        DB_POOL_SIZE = int(kwargs['DB_POOL_SIZE'])
+    
+    if 'DB_MAX_OVERFLOW' in kwargs:
+        DB_MAX_OVERFLOW = int(kwargs['DB_MAX_OVERFLOW'])
+    
+    if 'DB_POOL_TIMEOUT' in kwargs:
+        DB_POOL_TIMEOUT = float(kwargs['DB_POOL_TIMEOUT'])
+    
+    if 'DB_POOL_RECYCLE' in kwargs:
+        DB_POOL_RECYCLE = int(kwargs['DB_POOL_RECYCLE'])
+    
+    if 'DB_POOL_PRE_PING' in kwargs:
+        DB_POOL_PRE_PING = bool(kwargs['DB_POOL_PRE_PING'])
+    
+    if 'DB_POOL_PING_IDLE' in kwargs:
+        DB_POOL_PING_IDLE = float(kwargs['DB_POOL_PING_IDLE'])
+    
     if 'DEBUG' in kwargs:
         DEBUG = kwargs['DEBUG']
     
@@ -157,12 +299,51 @@ def update_config(**kwargs):
     if 'JWT_ACCESS_TOKEN_EXPIRE_MINUTES' in kwargs:
         JWT_ACCESS_TOKEN_EXPIRE_MINUTES = kwargs['JWT_ACCESS_TOKEN_EXPIRE_MINUTES']
     
+    if 'AUTH_CACHE_TTL' in kwargs:
+        AUTH_CACHE_TTL = int(kwargs['AUTH_CACHE_TTL'])
+    
+    if 'AUTH_STATELESS' in kwargs:
+        AUTH_STATELESS = bool(kwargs['AUTH_STATELESS'])
+    
+    if 'TOKEN_CACHE_SIZE' in kwargs:
+        TOKEN_CACHE_SIZE = int(kwargs['TOKEN_CACHE_SIZE'])
+    
+    if 'PASSWORD_HASH_WORKERS' in kwargs:
+        PASSWORD_HASH_WORKERS = int(kwargs['PASSWORD_HASH_WORKERS'])
+    
+    if 'LOGIN_MAX_CONCURRENCY' in kwargs:
+        LOGIN_MAX_CONCURRENCY = int(kwargs['LOGIN_MAX_CONCURRENCY'])
+    
+    if 'LOGIN_QUEUE_TIMEOUT' in kwargs:
+        LOGIN_QUEUE_TIMEOUT = float(kwargs['LOGIN_QUEUE_TIMEOUT'])
+    
     if 'INITIAL_USERS' in kwargs:
         INITIAL_USERS = kwargs['INITIAL_USERS'].copy()
     
     if 'CUSTOM_ROUTES' in kwargs:
         CUSTOM_ROUTES = kwargs['CUSTOM_ROUTES'].copy()
     
-    # Recalcular DATABASE_URL si se modificó alguna configuración de BD
-    if any(key in kwargs for key in ['DB_HOST', 'DB_PORT', 'DB_USER', 'DB_PASSWORD', 'DB_NAME']):
-        DATABASE_URL = f"mysql+asyncmy://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}" 
\ No newline at end of file
+    if 'EXPORT_CHUNK_SIZE' in kwargs:
+        EXPORT_CHUNK_SIZE = int(kwargs['EXPORT_CHUNK_SIZE'])
+    
+    if 'BULK_CHUNK_SIZE' in kwargs:
+        BULK_CHUNK_SIZE = int(kwargs['BULK_CHUNK_SIZE'])
+    
+    if 'COUNT_CACHE_TTL' in kwargs:
+        COUNT_CACHE_TTL = int(kwargs['COUNT_CACHE_TTL'])
+    
+    if 'CACHE_BACKEND' in kwargs:
+        CACHE_BACKEND = kwargs['CACHE_BACKEND']
+    
+    if 'CACHE_URL' in kwargs:
+        CACHE_URL = kwargs['CACHE_URL']
+    
+    if 'METRICS_ROLES' in kwargs:
+        METRICS_ROLES = list(kwargs['METRICS_ROLES'])
+    
+    # Una URL explícita tiene prioridad, también la de la variable de entorno
+    # DATABASE_URL; si no, se recalcula si se modificó alguna configuración de BD
+    if 'DATABASE_URL' in kwargs:
+        DATABASE_URL = kwargs['DATABASE_URL']
+    elif not os.getenv('DATABASE_URL') and any(key in kwargs for key in ['DB_HOST', 'DB_PORT', 'DB_USER', 'DB_PASSWORD', 'DB_NAME', 'DB_DRIVER']):
+        DATABASE_URL = build_database_url(DB_DRIVER, DB_USER, DB_PASSWORD, DB_HOST, DB_PORT, DB_NAME) 
\ No newline at end of file
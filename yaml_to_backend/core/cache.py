@@ -0,0 +1,447 @@
+"""Cachés en memoria y backends de caché compartidos entre workers"""
+
+import asyncio
+import json
+from abc import ABC, abstractmethod
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Dict, Hashable, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+
+class TTLCache:
+    """
+    Caché LRU acotada con expiración por tiempo y contadores de uso.
+
+    Con `max_size=None` no desaloja valores vigentes: las entradas solo salen
+    al expirar, y las expiradas se purgan cada vez que la caché duplica su
+    tamaño desde la última purga.
+    """
+
+    # Tamaño a partir del cual se purgan las entradas expiradas de una caché sin límite
+    MIN_PURGE_SIZE = 1024
+
+    def __init__(self, max_size: Optional[int] = 1024, ttl: Optional[float] = 60):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._purge_at = self.MIN_PURGE_SIZE
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Obtiene un valor vigente o `default` si no existe o expiró"""
+        item = self._data.get(key)
+        if item is None:
+            self.misses += 1
+            return default
+
+        expires_at, value = item
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._data[key]
+            self.misses += 1
+            return default
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        """Guarda un valor; `ttl` reemplaza la expiración por defecto de la caché"""
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+
+        self._data[key] = (expires_at, value)
+        self._data.move_to_end(key)
+
+        if self.max_size is None:
+            if len(self._data) >= self._purge_at:
+                self.purge_expired()
+                self._purge_at = max(2 * len(self._data), self.MIN_PURGE_SIZE)
+            return
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def purge_expired(self):
+        """Elimina las entradas expiradas"""
+        now = time.monotonic()
+        expired = [key for key, (expires_at, _) in self._data.items() if expires_at is not None and expires_at <= now]
+        for key in expired:
+            del self._data[key]
+
+    def delete(self, key: Hashable):
+        """Elimina un valor si existe"""
+        self._data.pop(key, None)
+
+    def clear(self):
+        """Elimina todos los valores"""
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        """Obtiene los contadores de uso de la caché"""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+# =============================================================================
+# BACKENDS DE CACHÉ COMPARTIDOS
+# =============================================================================
+
+class CacheBackend(ABC):
+    """
+    Interfaz de los backends de caché usados por la capa CRUD y la de autenticación.
+
+    Los valores se agrupan en espacios de nombres (por ejemplo `count:Usuarios`)
+    que se pueden descartar por completo con `clear`.
+    """
+
+    @abstractmethod
+    def configure(self, namespace: str, max_size: Optional[int] = 1024, ttl: Optional[float] = 60,
+                  propagate_writes: bool = False):
+        """
+        Define el tamaño máximo (None: sin límite, los valores solo salen al
+        expirar) y la expiración por defecto de un espacio de nombres. Con
+        `propagate_writes`, cada escritura descarta también las copias locales
+        de los demás workers (por ejemplo, para las revocaciones de tokens).
+        """
+
+    @abstractmethod
+    async def get(self, namespace: str, key: Hashable, default: Any = None) -> Any:
+        """Obtiene un valor vigente o `default` si no existe o expiró"""
+
+    @abstractmethod
+    async def set(self, namespace: str, key: Hashable, value: Any, ttl: Optional[float] = None):
+        """Guarda un valor; `ttl` reemplaza la expiración por defecto del espacio de nombres"""
+
+    @abstractmethod
+    async def delete(self, namespace: str, key: Hashable):
+        """Elimina un valor si existe"""
+
+    @abstractmethod
+    async def clear(self, namespace: str):
+        """Elimina todos los valores de un espacio de nombres"""
+
+    @abstractmethod
+    async def stats(self) -> Dict[str, Any]:
+        """Obtiene los contadores de uso del backend"""
+
+    async def start(self):
+        """Inicia las tareas de fondo del backend, si las tiene"""
+
+    async def close(self):
+        """Libera las conexiones del backend, si las tiene"""
+
+
+class MemoryCacheBackend(CacheBackend):
+    """Backend en memoria del proceso: un TTLCache por espacio de nombres"""
+
+    def __init__(self, max_size: int = 1024, ttl: Optional[float] = 60):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._caches: Dict[str, TTLCache] = {}
+
+    def configure(self, namespace: str, max_size: Optional[int] = 1024, ttl: Optional[float] = 60,
+                  propagate_writes: bool = False):
+        # Un único proceso: no hay copias de otros workers que descartar
+        self._caches[namespace] = TTLCache(max_size=max_size, ttl=ttl)
+
+    def _cache(self, namespace: str) -> TTLCache:
+        cache = self._caches.get(namespace)
+        if cache is None:
+            cache = self._caches[namespace] = TTLCache(max_size=self.max_size, ttl=self.ttl)
+        return cache
+
+    async def get(self, namespace: str, key: Hashable, default: Any = None) -> Any:
+        return self._cache(namespace).get(key, default)
+
+    async def set(self, namespace: str, key: Hashable, value: Any, ttl: Optional[float] = None):
+        self._cache(namespace).set(key, value, ttl)
+
+    async def delete(self, namespace: str, key: Hashable):
+        self._cache(namespace).delete(key)
+
+    async def clear(self, namespace: str):
+        self._cache(namespace).clear()
+
+    def clear_all(self):
+        """Elimina los valores de todos los espacios de nombres"""
+        for cache in self._caches.values():
+            cache.clear()
+
+    async def stats(self) -> Dict[str, Any]:
+        return {namespace: cache.stats() for namespace, cache in self._caches.items()}
+
+
+# Marca de ausencia en la copia local (None es un valor válido en caché)
+_MISSING = object()
+
+# Marca de una clave que tampoco existe en Redis (búsqueda negativa en la copia local)
+_ABSENT = object()
+
+
+def _encode_value(value: Any) -> Any:
+    """Convierte las fechas a un formato JSON que se pueda restaurar"""
+    if isinstance(value, datetime):
+        return {"__datetime__": value.isoformat()}
+    if isinstance(value, date):
+        return {"__date__": value.isoformat()}
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"Tipo no serializable en caché: {type(value).__name__}")
+
+
+def _decode_value(value: Dict[str, Any]) -> Any:
+    """Restaura las fechas codificadas por `_encode_value`"""
+    if "__datetime__" in value:
+        return datetime.fromisoformat(value["__datetime__"])
+    if "__date__" in value:
+        return date.fromisoformat(value["__date__"])
+    return value
+
+
+class RedisCacheBackend(CacheBackend):
+    """
+    Backend compartido sobre el protocolo de Redis para varios workers o nodos.
+
+    Cada worker mantiene además una copia local de corta duración (memoria) que
+    se descarta al recibir los mensajes de invalidación publicados por el resto
+    de los workers en el canal `<prefijo>:invalidaciones`. Las claves ausentes
+    también se recuerdan localmente durante `negative_ttl` segundos, para no
+    consultar Redis en cada búsqueda fallida.
+
+    Las claves incluyen la generación de su espacio de nombres
+    (`<prefijo>:generacion:<espacio>`): `clear` solo incrementa la generación y
+    las claves anteriores expiran por su TTL. Se puede inyectar un cliente
+    compatible con `redis.asyncio` (por ejemplo, uno falso en pruebas).
+    """
+
+    # Espera inicial y máxima entre reintentos de conexión del suscriptor de invalidaciones
+    RECONNECT_DELAY = 1
+    MAX_RECONNECT_DELAY = 30
+
+    def __init__(self, url: str, prefix: str = 'yaml_to_backend', local_ttl: float = 5,
+                 local_max_size: int = 1024, client: Any = None, negative_ttl: float = 1):
+        if client is None:
+            try:
+                import redis.asyncio as redis
+            except ImportError as e:
+                raise RuntimeError(
+                    "El backend de caché 'redis' requiere el paquete redis (pip install yaml-to-backend[redis])"
+                ) from e
+            client = redis.from_url(url)
+
+        self.client = client
+        self.prefix = prefix
+        self.channel = f"{prefix}:invalidaciones"
+        self.node_id = uuid.uuid4().hex
+        self.local = MemoryCacheBackend(max_size=local_max_size, ttl=local_ttl)
+        self.local_ttl = local_ttl
+        self.local_max_size = local_max_size
+        self.negative_ttl = min(negative_ttl, local_ttl)
+        self._generations: Dict[str, int] = {}
+        self._generations_checked: Dict[str, float] = {}
+        self._ttls: Dict[str, Optional[float]] = {}
+        self._propagated: Set[str] = set()
+        self._listener: Optional[asyncio.Task] = None
+        self.hits = 0
+        self.misses = 0
+
+    def configure(self, namespace: str, max_size: Optional[int] = 1024, ttl: Optional[float] = 60,
+                  propagate_writes: bool = False):
+        # Redis conserva los valores hasta su TTL; solo la copia local está acotada
+        self._ttls[namespace] = ttl
+        if propagate_writes:
+            self._propagated.add(namespace)
+        else:
+            self._propagated.discard(namespace)
+        local_ttl = self.local_ttl if ttl is None else min(ttl, self.local_ttl)
+        local_max_size = self.local_max_size if max_size is None else min(max_size, self.local_max_size)
+        self.local.configure(namespace, max_size=local_max_size, ttl=local_ttl)
+
+    def _generation_key(self, namespace: str) -> str:
+        return f"{self.prefix}:generacion:{namespace}"
+
+    async def _generation(self, namespace: str) -> int:
+        """Generación vigente del espacio de nombres (se relee cada `local_ttl` segundos)"""
+        checked = self._generations_checked.get(namespace)
+        if checked is None or time.monotonic() - checked >= self.local_ttl:
+            generation = int(await self.client.get(self._generation_key(namespace)) or 0)
+            self._set_generation(namespace, generation)
+            self._generations_checked[namespace] = time.monotonic()
+        return self._generations[namespace]
+
+    def _set_generation(self, namespace: str, generation: int):
+        """Registra una generación; si cambió (por ejemplo, un `clear` no recibido) descarta la copia local"""
+        known = self._generations.get(namespace)
+        if known is not None and generation <= known:
+            return
+        if known is not None:
+            self.local._cache(namespace).clear()
+        self._generations[namespace] = generation
+
+    async def _key(self, namespace: str, key: Hashable) -> str:
+        generation = await self._generation(namespace)
+        return f"{self.prefix}:{namespace}:{generation}:{json.dumps(key, default=str, separators=(',', ':'))}"
+
+    async def get(self, namespace: str, key: Hashable, default: Any = None) -> Any:
+        value = await self.local.get(namespace, key, _MISSING)
+        if value is _ABSENT:
+            return default
+        if value is not _MISSING:
+            return value
+
+        raw = await self.client.get(await self._key(namespace, key))
+        if raw is None:
+            self.misses += 1
+            await self.local.set(namespace, key, _ABSENT, ttl=self.negative_ttl)
+            return default
+
+        self.hits += 1
+        value = json.loads(raw, object_hook=_decode_value)
+        await self.local.set(namespace, key, value)
+        return value
+
+    async def set(self, namespace: str, key: Hashable, value: Any, ttl: Optional[float] = None):
+        ttl = self._ttls.get(namespace, 60) if ttl is None else ttl
+        raw = json.dumps(value, default=_encode_value, separators=(',', ':'))
+        await self.client.set(await self._key(namespace, key), raw, px=int(ttl * 1000) if ttl else None)
+        await self.local.set(namespace, key, value)
+        if namespace in self._propagated:
+            # Los demás workers descartan su copia, incluida la de una búsqueda sin resultado
+            await self._publish({"op": "delete", "namespace": namespace, "key": key})
+
+    async def delete(self, namespace: str, key: Hashable):
+        await self.client.delete(await self._key(namespace, key))
+        await self.local.delete(namespace, key)
+        await self._publish({"op": "delete", "namespace": namespace, "key": key})
+
+    async def clear(self, namespace: str):
+        generation = await self.client.incr(self._generation_key(namespace))
+        self._set_generation(namespace, generation)
+        await self.local.clear(namespace)
+        await self._publish({"op": "clear", "namespace": namespace, "generacion": generation})
+
+    async def _publish(self, message: Dict[str, Any]):
+        message["origen"] = self.node_id
+        await self.client.publish(self.channel, json.dumps(message, default=str))
+
+    def _apply_invalidation(self, payload: Dict[str, Any]):
+        """Aplica a la copia local un mensaje de invalidación de otro worker"""
+        if payload.get("origen") == self.node_id:
+            return
+        namespace = payload["namespace"]
+        if payload["op"] == "clear":
+            self._set_generation(namespace, int(payload["generacion"]))
+            self.local._cache(namespace).clear()
+        else:
+            key = payload["key"]
+            self.local._cache(namespace).delete(tuple(key) if isinstance(key, list) else key)
+
+    async def _listen(self):
+        """
+        Aplica a la copia local las invalidaciones publicadas por otros workers.
+
+        Si se pierde la conexión se reintenta con espera exponencial; al
+        reconectar se descarta la copia local y las generaciones conocidas,
+        porque pudieron perderse invalidaciones mientras tanto.
+        """
+        delay = self.RECONNECT_DELAY
+        while True:
+            pubsub = None
+            try:
+                pubsub = self.client.pubsub()
+                await pubsub.subscribe(self.channel)
+                delay = self.RECONNECT_DELAY
+                async for message in pubsub.listen():
+                    if message.get("type") != "message":
+                        continue
+                    try:
+                        self._apply_invalidation(json.loads(message["data"]))
+                    except Exception as e:
+                        logger.warning(f"Mensaje de invalidación inválido: {e}")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Suscripción a {self.channel} interrumpida, reintentando en {delay}s: {e}")
+            finally:
+                if pubsub is not None:
+                    try:
+                        await pubsub.aclose()
+                    except Exception:
+                        pass
+
+            self.local.clear_all()
+            self._generations_checked.clear()
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.MAX_RECONNECT_DELAY)
+
+    async def start(self):
+        """Inicia el suscriptor de invalidaciones en el bucle de eventos en curso"""
+        if self._listener is None or self._listener.done():
+            self._listener = asyncio.create_task(self._listen())
+
+    async def close(self):
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+        await self.client.aclose()
+
+    async def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "backend": "redis",
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "local": await self.local.stats(),
+        }
+
+
+# Instancia global del backend de caché
+_cache_backend: Optional[CacheBackend] = None
+
+
+def create_cache_backend() -> CacheBackend:
+    """Crea el backend de caché indicado en CACHE_BACKEND"""
+    from ..config import CACHE_BACKEND, CACHE_URL
+
+    if CACHE_BACKEND == 'redis':
+        return RedisCacheBackend(CACHE_URL)
+    if CACHE_BACKEND != 'memory':
+        raise ValueError(f"Backend de caché no soportado: {CACHE_BACKEND}")
+    return MemoryCacheBackend()
+
+
+def get_cache_backend() -> CacheBackend:
+    """Obtiene el backend de caché global (en memoria si no se estableció otro)"""
+    global _cache_backend
+    if _cache_backend is None:
+        _cache_backend = MemoryCacheBackend()
+    return _cache_backend
+
+
+def set_cache_backend(backend: CacheBackend):
+    """Establece el backend de caché global"""
+    global _cache_backend
+    _cache_backend = backend
@@ -1,6 +1,7 @@
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Set, Tuple
 from sqlmodel import SQLModel, Field
 from pydantic import BaseModel
+import hashlib
 import logging
 import os
 from datetime import datetime
@@ -8,6 +9,105 @@ import inflection
 
 logger = logging.getLogger(__name__)
 
+# Campos que el generador agrega a todas las tablas, con su configuración equivalente en YAML
+AUTOMATIC_FIELDS = {
+    'fecha_creacion': {'tipo': 'datetime', 'required': True, 'index': True},
+    'fecha_actualizacion': {'tipo': 'datetime', 'required': False},
+}
+
+# Plantillas de descripción de los endpoints generados (también las usa CRUDGenerator)
+ENDPOINT_DESCRIPTIONS = {
+    "list": "Lista todos los {entity_plural} del sistema con paginación",
+    "create": "Crea un nuevo {entity_singular}",
+    "read": "Obtiene un {entity_singular} específico por ID",
+    "update": "Actualiza un {entity_singular} existente",
+    "delete": "Elimina un {entity_singular} (soft delete)",
+    "yo": "Obtiene {entity_plural} del usuario autenticado",
+    "export": "Exporta todos los {entity_plural} en formato NDJSON o CSV",
+    "bulk_create": "Crea múltiples {entity_plural} en una sola transacción",
+    "bulk_update": "Actualiza múltiples {entity_plural} por IDs o filtros",
+    "bulk_delete": "Elimina múltiples {entity_plural} por IDs o filtros (soft delete)"
+}
+
+# Longitud máxima de los nombres de índice (MySQL admite 64 y PostgreSQL 63)
+MAX_INDEX_NAME_LENGTH = 60
+
+
+def get_auto_indexed_fields(entity_data: Dict[str, Any]) -> Set[str]:
+    """
+    Campos que se indexan automáticamente porque las consultas generadas
+    filtran por ellos: claves foráneas, columnas de dueño de los permisos 'yo'
+    y la columna de borrado lógico.
+    """
+    from ..config import AUTH
+    from ..security.policy import compile_role
+
+    campos = entity_data.get('campos', {})
+    fields = {field_name for field_name, field_config in campos.items() if field_config.get('fk')}
+    for role_permissions in (entity_data.get('permisos') or {}).values():
+        owner_column = compile_role(role_permissions).owner_column
+        if owner_column in campos and not campos[owner_column].get('pk'):
+            fields.add(owner_column)
+    fields.add(AUTH['columna_borrado'])
+    return fields
+
+
+def get_composite_indexes(entity_data: Dict[str, Any]) -> List[Tuple[str, List[str], bool]]:
+    """
+    Índices compuestos de la sección `indices` del YAML como tuplas
+    (nombre, columnas, único). Cada índice es una lista de campos o un
+    diccionario `{campos: [...], unique: true, nombre: ...}`. Lanza ValueError
+    si un índice no tiene campos o usa un campo inexistente.
+
+    Los índices de un solo campo que el modelo ya indexa (`pk`, `index`,
+    `unique` o índices automáticos) se omiten: SQLModel los crea como `ix_<tabla>_<campo>`
+    y el duplicado chocaría con ese nombre.
+    """
+    from ..config import AUTH
+
+    table_name = entity_data['tabla']
+    campos = entity_data.get('campos', {})
+    valid_fields = set(campos) | set(AUTOMATIC_FIELDS) | {AUTH['columna_borrado'], 'id'}
+    unique_fields = {
+        field_name for field_name, field_config in campos.items() if field_config.get('unique') or field_config.get('pk')
+    }
+    indexed_fields = get_auto_indexed_fields(entity_data) | unique_fields
+    indexed_fields.update(field_name for field_name, field_config in campos.items() if field_config.get('index'))
+    indexed_fields.update(
+        field_name for field_name, field_config in AUTOMATIC_FIELDS.items()
+        if field_config.get('index') and field_name not in campos
+    )
+    indexes = []
+    for index_config in entity_data.get('indices') or []:
+        if isinstance(index_config, dict):
+            columns = list(index_config.get('campos') or [])
+            unique = bool(index_config.get('unique', False))
+            name = index_config.get('nombre')
+        else:
+            columns = list(index_config or [])
+            unique = False
+            name = None
+
+        if not columns:
+            raise ValueError(f"Índice sin campos en la entidad {entity_data.get('entidad')}")
+        unknown = [column for column in columns if column not in valid_fields]
+        if unknown:
+            raise ValueError(f"Campos de índice inexistentes en la entidad {entity_data.get('entidad')}: {unknown}")
+
+        if len(columns) == 1 and columns[0] in (unique_fields if unique else indexed_fields):
+            logger.info(f"Índice omitido en la tabla {table_name}: el campo {columns[0]} ya está indexado")
+            continue
+
+        if not name:
+            prefix = 'uq' if unique else 'ix'
+            name = f"{prefix}_{table_name}_{'_'.join(columns)}"
+            if len(name) > MAX_INDEX_NAME_LENGTH:
+                digest = hashlib.sha1(name.encode()).hexdigest()[:8]
+                name = f"{name[:MAX_INDEX_NAME_LENGTH - 9]}_{digest}"
+        indexes.append((name, columns, unique))
+    return indexes
+
+
 class ModelGenerator:
     """Generador de modelos SQLModel desde entidades YAML"""
     
@@ -19,14 +119,7 @@ class ModelGenerator:
         self.base_models_file = "yaml_to_backend/db/models.py"
         
         # Plantillas de descripción para endpoints
-        self.endpoint_descriptions = {
-            "list": "Lista todos los {entity_plural} del sistema con paginación",
-            "create": "Crea un nuevo {entity_singular}",
-            "read": "Obtiene un {entity_singular} específico por ID",
-            "update": "Actualiza un {entity_singular} existente",
-            "delete": "Elimina un {entity_singular} (soft delete)",
-            "yo": "Obtiene {entity_plural} del usuario autenticado"
-        }
+        self.endpoint_descriptions = ENDPOINT_DESCRIPTIONS
         
     def generate_model_code(self, entity_name: str, entity_data: Dict[str, Any]) -> str:
         """Genera código Python para un modelo SQLModel"""
@@ -35,12 +128,24 @@ class ModelGenerator:
             f"class {entity_name}(SQLModel, table=True):",
             f'    """Modelo generado para la entidad {entity_name}"""',
             f"    __tablename__ = '{entity_data['tabla']}'",
-            "",
         ]
         
+        # Índices compuestos declarados en la sección `indices` del YAML
+        composite_indexes = get_composite_indexes(entity_data)
+        if composite_indexes:
+            code_lines.append("    __table_args__ = (")
+            for index_name, columns, unique in composite_indexes:
+                index_args = ", ".join([repr(index_name)] + [repr(column) for column in columns])
+                if unique:
+                    index_args += ", unique=True"
+                code_lines.append(f"        Index({index_args}),")
+            code_lines.append("    )")
+        code_lines.append("")
+        
         # Procesar campos del YAML
+        auto_indexed = get_auto_indexed_fields(entity_data)
         for field_name, field_config in entity_data['campos'].items():
-            field_code = self._get_field_code(field_name, field_config)
+            field_code = self._get_field_code(field_name, field_config, indexed=field_name in auto_indexed)
             if field_code:
                 code_lines.append(f"    {field_code}")
         
@@ -51,14 +156,14 @@ class ModelGenerator:
         # Solo agregar campo de borrado lógico si NO existe en el YAML
         if delete_column not in entity_data['campos']:
             if delete_type == 'boolean':
-                delete_field = f"    {delete_column}: bool = Field(default=True)"
+                delete_field = f"    {delete_column}: bool = Field(default=True, index=True)"
             else:
-                delete_field = f"    {delete_column}: Optional[datetime] = Field(default=None)"
+                delete_field = f"    {delete_column}: Optional[datetime] = Field(default=None, index=True)"
         else:
             delete_field = None
         # Agregar campos automáticos estándar solo si no existen
         if 'fecha_creacion' not in entity_data['campos']:
-            code_lines.append("    fecha_creacion: datetime = Field(default_factory=datetime.utcnow)")
+            code_lines.append("    fecha_creacion: datetime = Field(default_factory=datetime.utcnow, index=True)")
         if 'fecha_actualizacion' not in entity_data['campos']:
             code_lines.append("    fecha_actualizacion: Optional[datetime] = Field(default=None)")
         if delete_field:
@@ -130,8 +235,11 @@ class ModelGenerator:
         
         return examples.get(field_type, "ejemplo")
     
-    def _get_field_code(self, field_name: str, field_config: Dict[str, Any]) -> str:
-        """Genera código Python para un campo"""
+    def _get_field_code(self, field_name: str, field_config: Dict[str, Any], indexed: bool = False) -> str:
+        """
+        Genera código Python para un campo. `indexed` agrega un índice aunque
+        el YAML no lo declare (claves foráneas, dueño 'yo' y borrado lógico).
+        """
         field_type = field_config.get('tipo', 'string').lower()
         
         if field_config.get('pk'):
@@ -140,7 +248,7 @@ class ModelGenerator:
         if field_config.get('fk'):
             fk_config = field_config['fk']
             table_name, column_name = fk_config.split('.')
-            return f"{field_name}: Optional[int] = Field(default=None, foreign_key='{table_name}.{column_name}')"
+            return f"{field_name}: Optional[int] = Field(default=None, foreign_key='{table_name}.{column_name}', index=True)"
         
         # Mapeo de tipos
         type_mapping = {
@@ -168,7 +276,8 @@ class ModelGenerator:
         if field_config.get('unique'):
             field_args.append("unique=True")
             
-        if field_config.get('index'):
+        # Un campo único ya tiene su índice
+        if field_config.get('index') or (indexed and not field_config.get('unique')):
             field_args.append("index=True")
             
         if not field_config.get('required', True):
@@ -408,6 +517,7 @@ class ModelGenerator:
             '"""Modelos SQLModel base generados automáticamente desde entidades YAML"""',
             "",
             "from sqlmodel import SQLModel, Field",
+            "from sqlalchemy import Index",
             "from typing import Optional",
             "from datetime import datetime",
             "from yaml_to_backend.db.connection import Base",
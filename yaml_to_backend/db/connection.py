@@ -1,8 +1,15 @@
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
+from sqlalchemy import event, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import StaticPool
 from sqlalchemy.orm import DeclarativeBase
 from sqlmodel import SQLModel
+from .pool import InstrumentedQueuePool, PoolMetrics, install_idle_ping, pool_status
+from .schema import schema_fingerprint, store_fingerprint, sync_schema
+import itertools
 import logging
-from typing import List, Type
+from contextlib import asynccontextmanager
+from typing import Any, Dict, Hashable, List, Optional, Type
 
 logger = logging.getLogger(__name__)
 
@@ -10,33 +17,111 @@ class Base(DeclarativeBase):
     """Clase base para todos los modelos SQLModel"""
     pass
 
+# Espacio de nombres de la caché de usuarios que escribieron recientemente
+RECENT_WRITERS_CACHE = 'escrituras'
+
+
+class ReplicaPool:
+    """Réplica de lectura: su engine, su session maker y las sesiones en curso"""
+    
+    def __init__(self, url: str, engine, session_maker):
+        self.url = url
+        self.engine = engine
+        self.session_maker = session_maker
+        self.in_flight = 0
+
+
 class DatabaseManager:
-    """Gestor de conexión a la base de datos usando SQLModel"""
+    """
+    Gestor de conexión a la base de datos usando SQLModel.
+
+    Todas las escrituras usan la base primaria. Si se indican réplicas, las
+    lecturas se reparten entre ellas (`round_robin` o `least_busy`), salvo las
+    de los usuarios que escribieron en los últimos `sticky_seconds` segundos,
+    que se leen de la primaria para ver sus propios cambios.
+    """
     
-    def __init__(self, database_url: str):
+    def __init__(self, database_url: str, replica_urls: Optional[List[str]] = None,
+                 replica_strategy: str = 'round_robin', sticky_seconds: float = 5):
+        if replica_strategy not in ('round_robin', 'least_busy'):
+            raise ValueError(f"Estrategia de réplicas no soportada: {replica_strategy}")
         self.database_url = database_url
+        self.dialect = make_url(database_url).get_backend_name()
+        self.replica_urls = list(replica_urls or [])
+        self.replica_strategy = replica_strategy
+        self.sticky_seconds = sticky_seconds
         self.engine = None
         self.session_maker = None
+        self.replicas: List[ReplicaPool] = []
+        self._next_replica = itertools.count()
         self.is_initialized = False
-        # Configuración más robusta para el pool de conexiones
-        self.pool_pre_ping = True
-        self.pool_recycle = 3600  # Reciclar conexiones cada hora
-        self.pool_size = 10
-        self.max_overflow = 20
+        # Configuración del pool de conexiones
+        from ..config import (
+            DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, DB_POOL_RECYCLE,
+            DB_POOL_PRE_PING, DB_POOL_PING_IDLE
+        )
+        self.pool_size = DB_POOL_SIZE
+        self.max_overflow = DB_MAX_OVERFLOW
+        self.pool_timeout = DB_POOL_TIMEOUT
+        self.pool_recycle = DB_POOL_RECYCLE
+        self.pool_pre_ping = DB_POOL_PRE_PING
+        # Segundos de inactividad a partir de los cuales se verifica una conexión (negativo lo desactiva)
+        self.pool_ping_idle = DB_POOL_PING_IDLE
         
-    async def init_db(self, models: List[Type] = None):
-        """Inicializa la conexión a la base de datos"""
-        try:
-            # Crear engine asíncrono con configuración robusta
-            self.engine = create_async_engine(
-                self.database_url,
-                echo=False,  # Cambiar a True para debug
-                future=True,
+    def _engine_options(self, database_url: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Opciones del engine según el dialecto.
+
+        SQLite no usa un servidor, por lo que no aplican el tamaño del pool,
+        el reciclado ni el pre-ping. Una base `:memory:` se comparte con una
+        única conexión (StaticPool) para que todas las sesiones vean las mismas
+        tablas.
+        """
+        url = make_url(database_url or self.database_url)
+        options = {
+            'echo': False,  # Cambiar a True para debug
+            'future': True,
+        }
+        if url.get_backend_name() != 'sqlite':
+            options.update(
+                poolclass=InstrumentedQueuePool,
                 pool_pre_ping=self.pool_pre_ping,
                 pool_recycle=self.pool_recycle,
                 pool_size=self.pool_size,
-                max_overflow=self.max_overflow
+                max_overflow=self.max_overflow,
+                pool_timeout=self.pool_timeout
             )
+        elif url.database in (None, '', ':memory:'):
+            options['poolclass'] = StaticPool
+        else:
+            options['poolclass'] = InstrumentedQueuePool
+        return options
+    
+    def _create_engine(self, database_url: str):
+        """Crea un engine asíncrono con la configuración de su dialecto"""
+        engine = create_async_engine(database_url, **self._engine_options(database_url))
+        
+        # Métricas de obtención de conexiones y verificación solo de las conexiones inactivas
+        metrics = None
+        if isinstance(engine.sync_engine.pool, InstrumentedQueuePool):
+            metrics = engine.sync_engine.pool.metrics = PoolMetrics()
+        if not self.pool_pre_ping and self.pool_ping_idle >= 0 and make_url(database_url).get_backend_name() != 'sqlite':
+            install_idle_ping(engine, self.pool_ping_idle, metrics)
+        
+        if make_url(database_url).get_backend_name() == 'sqlite':
+            # SQLite no valida las claves foráneas salvo que se active por conexión
+            @event.listens_for(engine.sync_engine, "connect")
+            def enable_foreign_keys(dbapi_connection, connection_record):
+                cursor = dbapi_connection.cursor()
+                cursor.execute("PRAGMA foreign_keys=ON")
+                cursor.close()
+        return engine
+    
+    async def init_db(self, models: List[Type] = None):
+        """Inicializa la conexión a la base de datos"""
+        try:
+            # Crear engine asíncrono con configuración según el dialecto
+            self.engine = self._create_engine(self.database_url)
             
             # Crear session maker
             self.session_maker = async_sessionmaker(
@@ -45,9 +130,20 @@ class DatabaseManager:
                 expire_on_commit=False
             )
             
-            # Crear todas las tablas
+            # Réplicas de lectura (el esquema lo replica la base primaria)
+            self.replicas = []
+            for replica_url in self.replica_urls:
+                engine = self._create_engine(replica_url)
+                session_maker = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+                self.replicas.append(ReplicaPool(replica_url, engine, session_maker))
+            if self.replicas:
+                from ..core.cache import get_cache_backend
+                get_cache_backend().configure(RECENT_WRITERS_CACHE, max_size=100000, ttl=self.sticky_seconds)
+                logger.info(f"Réplicas de lectura configuradas: {len(self.replicas)} ({self.replica_strategy})")
+            
+            # Crear solo las tablas, columnas e índices nuevos si cambió la huella del esquema
             async with self.engine.begin() as conn:
-                await conn.run_sync(SQLModel.metadata.create_all)
+                await conn.run_sync(sync_schema, SQLModel.metadata)
             
             self.is_initialized = True
             logger.info("Base de datos inicializada correctamente")
@@ -58,6 +154,8 @@ class DatabaseManager:
     
     async def close_db(self):
         """Cierra la conexión a la base de datos"""
+        for replica in self.replicas:
+            await replica.engine.dispose()
         if self.engine:
             await self.engine.dispose()
             self.is_initialized = False
@@ -71,11 +169,39 @@ class DatabaseManager:
                 await conn.run_sync(SQLModel.metadata.drop_all)
                 # Crear todas las tablas nuevamente
                 await conn.run_sync(SQLModel.metadata.create_all)
+                await conn.run_sync(
+                    lambda sync_conn: store_fingerprint(
+                        sync_conn, schema_fingerprint(SQLModel.metadata, sync_conn.dialect)
+                    )
+                )
             logger.info("Base de datos reiniciada correctamente")
         except Exception as e:
             logger.error(f"Error reiniciando base de datos: {e}")
             raise
     
+    async def estimate_row_count(self, session: AsyncSession, table_name: str) -> Optional[int]:
+        """
+        Estima la cantidad de filas de una tabla a partir de las estadísticas
+        del motor. Retorna None si el dialecto no ofrece estadísticas.
+        """
+        dialect = session.bind.dialect.name
+        if dialect == 'mysql':
+            query = text(
+                "SELECT TABLE_ROWS FROM information_schema.TABLES "
+                "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :tabla"
+            )
+        elif dialect == 'postgresql':
+            query = text("SELECT reltuples::bigint FROM pg_class WHERE relname = :tabla")
+        else:
+            return None
+        
+        result = await session.execute(query, {"tabla": table_name})
+        estimate = result.scalar_one_or_none()
+        # PostgreSQL informa -1 si la tabla nunca fue analizada
+        if estimate is None or estimate < 0:
+            return None
+        return int(estimate)
+    
     def get_session(self) -> AsyncSession:
         """Obtiene una sesión de base de datos"""
         if not self.session_maker:
@@ -92,6 +218,73 @@ class DatabaseManager:
             yield session
         finally:
             await session.close()
+    
+    def _choose_replica(self) -> ReplicaPool:
+        start = next(self._next_replica) % len(self.replicas)
+        if self.replica_strategy == 'least_busy':
+            # Los empates se resuelven en orden rotativo para no cargar siempre la primera
+            candidates = self.replicas[start:] + self.replicas[:start]
+            return min(candidates, key=lambda replica: replica.in_flight)
+        return self.replicas[start]
+    
+    async def mark_write(self, client_key: Hashable):
+        """Registra que un cliente escribió, para leer de la primaria durante `sticky_seconds`"""
+        if self.replicas and self.sticky_seconds > 0:
+            from ..core.cache import get_cache_backend
+            await get_cache_backend().set(RECENT_WRITERS_CACHE, client_key, True)
+    
+    async def wrote_recently(self, client_key: Hashable) -> bool:
+        """Indica si el cliente escribió dentro de la ventana de `sticky_seconds`"""
+        if not self.replicas or self.sticky_seconds <= 0 or client_key is None:
+            return False
+        from ..core.cache import get_cache_backend
+        return bool(await get_cache_backend().get(RECENT_WRITERS_CACHE, client_key))
+    
+    @asynccontextmanager
+    async def read_session(self, client_key: Hashable = None):
+        """
+        Sesión de solo lectura: de una réplica si hay réplicas configuradas y el
+        cliente no escribió recientemente; en caso contrario, de la primaria.
+        Las sesiones de réplica se marcan con `session.info['replica']`.
+        """
+        if not self.session_maker:
+            raise RuntimeError("Base de datos no inicializada")
+        
+        if not self.replicas or await self.wrote_recently(client_key):
+            async with self.session_maker() as session:
+                yield session
+            return
+        
+        replica = self._choose_replica()
+        replica.in_flight += 1
+        try:
+            async with replica.session_maker() as session:
+                session.info['replica'] = replica.url
+                yield session
+        finally:
+            replica.in_flight -= 1
+    
+    @staticmethod
+    def is_replica_session(session: AsyncSession) -> bool:
+        """Indica si la sesión lee de una réplica (que puede estar atrasada respecto a la primaria)"""
+        return 'replica' in session.info
+    
+    def replica_stats(self) -> List[Dict[str, Any]]:
+        """Sesiones en curso y estado del pool por réplica"""
+        return [
+            {
+                "replica": make_url(replica.url).render_as_string(hide_password=True),
+                "en_curso": replica.in_flight,
+                **pool_status(replica.engine)
+            }
+            for replica in self.replicas
+        ]
+    
+    def pool_stats(self) -> Dict[str, Any]:
+        """Estado y métricas del pool de la base primaria"""
+        if self.engine is None:
+            return {}
+        return pool_status(self.engine)
 
 # Variable global para el DatabaseManager
 _db_manager = None
@@ -0,0 +1,119 @@
+"""Pool de conexiones instrumentado y verificación de conexiones inactivas"""
+
+import logging
+import time
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import event, exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+logger = logging.getLogger(__name__)
+
+# Límites superiores (en milisegundos) de los intervalos del histograma de espera
+WAIT_BUCKETS_MS = (1, 5, 10, 50, 100, 500, 1000, 5000)
+
+
+class PoolMetrics:
+    """Contadores de obtención de conexiones de un pool"""
+
+    def __init__(self):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.pings = 0
+        self.stale = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.wait_buckets: List[int] = [0] * (len(WAIT_BUCKETS_MS) + 1)
+
+    def observe_wait(self, seconds: float):
+        """Registra el tiempo de espera de una obtención de conexión"""
+        self.checkouts += 1
+        self.wait_total += seconds
+        self.wait_max = max(self.wait_max, seconds)
+        milliseconds = seconds * 1000
+        for index, limit in enumerate(WAIT_BUCKETS_MS):
+            if milliseconds <= limit:
+                self.wait_buckets[index] += 1
+                return
+        self.wait_buckets[-1] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        histogram = {f"<={limit}ms": count for limit, count in zip(WAIT_BUCKETS_MS, self.wait_buckets)}
+        histogram[f">{WAIT_BUCKETS_MS[-1]}ms"] = self.wait_buckets[-1]
+        return {
+            "obtenciones": self.checkouts,
+            "timeouts": self.timeouts,
+            "pings": self.pings,
+            "conexiones_caidas": self.stale,
+            "espera_promedio_ms": round(self.wait_total / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+            "espera_maxima_ms": round(self.wait_max * 1000, 3),
+            "espera_histograma": histogram,
+        }
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """
+    Pool asíncrono que mide cuánto espera cada obtención de conexión y cuántas
+    agotan `pool_timeout`. Las métricas se conservan al recrear el pool.
+    """
+
+    metrics: Optional[PoolMetrics] = None
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            if self.metrics is not None:
+                self.metrics.timeouts += 1
+            raise
+        finally:
+            if self.metrics is not None:
+                self.metrics.observe_wait(time.perf_counter() - start)
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+
+def install_idle_ping(engine, idle_seconds: float, metrics: Optional[PoolMetrics] = None):
+    """
+    Verifica con un ping solo las conexiones que estuvieron inactivas más de
+    `idle_seconds`, en lugar de hacerlo en cada obtención (`pool_pre_ping`).
+
+    Si el ping falla, el pool descarta la conexión y obtiene otra.
+    """
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine, "checkin")
+    def record_last_use(dbapi_connection, connection_record):
+        connection_record.info['ultimo_uso'] = time.monotonic()
+
+    @event.listens_for(sync_engine, "checkout")
+    def ping_idle_connection(dbapi_connection, connection_record, connection_proxy):
+        last_use = connection_record.info.get('ultimo_uso')
+        if last_use is None or time.monotonic() - last_use < idle_seconds:
+            return
+        if metrics is not None:
+            metrics.pings += 1
+        try:
+            sync_engine.dialect.do_ping(dbapi_connection)
+        except Exception as e:
+            if metrics is not None:
+                metrics.stale += 1
+            logger.warning(f"Conexión inactiva descartada: {e}")
+            raise exc.DisconnectionError() from e
+
+
+def pool_status(engine) -> Dict[str, Any]:
+    """Estado actual del pool de un engine (conexiones en uso, libres y de desborde)"""
+    pool = engine.sync_engine.pool
+    status = {"pool": type(pool).__name__}
+    for name, method in (("tamano", "size"), ("en_uso", "checkedout"), ("libres", "checkedin"), ("desborde", "overflow")):
+        if hasattr(pool, method):
+            status[name] = getattr(pool, method)()
+    metrics = getattr(pool, 'metrics', None)
+    if metrics is not None:
+        status.update(metrics.stats())
+    return status
@@ -0,0 +1,247 @@
+"""Huella del esquema y planificador incremental de DDL"""
+
+import hashlib
+import json
+import logging
+from datetime import datetime
+from typing import Any, List, Optional
+
+from sqlalchemy import (
+    Boolean, Column, DateTime, Index, Integer, MetaData, String, Table, func, inspect, literal, select, text
+)
+from sqlalchemy.schema import (
+    AddConstraint, CreateColumn, CreateIndex, CreateTable, DDL, ForeignKeyConstraint, UniqueConstraint
+)
+
+logger = logging.getLogger(__name__)
+
+# Versión del cálculo de la huella: cambiarla fuerza una nueva planificación
+FINGERPRINT_VERSION = 1
+
+# Tabla con la huella del último esquema aplicado (fuera de los metadatos de las entidades)
+schema_metadata = MetaData()
+schema_table = Table(
+    'yaml_to_backend_esquema', schema_metadata,
+    Column('id', Integer, primary_key=True),
+    Column('huella', String(64), nullable=False),
+    Column('fecha_actualizacion', DateTime, nullable=False),
+)
+
+
+def schema_fingerprint(metadata: MetaData, dialect) -> str:
+    """
+    Huella SHA-256 del esquema de las entidades: tablas, columnas (tipo según el
+    dialecto, nulidad, clave primaria y valores por defecto del servidor),
+    claves foráneas, índices y restricciones únicas.
+    """
+    tables = []
+    for table in sorted(metadata.tables.values(), key=lambda table: table.name):
+        columns = [
+            [
+                column.name,
+                column.type.compile(dialect=dialect),
+                column.nullable,
+                column.primary_key,
+                str(column.server_default.arg) if column.server_default is not None else None,
+            ]
+            for column in table.columns
+        ]
+        foreign_keys = sorted(
+            [element.parent.name, element.target_fullname] for element in table.foreign_keys
+        )
+        indexes = sorted(
+            [index.name, [column.name for column in index.columns], index.unique] for index in table.indexes
+        )
+        uniques = sorted(
+            [column.name for column in constraint.columns]
+            for constraint in table.constraints if isinstance(constraint, UniqueConstraint)
+        )
+        tables.append([table.name, columns, foreign_keys, indexes, uniques])
+
+    raw = json.dumps([FINGERPRINT_VERSION, tables], separators=(',', ':'))
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def _added_column(table: Table, column: Column, dialect) -> Column:
+    """
+    Copia de una columna nueva para `ALTER TABLE ... ADD COLUMN`.
+
+    Las filas existentes toman el valor por defecto escalar del modelo; si no
+    lo hay, una columna NOT NULL se agrega como nullable para no fallar sobre
+    tablas con datos.
+    """
+    server_default = column.server_default.arg if column.server_default is not None else None
+    if server_default is None and column.default is not None and column.default.is_scalar:
+        value = literal(column.default.arg, column.type).compile(
+            dialect=dialect, compile_kwargs={"literal_binds": True}
+        )
+        server_default = text(str(value))
+
+    nullable = column.nullable or server_default is None
+    if nullable and not column.nullable:
+        logger.warning(f"La columna {table.name}.{column.name} se agrega como nullable (no tiene valor por defecto)")
+
+    added = Column(column.name, column.type, nullable=nullable, server_default=server_default)
+    Table(table.name, MetaData(), added)
+    return added
+
+
+def _types_match(expected, reflected, dialect) -> bool:
+    """
+    Indica si el tipo de una columna existente corresponde al del modelo. Se
+    comparan los tipos compilados para el dialecto; si difieren, basta con que
+    coincidan la afinidad y la longitud (p. ej. TIMESTAMP y DATETIME), y los
+    booleanos se aceptan sobre enteros (MySQL los guarda como TINYINT).
+    """
+    if expected.compile(dialect=dialect) == reflected.compile(dialect=dialect):
+        return True
+    if isinstance(expected, Boolean) and reflected._type_affinity is Integer:
+        return True
+    return (expected._type_affinity is reflected._type_affinity
+            and getattr(expected, 'length', None) == getattr(reflected, 'length', None))
+
+
+def _has_duplicates(connection, table: Table, columns: List[str]) -> bool:
+    """Indica si la tabla existente tiene filas repetidas en `columns` (ignorando NULL)"""
+    selected = [table.c[name] for name in columns]
+    query = select(*selected).where(*(column.isnot(None) for column in selected))
+    query = query.group_by(*selected).having(func.count() > 1).limit(1)
+    return connection.execute(query).first() is not None
+
+
+def plan_schema(connection, metadata: MetaData, pending: Optional[List[str]] = None) -> List[Any]:
+    """
+    Planifica el DDL que lleva la base al esquema de `metadata` sin borrar nada:
+    crea las tablas nuevas con sus índices, agrega las columnas nuevas (con sus
+    claves foráneas), los índices faltantes y los índices únicos de las
+    restricciones `unique` que todavía no existen.
+
+    Las columnas o tablas que ya no están en el YAML y los cambios de tipo no
+    se aplican; solo se informan en el log. Una restricción única que no se
+    puede crear porque hay filas repetidas se agrega a `pending`.
+    """
+    dialect = connection.dialect
+    preparer = dialect.identifier_preparer
+    inspector = inspect(connection)
+    existing_tables = set(inspector.get_table_names())
+    metadata_copy: Optional[MetaData] = None
+    plan: List[Any] = []
+
+    for table in metadata.sorted_tables:
+        if table.name not in existing_tables:
+            plan.append(CreateTable(table))
+            plan.extend(CreateIndex(index) for index in table.indexes)
+            continue
+
+        existing_columns = {column['name']: column for column in inspector.get_columns(table.name)}
+        new_columns = [column for column in table.columns if column.name not in existing_columns]
+        for column in new_columns:
+            column_spec = CreateColumn(_added_column(table, column, dialect)).compile(dialect=dialect)
+            statement = f"ALTER TABLE {preparer.format_table(table)} ADD COLUMN {column_spec}"
+            plan.append(DDL(statement.replace('%', '%%')))
+
+        for column in table.columns:
+            reflected = existing_columns.get(column.name)
+            if reflected is not None and not _types_match(column.type, reflected['type'], dialect):
+                logger.warning(
+                    f"La columna {table.name}.{column.name} es {reflected['type'].compile(dialect=dialect)} en la base "
+                    f"y {column.type.compile(dialect=dialect)} en el YAML (el tipo no se modifica)"
+                )
+
+        removed = set(existing_columns) - {column.name for column in table.columns}
+        if removed:
+            logger.info(f"Columnas de {table.name} que ya no están en el YAML (no se eliminan): {sorted(removed)}")
+
+        reflected_indexes = inspector.get_indexes(table.name)
+        existing_indexes = {index['name'] for index in reflected_indexes}
+        plan.extend(CreateIndex(index) for index in table.indexes if index.name not in existing_indexes)
+
+        existing_uniques = {frozenset(index['column_names']) for index in reflected_indexes if index['unique']}
+        existing_uniques.update(frozenset(constraint['column_names'])
+                                for constraint in inspector.get_unique_constraints(table.name))
+        new_names = {column.name for column in new_columns}
+        missing_uniques = [
+            constraint for constraint in table.constraints
+            if isinstance(constraint, UniqueConstraint)
+            and frozenset(column.name for column in constraint.columns) not in existing_uniques
+        ]
+        if not new_columns and not missing_uniques:
+            continue
+
+        # Las restricciones se crean sobre una copia de los metadatos para no
+        # alterar los de las entidades
+        if metadata_copy is None:
+            metadata_copy = MetaData()
+            for source in metadata.sorted_tables:
+                source.to_metadata(metadata_copy)
+        table_copy = metadata_copy.tables[table.key]
+
+        for constraint in missing_uniques:
+            constraint_columns = sorted(column.name for column in constraint.columns)
+            if not new_names & set(constraint_columns) and _has_duplicates(connection, table, constraint_columns):
+                logger.warning(
+                    f"No se crea la restricción única de {table.name}.{constraint_columns}: hay filas repetidas"
+                )
+                if pending is not None:
+                    pending.append(f"unique {table.name}.{constraint_columns}")
+                continue
+            name = f"uq_{table.name}_{'_'.join(constraint_columns)}"
+            plan.append(CreateIndex(Index(name, *(table_copy.c[column] for column in constraint_columns), unique=True)))
+
+        for constraint in table_copy.constraints:
+            constraint_columns = {column.name for column in constraint.columns}
+            if not isinstance(constraint, ForeignKeyConstraint) or not constraint_columns & new_names:
+                continue
+            if dialect.name == 'sqlite':
+                logger.warning(
+                    f"SQLite no permite agregar la clave foránea de {table.name}.{sorted(constraint_columns)} "
+                    f"a una tabla existente"
+                )
+                continue
+            plan.append(AddConstraint(constraint))
+
+    for table_name in sorted(existing_tables - set(metadata.tables) - set(schema_metadata.tables)):
+        logger.info(f"La tabla {table_name} ya no está en el YAML (no se elimina)")
+
+    return plan
+
+
+def read_fingerprint(connection) -> Optional[str]:
+    """Huella guardada del último esquema aplicado, o None si no hay ninguna"""
+    schema_metadata.create_all(connection)
+    return connection.execute(select(schema_table.c.huella).where(schema_table.c.id == 1)).scalar_one_or_none()
+
+
+def store_fingerprint(connection, fingerprint: str):
+    """Guarda la huella del esquema aplicado"""
+    schema_metadata.create_all(connection)
+    values = {"huella": fingerprint, "fecha_actualizacion": datetime.utcnow()}
+    updated = connection.execute(schema_table.update().where(schema_table.c.id == 1).values(values))
+    if not updated.rowcount:
+        connection.execute(schema_table.insert().values(id=1, **values))
+
+
+def sync_schema(connection, metadata: MetaData) -> bool:
+    """
+    Sincroniza el esquema de forma incremental. Si la huella guardada coincide
+    con la de `metadata` no se ejecuta DDL; si no, se aplica el plan de
+    `plan_schema` y se guarda la nueva huella, salvo que quedaran cambios
+    pendientes (se vuelven a planificar en el próximo inicio). Retorna True si
+    hubo cambios.
+    """
+    fingerprint = schema_fingerprint(metadata, connection.dialect)
+    if read_fingerprint(connection) == fingerprint:
+        logger.info("Esquema sin cambios, se omite la sincronización de tablas")
+        return False
+
+    pending: List[str] = []
+    plan = plan_schema(connection, metadata, pending)
+    for statement in plan:
+        logger.info(f"Aplicando DDL: {str(statement.compile(dialect=connection.dialect)).strip()}")
+        connection.execute(statement)
+    if pending:
+        logger.warning(f"Cambios de esquema pendientes, no se guarda la huella: {pending}")
+    else:
+        store_fingerprint(connection, fingerprint)
+    logger.info(f"Esquema sincronizado ({len(plan)} sentencias DDL)")
+    return True
@@ -0,0 +1,47 @@
+"""Sentencias INSERT ... ON CONFLICT según el dialecto de la base de datos"""
+
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import Table
+
+# Dialectos con inserción o actualización en una sola sentencia
+UPSERT_DIALECTS = ('postgresql', 'sqlite', 'mysql', 'mariadb')
+
+
+def build_upsert(dialect_name: str, table: Table, rows: List[Dict[str, Any]],
+                 conflict_column: str, update_values: Dict[str, Any] = None,
+                 update_columns: Optional[List[str]] = None):
+    """
+    Construye un INSERT multi-fila que actualiza las filas existentes.
+
+    PostgreSQL y SQLite usan `ON CONFLICT (columna) DO UPDATE` sobre la columna
+    única indicada; MySQL usa `ON DUPLICATE KEY UPDATE`, que aplica a cualquier
+    clave única de la tabla. Se actualizan las columnas de `update_columns`
+    (por defecto, todas las de las filas) salvo la de conflicto, más los
+    valores fijos de `update_values` (por ejemplo, la fecha de actualización).
+    Lanza ValueError si el dialecto no lo soporta.
+    """
+    update_columns = [name for name in (rows[0] if update_columns is None else update_columns) if name != conflict_column]
+    update_values = update_values or {}
+
+    if dialect_name in ('mysql', 'mariadb'):
+        from sqlalchemy.dialects.mysql import insert
+        statement = insert(table).values(rows)
+        values = {name: statement.inserted[name] for name in update_columns}
+        values.update(update_values)
+        # Sin columnas que actualizar, se reasigna la columna de conflicto (no cambia nada)
+        return statement.on_duplicate_key_update(values or {conflict_column: statement.inserted[conflict_column]})
+
+    if dialect_name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect_name == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise ValueError(f"El dialecto {dialect_name} no soporta upsert")
+
+    statement = insert(table).values(rows)
+    values = {name: statement.excluded[name] for name in update_columns}
+    if not values:
+        return statement.on_conflict_do_nothing(index_elements=[conflict_column])
+    values.update(update_values)
+    return statement.on_conflict_do_update(index_elements=[conflict_column], set_=values)
@@ -1,10 +1,17 @@
+import asyncio
+import hashlib
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
 from datetime import datetime, timedelta, timezone
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Mapping
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import HTTPException, status, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 import logging
+from .policy import compile_role
 # Los modelos se generan dinámicamente, no se importan directamente
 # from ..db.models import Usuario
 
@@ -17,14 +24,138 @@ logger = logging.getLogger(__name__)
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=12)
 security = HTTPBearer()
 
+# Espacio de nombres de la caché de usuarios autenticados
+PRINCIPAL_CACHE = 'principales'
+
+# Espacio de nombres de la lista de tokens revocados
+REVOCATION_CACHE = 'revocados'
+
+
+class SimpleUser:
+    """Usuario autenticado construido a partir de los datos de su fila"""
+    
+    def __init__(self, data: Mapping[str, Any]):
+        for key, value in data.items():
+            setattr(self, key, value)
+
+
+def is_active_user(data: Mapping[str, Any]) -> bool:
+    """Indica si la fila de un usuario no tiene borrado lógico"""
+    from ..config import AUTH
+    
+    delete_column = AUTH['columna_borrado']
+    if delete_column not in data:
+        return True
+    if AUTH['borrado_logico'] == 'boolean':
+        return bool(data[delete_column])
+    return data[delete_column] is None
+
+
+def configure_principal_cache():
+    """Define el tamaño y la expiración de la caché de usuarios autenticados"""
+    from ..config import AUTH_CACHE_TTL
+    from ..core.cache import get_cache_backend
+    
+    get_cache_backend().configure(PRINCIPAL_CACHE, max_size=10000, ttl=AUTH_CACHE_TTL)
+
+
+async def invalidate_principals(*user_ids: int):
+    """
+    Descarta los usuarios autenticados en caché tras escribir en la tabla de usuarios.
+
+    En modo sin estado además revoca los tokens emitidos hasta ahora para los
+    usuarios modificados, ya que sus claims pueden haber quedado desactualizados.
+    """
+    from ..config import AUTH_STATELESS
+    from ..core.cache import get_cache_backend
+    
+    await get_cache_backend().clear(PRINCIPAL_CACHE)
+    if AUTH_STATELESS:
+        for user_id in user_ids:
+            await revoke_user(user_id)
+
+
+def configure_revocation_list():
+    """
+    Define la caché de revocaciones, que solo necesita durar lo que dura un
+    token. No tiene límite de tamaño: desalojar una revocación vigente volvería
+    a aceptar el token, así que las entradas solo salen al expirar. Cada
+    revocación descarta además las copias locales del resto de los workers.
+    """
+    from ..config import JWT_ACCESS_TOKEN_EXPIRE_MINUTES
+    from ..core.cache import get_cache_backend
+    
+    get_cache_backend().configure(
+        REVOCATION_CACHE, max_size=None, ttl=JWT_ACCESS_TOKEN_EXPIRE_MINUTES * 60, propagate_writes=True
+    )
+
+
+async def revoke_token(payload: Dict[str, Any]):
+    """Revoca un token por su `jti` hasta que expire"""
+    from ..core.cache import get_cache_backend
+    
+    jti = payload.get('jti')
+    if jti is None:
+        return
+    ttl = max(payload.get('exp', 0) - time.time(), 1)
+    await get_cache_backend().set(REVOCATION_CACHE, ('jti', jti), True, ttl=ttl)
+
+
+async def revoke_user(user_id: Optional[int] = None):
+    """Revoca los tokens emitidos hasta ahora para un usuario, o para todos si no se indica"""
+    from ..core.cache import get_cache_backend
+    
+    key = ('usuario', user_id) if user_id is not None else ('todos',)
+    await get_cache_backend().set(REVOCATION_CACHE, key, time.time())
+
+
+async def is_revoked(payload: Dict[str, Any], user_id: Optional[int] = None) -> bool:
+    """
+    Indica si un token fue revocado por su `jti`, por su usuario o de forma
+    global. El usuario se toma del claim `id` o, si no lo tiene, de `user_id`.
+    """
+    from ..core.cache import get_cache_backend
+    
+    cache = get_cache_backend()
+    jti = payload.get('jti')
+    if jti is not None and await cache.get(REVOCATION_CACHE, ('jti', jti)):
+        return True
+    
+    issued_at = payload.get('iat')
+    if issued_at is None:
+        return False
+    revoked_at = await cache.get(REVOCATION_CACHE, ('todos',))
+    if revoked_at is not None and issued_at <= revoked_at:
+        return True
+    user_id = payload.get('id', user_id)
+    if user_id is not None:
+        revoked_at = await cache.get(REVOCATION_CACHE, ('usuario', user_id))
+        if revoked_at is not None and issued_at <= revoked_at:
+            return True
+    return False
+
+
 class AuthManager:
     """Gestor de autenticación y autorización"""
     
-    def __init__(self, secret_key: str, algorithm: str = "HS256", access_token_expire_minutes: int = 30):
+    def __init__(self, secret_key: str, algorithm: str = "HS256", access_token_expire_minutes: int = 30,
+                 token_cache_size: Optional[int] = None):
+        from ..config import TOKEN_CACHE_SIZE, PASSWORD_HASH_WORKERS, LOGIN_MAX_CONCURRENCY
+        from ..core.cache import TTLCache
+        
         self.secret_key = secret_key
         self.algorithm = algorithm
         self.access_token_expire_minutes = access_token_expire_minutes
         
+        # Tokens ya verificados, por hash del token y vigentes hasta su `exp`
+        token_cache_size = TOKEN_CACHE_SIZE if token_cache_size is None else token_cache_size
+        self.token_cache = TTLCache(max_size=token_cache_size, ttl=None) if token_cache_size > 0 else None
+        
+        # bcrypt libera el GIL, por lo que un pool de hilos basta para no bloquear el event loop
+        self._hash_executor: Optional[ThreadPoolExecutor] = None
+        self.hash_workers = PASSWORD_HASH_WORKERS
+        self._login_slots = asyncio.Semaphore(LOGIN_MAX_CONCURRENCY)
+        
     def verify_password(self, plain_password: str, hashed_password: str) -> bool:
         """Verifica una contraseña contra su hash"""
         return pwd_context.verify(plain_password, hashed_password)
@@ -32,6 +163,51 @@ class AuthManager:
     def get_password_hash(self, password: str) -> str:
         """Genera el hash de una contraseña"""
         return pwd_context.hash(password)
+    
+    def _get_hash_executor(self) -> ThreadPoolExecutor:
+        if self._hash_executor is None:
+            self._hash_executor = ThreadPoolExecutor(
+                max_workers=self.hash_workers, thread_name_prefix="password-hash"
+            )
+        return self._hash_executor
+    
+    async def verify_password_async(self, plain_password: str, hashed_password: str) -> bool:
+        """Verifica una contraseña en el pool de hash, sin bloquear el event loop"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._get_hash_executor(), pwd_context.verify, plain_password, hashed_password)
+    
+    async def get_password_hash_async(self, password: str) -> str:
+        """Genera el hash de una contraseña en el pool de hash, sin bloquear el event loop"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._get_hash_executor(), pwd_context.hash, password)
+    
+    def close(self):
+        """Libera los hilos del pool de hash"""
+        if self._hash_executor is not None:
+            self._hash_executor.shutdown(wait=False)
+            self._hash_executor = None
+    
+    @asynccontextmanager
+    async def login_slot(self):
+        """
+        Turno para procesar un login. Como máximo LOGIN_MAX_CONCURRENCY logins
+        se procesan a la vez; el resto espera en cola hasta LOGIN_QUEUE_TIMEOUT
+        segundos y luego recibe un 503.
+        """
+        from ..config import LOGIN_QUEUE_TIMEOUT
+        
+        try:
+            await asyncio.wait_for(self._login_slots.acquire(), timeout=LOGIN_QUEUE_TIMEOUT)
+        except asyncio.TimeoutError:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Demasiados inicios de sesión simultáneos, intente nuevamente",
+                headers={"Retry-After": str(max(1, int(LOGIN_QUEUE_TIMEOUT)))},
+            )
+        try:
+            yield
+        finally:
+            self._login_slots.release()
         
     def create_access_token(self, data: Dict[str, Any], expires_delta: Optional[timedelta] = None) -> str:
         """Crea un token JWT de acceso"""
@@ -42,15 +218,41 @@ class AuthManager:
         else:
             expire = datetime.now(timezone.utc) + timedelta(minutes=self.access_token_expire_minutes)
             
+        # `iat` y `jti` permiten revocar el token (por usuario o individualmente)
         to_encode.update({"exp": expire})
+        to_encode.setdefault("iat", time.time())
+        to_encode.setdefault("jti", uuid.uuid4().hex)
         encoded_jwt = jwt.encode(to_encode, self.secret_key, algorithm=self.algorithm)
         return encoded_jwt
         
     def verify_token(self, token: str) -> Optional[Dict[str, Any]]:
-        """Verifica y decodifica un token JWT"""
-        try:
-            payload = jwt.decode(token, self.secret_key, algorithms=[self.algorithm])
+        """
+        Verifica y decodifica un token JWT.
+
+        Los tokens válidos se guardan en caché por el hash del token hasta su
+        `exp`, de modo que un mismo token solo se decodifica una vez. Los
+        inválidos no se guardan.
+        """
+        if self.token_cache is None:
+            return self._decode_token(token)
+        
+        key = hashlib.sha256(token.encode('utf-8')).digest()
+        payload = self.token_cache.get(key)
+        if payload is not None:
             return payload
+        
+        payload = self._decode_token(token)
+        if payload is not None:
+            expires_at = payload.get('exp')
+            if expires_at is None:
+                self.token_cache.set(key, payload)
+            elif expires_at > time.time():
+                self.token_cache.set(key, payload, ttl=expires_at - time.time())
+        return payload
+    
+    def _decode_token(self, token: str) -> Optional[Dict[str, Any]]:
+        try:
+            return jwt.decode(token, self.secret_key, algorithms=[self.algorithm])
         except JWTError:
             return None
             
@@ -71,19 +273,15 @@ class AuthManager:
             
             # Usar una consulta más simple sin regenerar modelos
             result = await session.execute(
-                text(f"SELECT * FROM usuarios WHERE {user_column} = :username"),
+                text(f"SELECT * FROM {AUTH['tabla']} WHERE {user_column} = :username"),
                 {"username": username}
             )
             user_data = result.fetchone()
             
-            if user_data and self.verify_password(password, getattr(user_data, password_column)):
-                # Crear un objeto simple con los datos del usuario
-                class SimpleUser:
-                    def __init__(self, data):
-                        for key, value in data._mapping.items():
-                            setattr(self, key, value)
-                
-                return SimpleUser(user_data)
+            # Los usuarios con borrado lógico no pueden iniciar sesión
+            if (user_data and is_active_user(user_data._mapping)
+                    and await self.verify_password_async(password, getattr(user_data, password_column))):
+                return SimpleUser(user_data._mapping)
                 
         except Exception as e:
             logger.error(f"Error en autenticación: {e}")
@@ -96,8 +294,62 @@ class AuthManager:
             
         return None
         
+    async def load_principal(self, username: str, session = None) -> Optional[Dict[str, Any]]:
+        """
+        Obtiene los datos del usuario del token, primero desde la caché por `sub`.
+
+        Los usuarios con borrado lógico no se aceptan. La caché se descarta al
+        escribir en la tabla de usuarios y, como máximo, expira a los
+        AUTH_CACHE_TTL segundos. Sin `session` la consulta se hace en una
+        sesión propia de la base primaria.
+        """
+        from ..config import AUTH_CACHE_TTL
+        from ..core.cache import get_cache_backend
+        
+        cache = get_cache_backend()
+        if AUTH_CACHE_TTL > 0:
+            principal = await cache.get(PRINCIPAL_CACHE, username)
+            if principal is not None:
+                return principal
+        
+        if session is None:
+            from ..db.connection import get_db_manager
+            async with get_db_manager().get_session() as own_session:
+                principal = await self._fetch_principal(username, own_session)
+        else:
+            principal = await self._fetch_principal(username, session)
+        
+        if principal is not None and AUTH_CACHE_TTL > 0:
+            await cache.set(PRINCIPAL_CACHE, username, principal)
+        return principal
+    
+    async def _fetch_principal(self, username: str, session) -> Optional[Dict[str, Any]]:
+        """Lee el usuario activo de la base, sin el hash de la contraseña"""
+        from sqlalchemy import text
+        from ..config import AUTH
+        
+        result = await session.execute(
+            text(f"SELECT * FROM {AUTH['tabla']} WHERE {AUTH['columna_usuario']} = :username"),
+            {"username": username}
+        )
+        user_data = result.fetchone()
+        if user_data is None or not is_active_user(user_data._mapping):
+            return None
+        
+        # El hash de la contraseña no se guarda en la caché
+        return {
+            key: value for key, value in user_data._mapping.items()
+            if key != AUTH['columna_password']
+        }
+    
     async def get_current_user(self, credentials: HTTPAuthorizationCredentials = Depends(security), session = None) -> Any:
-        """Obtiene el usuario actual desde el token JWT"""
+        """
+        Obtiene el usuario actual desde el token JWT.
+
+        El usuario se toma de los claims (modo sin estado) o de la tabla de
+        usuarios (con la sesión indicada o, si no la hay, con una propia). En
+        todos los casos se rechazan los tokens revocados.
+        """
         credentials_exception = HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="No se pudieron validar las credenciales",
@@ -115,81 +367,51 @@ class AuthManager:
                 
         except JWTError:
             raise credentials_exception
-            
-        if session:
-            from sqlalchemy import select, text
-            from ..config import AUTH
-            
-            # Obtener la columna de usuario desde la configuración
-            user_column = AUTH['columna_usuario']
-            
-            result = await session.execute(
-                text(f"SELECT * FROM usuarios WHERE {user_column} = :username"),
-                {"username": username}
-            )
-            user_data = result.fetchone()
-            
-            if user_data is None:
-                raise credentials_exception
-                
-            # Crear un objeto simple con los datos del usuario
-            class SimpleUser:
-                def __init__(self, data):
-                    for key, value in data._mapping.items():
-                        setattr(self, key, value)
-                        
-            return SimpleUser(user_data)
+        
+        from ..config import AUTH, AUTH_STATELESS
+        if AUTH_STATELESS and 'id' in payload and 'rol' in payload:
+            # Modo sin estado: el usuario se construye solo con los claims verificados
+            principal = {
+                'id': payload['id'],
+                'rol': payload['rol'],
+                AUTH['columna_usuario']: username
+            }
         else:
-            # Fallback para casos donde no hay sesión disponible
-            # Crear un usuario simple con los datos del token
-            class SimpleUser:
-                def __init__(self, username: str, role: str = "admin"):
-                    self.nombre = username
-                    self.rol = role
-                    
-            return SimpleUser(username)
+            principal = await self.load_principal(username, session)
         
-    def has_permission(self, user: Usuario, entity_permissions: Dict[str, Any], action: str) -> bool:
-        """Verifica si un usuario tiene permisos para una acción específica"""
-        user_role = user.rol
+        if principal is None or await is_revoked(payload, principal.get('id')):
+            raise credentials_exception
+        return SimpleUser(principal)
         
-        # Verificar permisos por rol
-        if user_role in entity_permissions:
-            permissions = entity_permissions[user_role]
-            
-            # Si es una lista simple de permisos
-            if isinstance(permissions, list):
-                return action in permissions
-                
-            # Si es un diccionario con permisos especiales
-            elif isinstance(permissions, dict):
-                # Verificar permisos directos
-                if action in permissions:
-                    return True
-                    
-                # Verificar permisos 'yo'
-                if 'yo' in permissions:
-                    return True
-                    
-        return False
+    def has_permission(self, user: Usuario, entity_permissions: Dict[str, Any], action: str) -> bool:
+        """
+        Verifica si un usuario tiene permisos para una acción específica.
+
+        Compila los permisos en cada llamada; los endpoints generados usan en
+        su lugar la política ya compilada de la entidad (`EntityPolicy`).
+        """
+        return compile_role(entity_permissions.get(user.rol)).allows(action)
         
-    def get_user_filter(self, user: Usuario, entity_permissions: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    def get_user_filter(self, user: Usuario, entity_permissions: Dict[str, Any],
+                        action: str = 'r') -> Optional[Dict[str, Any]]:
         """Obtiene el filtro para permisos tipo 'yo'"""
-        user_role = user.rol
-        
-        if user_role in entity_permissions:
-            permissions = entity_permissions[user_role]
-            
-            if isinstance(permissions, dict) and 'yo' in permissions:
-                yo_config = permissions['yo']
-                
-                # Si es el usuario mismo
-                if 'campo_usuario' not in yo_config:
-                    return {'id': user.id}
-                    
-                # Si es una entidad relacionada
-                else:
-                    campo_usuario = yo_config['campo_usuario']
-                    return {campo_usuario: user.id}
-                    
-        return None 
\ No newline at end of file
+        owner_column = compile_role(entity_permissions.get(user.rol)).owner_column_for(action)
+        if owner_column is None:
+            return None
+        return {owner_column: user.id} 
+
+# Instancia global del AuthManager
+_auth_manager: Optional[AuthManager] = None
+
+def get_auth_manager() -> AuthManager:
+    """Obtiene la instancia global del AuthManager (se crea con la configuración actual si no existe)"""
+    global _auth_manager
+    if _auth_manager is None:
+        from ..config import JWT_SECRET_KEY, JWT_ALGORITHM, JWT_ACCESS_TOKEN_EXPIRE_MINUTES
+        _auth_manager = AuthManager(JWT_SECRET_KEY, JWT_ALGORITHM, JWT_ACCESS_TOKEN_EXPIRE_MINUTES)
+    return _auth_manager
+
+def set_auth_manager(auth_manager: AuthManager):
+    """Establece la instancia global del AuthManager"""
+    global _auth_manager
+    _auth_manager = auth_manager
@@ -0,0 +1,139 @@
+"""Política de permisos compilada a partir del bloque `permisos` del YAML"""
+
+import logging
+from typing import Any, Dict, FrozenSet, Optional, Type
+
+from sqlalchemy import bindparam
+from sqlmodel import SQLModel
+
+logger = logging.getLogger(__name__)
+
+# Acciones de los endpoints CRUD: lectura, escritura y eliminación
+ACTIONS = ('r', 'w', 'd')
+
+# Acción del endpoint /yo
+OWN_ACTION = 'yo'
+
+
+class RolePolicy:
+    """
+    Permisos de un rol sobre una entidad.
+
+    `actions` son las acciones permitidas sobre cualquier fila y `own_actions`
+    las permitidas solo sobre las filas propias (regla 'yo'), cuyo dueño se
+    identifica por `owner_column`.
+    """
+
+    __slots__ = ('actions', 'own_actions', 'owner_column')
+
+    def __init__(self, actions: FrozenSet[str] = frozenset(), own_actions: FrozenSet[str] = frozenset(),
+                 owner_column: Optional[str] = None):
+        self.actions = actions
+        self.own_actions = own_actions
+        self.owner_column = owner_column
+
+    def allows(self, action: str) -> bool:
+        if action == OWN_ACTION:
+            return self.owner_column is not None
+        return action in self.actions or action in self.own_actions
+
+    def owner_column_for(self, action: str) -> Optional[str]:
+        """Columna de dueño que restringe la acción, o None si se permite sobre cualquier fila"""
+        if action == OWN_ACTION:
+            return self.owner_column
+        if action in self.actions:
+            return None
+        return self.owner_column
+
+
+# Rol sin permisos
+NO_PERMISSIONS = RolePolicy()
+
+
+def compile_role(role_permissions: Any) -> RolePolicy:
+    """
+    Compila los permisos de un rol. Se admiten dos formatos:
+
+    - Lista de acciones: `[r, w, d]`
+    - Diccionario con acciones y regla 'yo':
+      `{yo: {campo_usuario: usuario, acciones: [r, w]}}`. Si la regla no
+      indica `acciones`, se permiten todas sobre las filas propias.
+    """
+    if isinstance(role_permissions, (list, tuple, set)):
+        return RolePolicy(actions=frozenset(action for action in role_permissions if action in ACTIONS))
+
+    if not isinstance(role_permissions, dict):
+        return NO_PERMISSIONS
+
+    actions = frozenset(
+        action for action, enabled in role_permissions.items()
+        if action in ACTIONS and enabled is not False
+    )
+    if OWN_ACTION not in role_permissions:
+        return RolePolicy(actions=actions)
+
+    own_rule = role_permissions[OWN_ACTION]
+    own_rule = own_rule if isinstance(own_rule, dict) else {}
+    own_actions = frozenset(action for action in own_rule.get('acciones', ACTIONS) if action in ACTIONS)
+    return RolePolicy(
+        actions=actions,
+        own_actions=own_actions - actions,
+        owner_column=own_rule.get('campo_usuario', 'id')
+    )
+
+
+class EntityPolicy:
+    """
+    Tabla de permisos de una entidad por rol, compilada una vez al generar su router.
+
+    Para cada columna de dueño se guarda la columna y el predicado SQL
+    `columna = :owner_id`, que las sentencias precompiladas (como el borrado)
+    reciben al ejecutarse con el ID del usuario como parámetro.
+    """
+
+    def __init__(self, entity_name: str, model_class: Type[SQLModel], permissions: Dict[str, Any]):
+        self.entity_name = entity_name
+        self.roles: Dict[str, RolePolicy] = {
+            role: compile_role(role_permissions) for role, role_permissions in (permissions or {}).items()
+        }
+
+        self.owner_columns: Dict[str, Any] = {}
+        self.owner_predicates: Dict[str, Any] = {}
+        for role, role_policy in self.roles.items():
+            column_name = role_policy.owner_column
+            if column_name is None or column_name in self.owner_predicates:
+                continue
+            if not hasattr(model_class, column_name):
+                logger.warning(f"Campo de usuario '{column_name}' del rol {role} no existe en {entity_name}")
+                self.roles[role] = RolePolicy(actions=role_policy.actions)
+                continue
+            column = getattr(model_class, column_name)
+            self.owner_columns[column_name] = column
+            self.owner_predicates[column_name] = column == bindparam('owner_id', type_=column.type)
+
+    @property
+    def has_owner_rules(self) -> bool:
+        """Indica si algún rol tiene regla 'yo' (y por lo tanto la entidad expone /yo)"""
+        return bool(self.owner_predicates)
+
+    def allows(self, user: Any, action: str) -> bool:
+        """Indica si el rol del usuario puede realizar la acción (sobre todas o sobre sus filas)"""
+        return self.roles.get(user.rol, NO_PERMISSIONS).allows(action)
+
+    def owner_filter(self, user: Any, action: str = 'r') -> Optional[Dict[str, Any]]:
+        """Filtro de dueño `{columna: ID del usuario}` de la acción, o None si no se restringe"""
+        owner_column = self.roles.get(user.rol, NO_PERMISSIONS).owner_column_for(action)
+        if owner_column is None:
+            return None
+        return {owner_column: user.id}
+
+    def owner_condition(self, user_filter: Optional[Dict[str, Any]]):
+        """
+        Predicado SQL del filtro de dueño para una consulta construida por
+        petición. Compara la columna directamente: clonar el predicado con
+        `.params()` cuesta más que construir la comparación.
+        """
+        if not user_filter:
+            return None
+        (owner_column, owner_id), = user_filter.items()
+        return self.owner_columns[owner_column] == owner_id